@@ -0,0 +1,236 @@
+"""
+Замеры производительности генератора на синтетическом EXCEL-файле (см. bench/workbook.py).
+
+Время каждого этапа замеряется отдельно:
+ * load - чтение EXCEL и "нормализация" данных (MappingMeta без проверки данных), кэш не используется;
+ * validate - проверка данных всех целевых таблиц (MappingMeta.validate);
+ * context - подготовка данных для шаблонов (MartMapping) всех таблиц;
+ * render - формирование содержимого файлов по шаблонам (в память);
+ * export - запись сформированных файлов на диск;
+ * generate - полный запуск mapping_generator (для сравнения с суммой этапов).
+
+Результат записывается в JSON-файл. Если задан файл с "базовыми" замерами (--baseline), то медианы этапов
+сравниваются с ним, при замедлении больше порога (--threshold) код возврата 1.
+
+Пример:
+    python -m bench.run --tables 100 --attrs 40 --hubs 3 --save-baseline bench_baseline.json
+    python -m bench.run --tables 100 --attrs 40 --hubs 3 -o bench_result.json --baseline bench_baseline.json
+
+Базовые замеры зависят от компьютера, поэтому не хранятся в репозитории: сохраните их до изменений (--save-baseline)
+и сравнивайте с ними после изменений (--baseline).
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import jinja2
+import pandas as pd
+import yaml
+
+from bench.workbook import make_workbook
+from core.config import Config
+from core.exporters import MartPackExporter
+from core.map_gen import mapping_generator
+from core.mapping import MappingMeta, MartMapping, StreamData
+from core.output import MemorySink, OutputSink
+
+# Корневой каталог программы
+ROOT_PATH: Path = Path(__file__).parents[1]
+
+# Этапы в порядке выполнения
+STAGES: list[str] = ['load', 'validate', 'context', 'render', 'export', 'generate']
+
+
+def load_config(config_name: str, templates: str, work_path: str):
+    """
+    Загрузка файла конфигурации. Каталог шаблонов задается отдельно, кэш не используется,
+    журнал записывается во временный каталог
+    """
+    with open(config_name, 'r', encoding='utf-8') as f:
+        config: dict = yaml.safe_load(f)
+
+    config['templates'] = templates
+    config['cache_path'] = ''
+    config['incremental'] = False
+    config['shared_hubs'] = False
+    config['workers'] = 1
+    config['out_format'] = 'dir'
+    config['log_file'] = os.path.join(work_path, 'bench.log')
+
+    bench_config_name: str = os.path.join(work_path, 'generator.yaml')
+    with open(bench_config_name, 'w', encoding='utf-8') as f:
+        yaml.safe_dump(config, f, allow_unicode=True)
+
+    Config.load_config(bench_config_name)
+
+
+def get_mart_mappings(mapping_meta: MappingMeta, load_mode: str) -> list[MartMapping]:
+    """
+    Подготовка данных для шаблонов всех целевых таблиц (как в map_gen._generate_table)
+    """
+    mart_mappings: list[MartMapping] = list()
+    for tgt_table in mapping_meta.get_tgt_tables_list():
+        stream_data = StreamData(df=mapping_meta.get_list_by_table(tgt_table), tgt_table=tgt_table)
+        mart_mappings.append(MartMapping(
+            mart_name=tgt_table,
+            mart_mapping=mapping_meta.get_mapping_by_table(tgt_table),
+            src_cd=mapping_meta.get_src_cd_by_table(tgt_table),
+            data_capture_mode=load_mode,
+            source_system=stream_data.source_name.upper(),
+            work_flow_name=stream_data.flow_name.removeprefix('wf_'),
+            source_system_schema=stream_data.src_table.split('.')[0],
+            issues=mapping_meta.get_issues_by_table(tgt_table),
+            hub_short_names=mapping_meta.hub_short_names
+        ))
+    return mart_mappings
+
+
+def run_once(file_name: str, work_path: str, run_index: int) -> tuple[dict[str, float], dict]:
+    """
+    Один прогон всех этапов
+
+    Returns: (время этапов в секундах, размер результата)
+    """
+    load_mode: str = 'increment'
+    author: str = 'bench'
+    timings: dict[str, float] = dict()
+
+    with open(file_name, 'rb') as f:
+        byte_data: bytes = f.read()
+
+    start = time.perf_counter()
+    mapping_meta = MappingMeta(io.BytesIO(byte_data), use_cache=False, validate=False)
+    timings['load'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    mapping_meta.validate()
+    timings['validate'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    mart_mappings: list[MartMapping] = get_mart_mappings(mapping_meta, load_mode)
+    timings['context'] = time.perf_counter() - start
+
+    sink = MemorySink()
+    start = time.perf_counter()
+    for exp_obj in mart_mappings:
+        MartPackExporter(exp_obj=exp_obj, path=exp_obj.mart_name, env=Config.env, author=author, sink=sink).load()
+    timings['render'] = time.perf_counter() - start
+
+    out_sink = OutputSink(os.path.join(work_path, f'export_{run_index}'))
+    start = time.perf_counter()
+    for rel_name, output in sink.files.items():
+        out_sink.write_text(os.path.join(out_sink.root, rel_name), output)
+    timings['export'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    mapping_generator(file_path=file_name, out_path=os.path.join(work_path, f'generate_{run_index}'),
+                      load_mode=load_mode, env=Config.env, author=author, workers=1)
+    timings['generate'] = time.perf_counter() - start
+
+    size: dict = {'files': len(sink.files), 'bytes': sum(len(output.encode('utf-8'))
+                                                        for output in sink.files.values())}
+    return timings, size
+
+
+def compare(result: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    Сравнение медиан этапов с "базовыми" замерами
+
+    Returns: Список этапов, время которых увеличилось больше, чем на threshold
+    """
+    regressions: list[str] = list()
+
+    if result['params'] != baseline.get('params'):
+        print(f"Внимание: параметры замера {result['params']} отличаются от базовых {baseline.get('params')}")
+
+    print(f"{'этап':<12} {'база, с':>10} {'сейчас, с':>10} {'изменение':>10}")
+    for stage in result['stages']:
+        base_stage: dict | None = baseline.get('stages', dict()).get(stage)
+        if not base_stage:
+            continue
+        base: float = base_stage['median']
+        current: float = result['stages'][stage]['median']
+        ratio: float = current / base - 1 if base else 0.0
+        mark: str = ''
+        if ratio > threshold:
+            regressions.append(stage)
+            mark = ' !!!'
+        print(f"{stage:<12} {base:>10.4f} {current:>10.4f} {ratio:>+10.1%}{mark}")
+
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="bench.run", description="Замеры производительности генератора")
+    parser.add_argument("-c", "--config", type=str, default=str(ROOT_PATH / 'generator.yaml'),
+                        help="Файл конфигурации")
+    parser.add_argument("-t", "--templates", type=str, default=str(ROOT_PATH / 'templates.ods'),
+                        help="Каталог шаблонов")
+    parser.add_argument("--tables", type=int, default=50, help="Количество целевых таблиц")
+    parser.add_argument("--attrs", type=int, default=30, help="Количество атрибутов в таблице")
+    parser.add_argument("--hubs", type=int, default=2, help="Количество хабов в таблице")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="Количество прогонов")
+    parser.add_argument("-o", "--out", type=str, default='bench_result.json', help="JSON-файл результата")
+    parser.add_argument("--baseline", type=str, help="JSON-файл базовых замеров для сравнения")
+    parser.add_argument("--save-baseline", type=str, help="Сохранить результат как базовые замеры")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Допустимое замедление этапа относительно базовых замеров (0.2 - 20%%)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='ceh-rdv-bench-') as work_path:
+        load_config(os.path.abspath(args.config), os.path.abspath(args.templates), work_path)
+        logging.basicConfig(level=logging.INFO, filename=Config.log_file, filemode="w",
+                            format="%(asctime)s %(levelname)s %(message)s", encoding='utf-8')
+
+        file_name: str = os.path.join(work_path, 'bench_mapping.xlsx')
+        make_workbook(file_name, tables=args.tables, attrs=args.attrs, hubs=args.hubs)
+
+        runs: list[dict[str, float]] = list()
+        size: dict = dict()
+        for run_index in range(args.repeat):
+            timings, size = run_once(file_name, work_path, run_index)
+            runs.append(timings)
+            print(f"прогон {run_index + 1}: " + ", ".join(f"{stage}={timings[stage]:.4f}" for stage in STAGES))
+
+    result: dict = {
+        'params': {'tables': args.tables, 'attrs': args.attrs, 'hubs': args.hubs},
+        'repeat': args.repeat,
+        'environment': {'python': platform.python_version(), 'platform': platform.platform(),
+                        'pandas': pd.__version__, 'jinja2': jinja2.__version__},
+        'output': size,
+        'stages': {stage: {'min': min(run[stage] for run in runs),
+                           'median': statistics.median(run[stage] for run in runs),
+                           'runs': [run[stage] for run in runs]}
+                   for stage in STAGES}
+    }
+
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"Результат: {os.path.abspath(args.out)}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"Базовые замеры: {os.path.abspath(args.save_baseline)}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline: dict = json.load(f)
+        regressions: list[str] = compare(result, baseline, args.threshold)
+        if regressions:
+            print(f"Замедление этапов: {', '.join(regressions)}")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
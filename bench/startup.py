@@ -0,0 +1,141 @@
+"""
+Замеры времени запуска программы (до появления диалога / начала формирования).
+
+Каждый замер выполняется в отдельном процессе Python, чтобы модули не были загружены заранее:
+ * import_cli - загрузка модулей, которые импортирует main.py (сам main.py не импортируется как модуль);
+ * import_ui - загрузка модулей диалога (core.ui);
+ * load_config - чтение файла конфигурации и подготовка шаблонов (Config.load_config);
+ * process - полное время процесса: запуск интерпретатора, загрузка модулей диалога, чтение конфигурации.
+
+Дополнительно проверяется, что "тяжелые" модули (HEAVY_MODULES) не загружаются при запуске,
+если модуль загружен - код возврата 1.
+Сравнение с "базовыми" замерами аналогично bench.run (--baseline, --save-baseline, --threshold).
+
+Пример:
+    python -m bench.startup --save-baseline startup_baseline.json
+    python -m bench.startup -o startup_result.json --baseline startup_baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import yaml
+
+from bench.run import ROOT_PATH, compare
+
+# Этапы в порядке выполнения
+STAGES: list[str] = ['import_cli', 'import_ui', 'load_config', 'process']
+
+# Модули, которые загружаются только при формировании файлов потоков
+HEAVY_MODULES: list[str] = ['pandas', 'numpy', 'openpyxl', 'odf', 'core.map_gen', 'core.mapping']
+
+# Программа замера, выполняется в отдельном процессе. Результат - JSON в stdout
+PROBE: str = '''
+import json, sys, time
+start = time.perf_counter()
+import core.config, core.output
+import_cli = time.perf_counter() - start
+start = time.perf_counter()
+import core.ui
+import_ui = time.perf_counter() - start
+start = time.perf_counter()
+core.config.Config.load_config(sys.argv[1])
+load_config = time.perf_counter() - start
+print(json.dumps({'timings': {'import_cli': import_cli, 'import_ui': import_ui, 'load_config': load_config},
+                  'modules': sorted(name for name in json.loads(sys.argv[2]) if name in sys.modules)}))
+'''
+
+
+def run_once(config_name: str) -> tuple[dict[str, float], list[str]]:
+    """
+    Один замер в отдельном процессе
+
+    Returns: (время этапов в секундах, загруженные "тяжелые" модули)
+    """
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, '-c', PROBE, config_name, json.dumps(HEAVY_MODULES)],
+                          cwd=ROOT_PATH, capture_output=True, text=True, encoding='utf-8', check=True)
+    process: float = time.perf_counter() - start
+
+    probe: dict = json.loads(proc.stdout.splitlines()[-1])
+    timings: dict[str, float] = probe['timings']
+    timings['process'] = process
+    return timings, probe['modules']
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="bench.startup", description="Замеры времени запуска программы")
+    parser.add_argument("-c", "--config", type=str, default=str(ROOT_PATH / 'generator.yaml'),
+                        help="Файл конфигурации")
+    parser.add_argument("-t", "--templates", type=str, default=str(ROOT_PATH / 'templates.ods'),
+                        help="Каталог шаблонов")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="Количество прогонов")
+    parser.add_argument("-o", "--out", type=str, default='startup_result.json', help="JSON-файл результата")
+    parser.add_argument("--baseline", type=str, help="JSON-файл базовых замеров для сравнения")
+    parser.add_argument("--save-baseline", type=str, help="Сохранить результат как базовые замеры")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Допустимое замедление этапа относительно базовых замеров (0.2 - 20%%)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='ceh-rdv-startup-') as work_path:
+        # Каталог шаблонов задается отдельно, журнал записывается во временный каталог
+        with open(args.config, 'r', encoding='utf-8') as f:
+            config: dict = yaml.safe_load(f)
+        config['templates'] = os.path.abspath(args.templates)
+        config['log_file'] = os.path.join(work_path, 'startup.log')
+        config_name: str = os.path.join(work_path, 'generator.yaml')
+        with open(config_name, 'w', encoding='utf-8') as f:
+            yaml.safe_dump(config, f, allow_unicode=True)
+
+        runs: list[dict[str, float]] = list()
+        modules: set[str] = set()
+        for run_index in range(args.repeat):
+            timings, loaded = run_once(config_name)
+            runs.append(timings)
+            modules.update(loaded)
+            print(f"прогон {run_index + 1}: " + ", ".join(f"{stage}={timings[stage]:.4f}" for stage in STAGES))
+
+    result: dict = {
+        'params': {'config': os.path.basename(args.config)},
+        'repeat': args.repeat,
+        'environment': {'python': platform.python_version(), 'platform': platform.platform()},
+        'heavy_modules': sorted(modules),
+        'stages': {stage: {'min': min(run[stage] for run in runs),
+                           'median': statistics.median(run[stage] for run in runs),
+                           'runs': [run[stage] for run in runs]}
+                   for stage in STAGES}
+    }
+
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"Результат: {os.path.abspath(args.out)}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"Базовые замеры: {os.path.abspath(args.save_baseline)}")
+
+    code: int = 0
+    if modules:
+        print(f"При запуске загружены модули: {', '.join(sorted(modules))}")
+        code = 1
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline: dict = json.load(f)
+        regressions: list[str] = compare(result, baseline, args.threshold)
+        if regressions:
+            print(f"Замедление этапов: {', '.join(regressions)}")
+            code = 1
+
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""
+Генератор синтетических (но корректных) EXCEL-файлов маппинга для замеров производительности.
+
+Размер задается количеством целевых таблиц, атрибутов и хабов в каждой таблице.
+Хабы общие: таблицы ссылаются на одни и те же хаб-таблицы hub_0 ... hub_<hubs-1>.
+
+Пример:
+    python -m bench.workbook bench_mapping.xlsx --tables 100 --attrs 40 --hubs 3
+"""
+import argparse
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+
+# Колонки листов (см. excel_data_definition в generator.yaml)
+DETAILS_COLUMNS: list[str] = ['Algorithm_UID', 'SubAlgorithm_UID', 'Src_table', 'Src_attr', 'Src_attr_datatype',
+                              'Src_PK', 'Expression', 'Comment', 'Tgt_table', 'Tgt_PK', 'Tgt_attribute',
+                              'Tgt_attr_datatype', 'Tgt_attr_mandatory', 'Attr:Conversion_type', 'Attr:BK_Schema',
+                              'Attr:BK_Object', 'Attr:nulldefault']
+LIST_COLUMNS: list[str] = ['algorithm_uid', 'subalgorithm_uid', 'flow_name', 'tgt_table', 'target_rdv_object_type',
+                           'src_table', 'source_name', 'scd_type', 'algo_name', 'data_filtering',
+                           'distribution_field', 'comment']
+
+# Типы данных атрибутов: (тип в источнике, тип в целевой таблице)
+ATTR_TYPES: list[tuple[str, str]] = [('string', 'text'), ('bigint', 'bigint'), ('decimal', 'decimal'),
+                                     ('timestamp', 'timestamp')]
+
+# Технические поля источника
+SRC_TECH_FIELDS: list[tuple[str, str]] = [('changeid', 'string'), ('changetimestamp', 'string'),
+                                          ('changetype', 'string'), ('hdp_processed_dttm', 'timestamp')]
+
+# Технические поля целевой таблицы
+TGT_TECH_FIELDS: list[tuple[str, str, str]] = [('effective_dttm', 'timestamp', 'not null'),
+                                               ('hash_diff', 'char(32)', 'null'),
+                                               ('version_id', 'bigint', 'not null'),
+                                               ('deleted_flg', 'boolean', 'not null'),
+                                               ('valid_flg', 'boolean', 'not null'),
+                                               ('invalid_id', 'bigint', 'not null')]
+
+
+def get_details_rows(tbl_index: int, attrs: int, hubs: int) -> list[dict]:
+    """
+    Возвращает строки листа 'Детали загрузок Src-RDV' для одной целевой таблицы
+    """
+    tgt_table: str = f'rdv.bench_tbl_{tbl_index}'
+    src_table: str = f'ods.bench_src_{tbl_index}'
+    rows: list[dict] = list()
+
+    def add_row(**values):
+        row: dict = {'Algorithm_UID': f'BENCH{tbl_index:05d}', 'SubAlgorithm_UID': '1', 'Tgt_table': tgt_table}
+        if values.get('Src_attr'):
+            row['Src_table'] = src_table
+        row.update(values)
+        rows.append(row)
+
+    add_row(Src_attr='ID', Src_attr_datatype='string', Tgt_attribute='id', Tgt_attr_datatype='text',
+            Tgt_attr_mandatory='not null', Tgt_PK='pk', Comment='Идентификатор')
+
+    for attr_index in range(attrs):
+        src_type, tgt_type = ATTR_TYPES[attr_index % len(ATTR_TYPES)]
+        add_row(Src_attr=f' Attr_{attr_index} ', Src_attr_datatype=src_type.upper(),
+                Tgt_attribute=f'attr_{attr_index}', Tgt_attr_datatype=tgt_type, Tgt_attr_mandatory='null',
+                Comment=f'Атрибут {attr_index}')
+
+    for hub_index in range(hubs):
+        add_row(Src_attr=f'hub_{hub_index}_id', Src_attr_datatype='string', Tgt_attribute=f'hub_{hub_index}_rk',
+                Tgt_attr_datatype='bigint', Tgt_attr_mandatory='not null', Tgt_PK='bk',
+                **{'Attr:Conversion_type': 'hub', 'Attr:BK_Schema': f'bench_bk_{hub_index}',
+                   'Attr:BK_Object': f'rdv.hub_{hub_index}', 'Attr:nulldefault': '-1'})
+
+    for src_attr, src_type in SRC_TECH_FIELDS:
+        add_row(Src_attr=src_attr, Src_attr_datatype=src_type)
+
+    add_row(Tgt_attribute='src_cd', Tgt_attr_datatype='text', Tgt_attr_mandatory='not null', Expression="='BENCH'")
+
+    for tgt_attr, tgt_type, mandatory in TGT_TECH_FIELDS:
+        add_row(Tgt_attribute=tgt_attr, Tgt_attr_datatype=tgt_type, Tgt_attr_mandatory=mandatory)
+
+    return rows
+
+
+def get_list_row(tbl_index: int) -> dict:
+    """
+    Возвращает строку листа 'Перечень загрузок Src-RDV' для одной целевой таблицы
+    """
+    return {'algorithm_uid': f'BENCH{tbl_index:05d}', 'subalgorithm_uid': '1', 'flow_name': f'wf_bench_{tbl_index}',
+            'tgt_table': f'rdv.bench_tbl_{tbl_index}', 'target_rdv_object_type': 'MART',
+            'src_table': f'ods.bench_src_{tbl_index}', 'source_name': 'BENCH', 'scd_type': 'scd1',
+            'algo_name': f'Загрузка bench_tbl_{tbl_index}'}
+
+
+def make_workbook(file_name: str, tables: int, attrs: int, hubs: int):
+    """
+    Формирует EXCEL-файл маппинга
+
+    Args:
+        file_name: Имя файла
+        tables: Количество целевых таблиц
+        attrs: Количество атрибутов (кроме ключа, хабов и технических полей) в каждой таблице
+        hubs: Количество хабов в каждой таблице
+    """
+    wb = Workbook(write_only=True)
+
+    def add_sheet(title: str, columns: list[str], rows):
+        ws = wb.create_sheet(title)
+        # Первая строка листа - заголовок, названия колонок во второй строке
+        ws.append([title])
+        ws.append(columns)
+        for row in rows:
+            cells: list = list()
+            for column in columns:
+                cell = WriteOnlyCell(ws, value=row.get(column))
+                # Значения вида "=..." - текст, а не формула
+                if isinstance(cell.value, str):
+                    cell.data_type = 's'
+                cells.append(cell)
+            ws.append(cells)
+
+    add_sheet('Детали загрузок Src-RDV', DETAILS_COLUMNS,
+              (row for tbl_index in range(tables) for row in get_details_rows(tbl_index, attrs, hubs)))
+    add_sheet('Перечень загрузок Src-RDV', LIST_COLUMNS, (get_list_row(tbl_index) for tbl_index in range(tables)))
+    wb.save(file_name)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="bench.workbook", description="Синтетический EXCEL-файл маппинга")
+    parser.add_argument("file_name", type=str, help="Имя EXCEL-файла")
+    parser.add_argument("--tables", type=int, default=50, help="Количество целевых таблиц")
+    parser.add_argument("--attrs", type=int, default=30, help="Количество атрибутов в таблице")
+    parser.add_argument("--hubs", type=int, default=2, help="Количество хабов в таблице")
+    args = parser.parse_args()
+
+    make_workbook(args.file_name, tables=args.tables, attrs=args.attrs, hubs=args.hubs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+
+import pandas as pd
+
+from core.config import Config
+
+# Версия формата кэша. Увеличивать при изменении "нормализации" данных в MappingMeta
+CACHE_VERSION: int = 1
+
+# Количество файлов кэша по умолчанию (параметр cache_max_files)
+CACHE_MAX_FILES: int = 20
+
+
+def get_mapping_cache_key(file_data: bytes) -> str | None:
+    """
+    Формирует ключ кэша по содержимому EXCEL-файла и секции excel_data_definition файла конфигурации
+
+    Args:
+        file_data: Содержимое EXCEL-файла
+
+    Returns: Ключ кэша или None, если кэш отключен (не задан параметр cache_path)
+    """
+    if not Config.cache_path:
+        return None
+
+    key = hashlib.sha256()
+    key.update(file_data)
+    key.update(json.dumps(Config.excel_data_definition, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+    key.update(f'{CACHE_VERSION}:{pd.__version__}'.encode('utf-8'))
+    return key.hexdigest()
+
+
+def _get_cache_file(cache_key: str) -> str:
+    return os.path.join(Config.cache_path, f'{cache_key}.pkl')
+
+
+def load_mapping_cache(cache_key: str | None) -> tuple[pd.DataFrame, pd.DataFrame] | None:
+    """
+    Читает из кэша "нормализованные" данные листов EXCEL
+
+    Args:
+        cache_key: Ключ кэша (см. get_mapping_cache_key)
+
+    Returns: Данные листов 'Детали загрузок Src-RDV' и 'Перечень загрузок Src-RDV' или None, если данных в кэше нет
+    """
+    if not cache_key:
+        return None
+
+    file_name: str = _get_cache_file(cache_key)
+    if not os.path.isfile(file_name):
+        return None
+
+    try:
+        with open(file_name, 'rb') as f:
+            data: dict = pickle.load(f)
+        # Время изменения - время последнего использования (см. _prune_cache)
+        os.utime(file_name)
+        return data['mapping_df'], data['mapping_list']
+
+    except Exception:
+        # Испорченный кэш не является ошибкой - данные будут прочитаны из EXCEL
+        logging.warning(f'Ошибка чтения кэша "{file_name}"', exc_info=True)
+        return None
+
+
+def save_mapping_cache(cache_key: str | None, mapping_df: pd.DataFrame, mapping_list: pd.DataFrame) -> None:
+    """
+    Сохраняет в кэш "нормализованные" данные листов EXCEL
+
+    Args:
+        cache_key: Ключ кэша (см. get_mapping_cache_key)
+        mapping_df: Данные листа 'Детали загрузок Src-RDV'
+        mapping_list: Данные листа 'Перечень загрузок Src-RDV'
+
+    Returns: None
+    """
+    if not cache_key:
+        return
+
+    file_name: str = _get_cache_file(cache_key)
+    tmp_file_name: str = f'{file_name}.{os.getpid()}.tmp'
+    try:
+        os.makedirs(Config.cache_path, exist_ok=True)
+        with open(tmp_file_name, 'wb') as f:
+            pickle.dump({'mapping_df': mapping_df, 'mapping_list': mapping_list}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        # Файл кэша "появляется" только полностью записанным
+        os.replace(tmp_file_name, file_name)
+        _prune_cache()
+
+    except Exception:
+        logging.warning(f'Ошибка записи кэша "{file_name}"', exc_info=True)
+        if os.path.exists(tmp_file_name):
+            os.remove(tmp_file_name)
+
+
+def _prune_cache() -> None:
+    """
+    Удаляет файлы кэша, которые давно не использовались: остается cache_max_files последних файлов
+    (по времени последнего использования). Значение 0 - файлы не удаляются
+    """
+    max_files: int = Config.config.get('cache_max_files', CACHE_MAX_FILES)
+    if not max_files:
+        return
+
+    try:
+        cache_files: list[os.DirEntry] = [entry for entry in os.scandir(Config.cache_path)
+                                          if entry.is_file() and entry.name.endswith('.pkl')]
+        cache_files.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+        for entry in cache_files[max_files:]:
+            os.remove(entry.path)
+            logging.info(f'Удален файл кэша "{entry.path}"')
+
+    except OSError:
+        # Файл может быть удален другим процессом
+        logging.warning(f'Ошибка очистки кэша "{Config.cache_path}"', exc_info=True)
@@ -1,26 +1,45 @@
+import logging
+
 import yaml
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache, Template, TemplateError
 import os
 from pathlib import Path
 
+from core.tags import TagsRenderer
+
 
 class Config:
     # Declare the static variables
     config: any
     tags: any
     resource_tags: any
+    # Скомпилированные шаблоны секций tags/resource_tags
+    tags_renderer: TagsRenderer
+    resource_tags_renderer: TagsRenderer
     setting_up_field_lists: dict
     field_type_list: dict
     excel_data_definition: dict
     log_file: str
     env: any
+    # Скомпилированные шаблоны: имя шаблона - шаблон
+    templates: dict[str, Template]
     templates_path: str
+    # Файлы каталога шаблонов, пропущенные при компиляции (не в кодировке utf-8), см. log_skipped_templates
+    skipped_templates: list[str]
     excel_file: str
     config_file: str
+    cache_path: str
     is_warning: bool = False
 
+    # Атрибуты со скомпилированными шаблонами. Не передаются в другой процесс, а создаются в нем заново
+    _compiled = ('env', 'templates', 'tags_renderer', 'resource_tags_renderer')
+
     @staticmethod
-    def load_config(config_name: str):
+    def load_config(config_name: str, keep_log: bool = False):
+        """
+        Чтение файла конфигурации и компиляция шаблонов.
+        keep_log - повторное чтение при работающей программе (режим наблюдения): файл журнала не меняется
+        """
 
         if not os.path.exists(config_name):
             msg = f'Не найден файл конфигурации программы "{config_name}"'
@@ -47,7 +66,21 @@ class Config:
             print(msg)
             raise FileExistsError(msg)
 
-        Config.env = Environment(loader=FileSystemLoader(Config.templates_path))
+        # Каталог кэша данных EXCEL и скомпилированных шаблонов. Пустое значение - кэш не используется
+        cache_path: str = Config.config.get('cache_path', '') or ''
+        cache_path = cache_path.strip()
+        Config.cache_path = os.path.join(Path(__file__).parents[1], cache_path) if cache_path else ''
+
+        # Все шаблоны компилируются при запуске, ошибки в шаблонах выявляются до обработки EXCEL
+        try:
+            Config._init_templates()
+        except TemplateError as err:
+            msg = f'Ошибка в шаблоне "{getattr(err, "name", None) or ""}": {err}'
+            print(msg)
+            raise
+
+        if keep_log:
+            return
 
         # Файл журнала
         log_file: str = Config.config.get('log_file', 'generator.log')
@@ -59,3 +92,74 @@ class Config:
                 os.remove(Config.log_file)
             else:
                 raise FileExistsError(f'Объект "{Config.log_file}" не является файлом')
+
+    @staticmethod
+    def _init_templates():
+        """
+        Компиляция шаблонов файлов и шаблонов секций tags/resource_tags
+        """
+        Config.env = Config._create_env()
+        Config.tags_renderer = TagsRenderer(Config.tags)
+        Config.resource_tags_renderer = TagsRenderer(Config.resource_tags)
+
+    @staticmethod
+    def _create_env() -> Environment:
+        """
+        Создает окружение jinja2 и компилирует все шаблоны каталога templates_path (заполняет Config.templates).
+        Скомпилированные шаблоны хранятся в окружении, повторный get_template не обращается к диску.
+        Если задан cache_path, то байт-код шаблонов сохраняется на диске и используется при следующем запуске
+        """
+        bytecode_cache: FileSystemBytecodeCache | None = None
+        if Config.cache_path:
+            bytecode_cache_path: str = os.path.join(Config.cache_path, 'jinja')
+            os.makedirs(bytecode_cache_path, exist_ok=True)
+            bytecode_cache = FileSystemBytecodeCache(bytecode_cache_path)
+
+        env = Environment(loader=FileSystemLoader(Config.templates_path),
+                          bytecode_cache=bytecode_cache,
+                          auto_reload=False,
+                          cache_size=-1)
+
+        Config.templates = dict()
+        Config.skipped_templates = list()
+        for name in env.list_templates(filter_func=Config._is_template_name):
+            try:
+                Config.templates[name] = env.get_template(name)
+            except UnicodeDecodeError:
+                # Посторонний файл в каталоге шаблонов (например, Thumbs.db, .DS_Store) - не шаблон.
+                # Журнал при чтении конфигурации еще не настроен, файлы выводятся в журнал в log_skipped_templates
+                Config.skipped_templates.append(name)
+        return env
+
+    @staticmethod
+    def _is_template_name(name: str) -> bool:
+        """
+        Проверяет, что файл каталога шаблонов не находится в каталоге __pycache__
+        """
+        return '__pycache__' not in name.split('/')
+
+    @staticmethod
+    def log_skipped_templates():
+        """
+        Вывод в журнал файлов каталога шаблонов, пропущенных при компиляции.
+        Вызывается после настройки журнала (load_config выполняется до нее)
+        """
+        for name in Config.skipped_templates:
+            logging.warning(f'Файл "{name}" каталога шаблонов не в кодировке utf-8, файл пропущен')
+
+    @staticmethod
+    def get_state() -> dict:
+        """
+        Возвращает состояние Config для передачи в другой процесс (скомпилированные шаблоны не передаются)
+        """
+        return {name: getattr(Config, name) for name in Config.__annotations__
+                if name not in Config._compiled and hasattr(Config, name)}
+
+    @staticmethod
+    def set_state(state: dict):
+        """
+        Восстанавливает состояние Config, полученное из get_state, в другом процессе
+        """
+        for name, value in state.items():
+            setattr(Config, name, value)
+        Config._init_templates()
@@ -7,3 +7,14 @@ class IncorrectMappingException(Exception):
 
     def __str__(self) -> str:
         return self.message
+
+
+class GenerationCancelledException(Exception):
+    message: str = ''
+
+    def __init__(self, message="Формирование файлов описания потока прервано"):
+        self.message = message
+        super().__init__(self.message)
+
+    def __str__(self) -> str:
+        return self.message
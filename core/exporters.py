@@ -1,63 +1,33 @@
 import os
-import shutil
-from jinja2 import Environment, Template
+from jinja2 import Environment
 
 from .mapping import MartMapping
-from .context import SourceContext, TargetContext, MappingContext, UniContext
+from .context import SourceContext, TargetContext, MappingContext, UniContext, HubFieldContext
+from .hubs import HubRegistry
+from .output import OutputSink
 
-import yaml
 from core.config import Config as Conf
 
 
-def _get_tags_list(tags_tmpl, tags_val) -> list:
-    """
-    Args:
-        tags_tmpl: Шаблон для формирования результата
-        tags_val: Данные для формирования результата
-
-    Returns: Список строк для вставки в секцию tags
-    """
-
-    ret_tags: list
-
-    # Делаем шаблон из секции tags
-    tags_template = Template(str(tags_tmpl))
-    # Формируем исходные данные
-    tag_list = yaml.safe_load(tags_template.render(tags=tags_val))
-    # Формируем список строк
-    ret_tags = list()
-    for tag in tag_list:
-        if type(tag) is str:
-            ret_tags.append(f"\"{tag}\"")
-        elif type(tag) is dict:
-            key = list(tag.keys())[0]
-            val = list(tag.values())[0]
-            ret_tags.append(f"\"{key}:{val}\"")
-
-    return ret_tags
-
-
 class SourceObjectExporter:
     src_ctx: SourceContext
     uni_ctx: UniContext
     env: Environment
+    sink: OutputSink
 
     # Название шаблона
     template_name: str = 'db_table.yaml'        # Описание таблицы-источника
     template_uni_json: str = 'uni_res.json'     # Название шаблона ресурса UNI
 
-    def __init__(self, env, ctx, uni_ctx):
+    def __init__(self, env, ctx, uni_ctx, sink):
         self.env = env
         self.src_ctx = ctx
         self.uni_ctx = uni_ctx
+        self.sink = sink
 
     def export(self, path):
-        os.makedirs(path, exist_ok=True)
-        template = self.env.get_template(self.template_name)
-        output = template.render(ctx=self.src_ctx)
         file_name: str = os.path.join(path, self.src_ctx.name + '.yaml')
-        with open(file_name, "w", encoding="utf-8") as f:
-            f.write(output)
+        self.sink.write_template(file_name, self.env.get_template(self.template_name), ctx=self.src_ctx)
 
     def export_uni_resource(self, path):
         """
@@ -68,34 +38,31 @@ class SourceObjectExporter:
         Returns: None
         """
         file_path = os.path.join(path, self.uni_ctx.source, self.uni_ctx.schema)
-        os.makedirs(file_path, exist_ok=True)
-
-        template = self.env.get_template(self.template_uni_json)
-        output = template.render(ctx=self.uni_ctx)
 
         file_name = '.'.join([self.uni_ctx.source, self.uni_ctx.schema, self.uni_ctx.table_name, "json"])
         file_name = os.path.join(file_path, file_name)
-        with open(file_name, "w", encoding="utf-8") as f:
-            f.write(output)
+        self.sink.write_template(file_name, self.env.get_template(self.template_uni_json), ctx=self.uni_ctx)
 
 
 class TargetObjectExporter:
     tgt_ctx: TargetContext
     uni_ctx: UniContext
     env: Environment
+    sink: OutputSink
+
+    # Файлы хаб-таблиц. None - хабы формируются один раз за запуск (HubObjectExporter.load)
+    hub_exporter: 'HubObjectExporter | None'
 
     template_name_yaml: str = 'mart.yaml'               # Название шаблона описания март-таблицы
-    template_hub_yaml: str = 'hub.yaml'                 # Название шаблона описания хаб-таблицы
-    template_hub_create_sql: str = 'hub_create.sql'     # Название шаблона создания/заполнения хаб-таблицы
     template_name_sql: str = 'mart_ddl.sql'             # Название шаблона скрипта создания март-таблицы
     template_name_json: str = 'ceh_res.json'            # Название шаблона ресурса CEH
-    template_hub_json: str = 'ceh.hub_table.json '      # Название шаблона ресурса хаб-таблицы
-    template_bk_json: str = 'ceh_bk_schema.json'        # Название шаблона ресурса БК-схемы хаб-таблицы
 
-    def __init__(self, env, ctx, uni_ctx):
+    def __init__(self, env, ctx, uni_ctx, sink, shared_hubs=False):
         self.env = env
         self.tgt_ctx = ctx
         self.uni_ctx = uni_ctx
+        self.sink = sink
+        self.hub_exporter = None if shared_hubs else HubObjectExporter(env=env, sink=sink)
 
     def export_yaml(self, path):
         """
@@ -105,48 +72,30 @@ class TargetObjectExporter:
 
         Returns: None
         """
-        values: dict = {'src_cd': self.tgt_ctx.src_cd}
-
-        os.makedirs(path, exist_ok=True)
-
         # Файл описания март-таблицы
-        template = self.env.get_template(self.template_name_yaml)
-        output = template.render(ctx=self.tgt_ctx, uni_ctx=self.uni_ctx)
         file_name: str = os.path.join(path, self.tgt_ctx.name + '.yaml')
-        with open(file_name, "w", encoding="utf-8") as f:
-            f.write(output)
+        self.sink.write_template(file_name, self.env.get_template(self.template_name_yaml),
+                                 ctx=self.tgt_ctx, uni_ctx=self.uni_ctx)
 
         # Файлы описания хаб-таблиц
-        for hub in self.tgt_ctx.hub_ctx_list:
-            template = self.env.get_template(self.template_hub_yaml)
-            output = template.render(hub=hub, values=values)
-            file_name: str = os.path.join(path, f'{hub.hub_name_only}.yaml')
-            with open(file_name, "w", encoding="utf-8") as f:
-                f.write(output)
+        if self.hub_exporter:
+            for hub in self.tgt_ctx.hub_ctx_list:
+                self.hub_exporter.export_yaml(path, hub, self.tgt_ctx.src_cd)
 
     def export_hub_sql(self, path):
-        os.makedirs(path, exist_ok=True)
         # Файлы описания хаб-таблиц
-        for hub in self.tgt_ctx.hub_ctx_list:
-            # Создание/заполнение хаб-таблиц
-            template = self.env.get_template(self.template_hub_create_sql)
-            output = template.render(hub=hub)
-            file_name: str = os.path.join(path, f'{hub.hub_name_only}.sql')
-            with open(file_name, "w", encoding="utf-8") as f:
-                f.write(output)
+        if self.hub_exporter:
+            for hub in self.tgt_ctx.hub_ctx_list:
+                self.hub_exporter.export_sql(path, hub)
 
     def export_sql(self, path):
-        os.makedirs(path, exist_ok=True)
-
-        template = self.env.get_template(self.template_name_sql)
-        output = template.render(ctx=self.tgt_ctx)
         file_name: str = os.path.join(path, '01-' + self.tgt_ctx.name + '.sql')
-        with open(file_name, "w", encoding="utf-8") as f:
-            f.write(output)
+        self.sink.write_template(file_name, self.env.get_template(self.template_name_sql), ctx=self.tgt_ctx)
 
-        file_name: str = os.path.join(path, '02-gen_access_view.sql')
-        with open(file_name, "w", encoding="utf-8") as f:
-            f.write('-- Скрипт формирования акцессоров должен быть здесь!')
+        # Заглушка формируется вместе со скриптом создания таблицы
+        if self.sink.is_selected(self.template_name_sql):
+            file_name: str = os.path.join(path, '02-gen_access_view.sql')
+            self.sink.write_text(file_name, '-- Скрипт формирования акцессоров должен быть здесь!')
 
     def export_sql_view(self, path):
         """
@@ -156,51 +105,99 @@ class TargetObjectExporter:
 
         Returns: None
         """
-        os.makedirs(path, exist_ok=True)
-        template = self.env.get_template('f_gen_access_view.sql')
-        output = template.render(ctx=self.tgt_ctx)
         file_name: str = os.path.join(path, 'f_gen_access_view.sql')
-        with open(file_name, "w", encoding="utf-8") as f:
-            f.write(output)
+        self.sink.write_template(file_name, self.env.get_template('f_gen_access_view.sql'), ctx=self.tgt_ctx)
 
     def export_ceh_resource(self, path):
-        os.makedirs(path, exist_ok=True)
-
         # Данные для формирования секции "tags""
         tags_val = {}
-        tags: list = _get_tags_list(tags_tmpl=Conf.resource_tags, tags_val=tags_val)
+        tags: list = Conf.resource_tags_renderer.render(tags_val)
 
         actual_dttm: str = f"{self.tgt_ctx.src_cd}_actual_dttm".lower()
         # Словарь с доп. параметрами для шаблона
         values: dict = {"actual_dttm_name": actual_dttm}
 
         # Ресурс целевой mart - таблицы
-        template = self.env.get_template(self.template_name_json)
-        output = template.render(ctx=self.tgt_ctx, uni_ctx=self.uni_ctx, values=values, tags=tags)
         file_name: str = os.path.join(path, f'ceh.{self.tgt_ctx.schema}.{self.tgt_ctx.name}.json')
-        with open(file_name, "w", encoding="utf-8") as f:
-            f.write(output)
+        self.sink.write_template(file_name, self.env.get_template(self.template_name_json),
+                                 ctx=self.tgt_ctx, uni_ctx=self.uni_ctx, values=values, tags=tags)
+
+        if self.hub_exporter:
+            for hub in self.tgt_ctx.hub_ctx_list:
+                self.hub_exporter.export_hub_resource(path, hub, self.tgt_ctx.src_cd, tags)
+                self.hub_exporter.export_bk_resource(path, hub, tags)
+
+
+class HubObjectExporter:
+    """
+    Формирование файлов хаб-таблицы: для каждой целевой таблицы или один раз за запуск (общие хабы)
+    """
+    env: Environment
+    sink: OutputSink
+
+    template_hub_yaml: str = 'hub.yaml'                 # Название шаблона описания хаб-таблицы
+    template_hub_create_sql: str = 'hub_create.sql'     # Название шаблона создания/заполнения хаб-таблицы
+    template_hub_json: str = 'ceh.hub_table.json'       # Название шаблона ресурса хаб-таблицы
+    template_bk_json: str = 'ceh_bk_schema.json'        # Название шаблона ресурса БК-схемы хаб-таблицы
+
+    def __init__(self, env, sink):
+        self.env = env
+        self.sink = sink
+
+    def export_yaml(self, path, hub: HubFieldContext, src_cd: str):
+        values: dict = {'src_cd': src_cd}
+        file_name: str = os.path.join(path, f'{hub.hub_name_only}.yaml')
+        self.sink.write_template(file_name, self.env.get_template(self.template_hub_yaml), hub=hub, values=values)
+
+    def export_sql(self, path, hub: HubFieldContext):
+        # Создание/заполнение хаб-таблицы
+        file_name: str = os.path.join(path, f'{hub.hub_name_only}.sql')
+        self.sink.write_template(file_name, self.env.get_template(self.template_hub_create_sql), hub=hub)
+
+    def export_hub_resource(self, path, hub: HubFieldContext, src_cd: str, tags: list):
+        values: dict = {"actual_dttm_name": f"{src_cd}_actual_dttm".lower()}
+        file_name: str = os.path.join(path, f'ceh.{hub.hub_name}.json')
+        self.sink.write_template(file_name, self.env.get_template(self.template_hub_json),
+                                 hub=hub, values=values, tags=tags)
+
+    def export_bk_resource(self, path, hub: HubFieldContext, tags: list):
+        file_name: str = os.path.join(path, f'ceh.{hub.hub_name}.{hub.bk_schema_name}.json')
+        self.sink.write_template(file_name, self.env.get_template(self.template_bk_json), hub=hub, tags=tags)
+
+    def load(self, path, registry: HubRegistry):
+        """
+        Формирование файлов общих хабов запуска. Структура каталогов та же, что и у файлов потока
+
+        Args:
+            path: Каталог общих хабов
+            registry: Реестр хабов запуска
+        """
+        tags: list = Conf.resource_tags_renderer.render({})
+
+        for entry in registry.hubs.values():
+            # Описание хаб-таблицы
+            exp_path = os.path.join(path, "etl-scale", "general_ledger", "src_rdv", "schema", "ceh", "rdv")
+            self.export_yaml(exp_path, entry.hub, entry.src_cd)
+
+            # Скрипт создания/заполнения хаб-таблицы
+            exp_path = os.path.join(path, "src", "hub")
+            self.export_sql(exp_path, entry.hub)
 
-        for hub in self.tgt_ctx.hub_ctx_list:
             # Ресурс хаб-таблицы
-            template = self.env.get_template(self.template_hub_json)
-            output = template.render(hub=hub, values=values, tags=tags)
-            file_name: str = os.path.join(path, f'ceh.{hub.hub_name}.json')
-            with open(file_name, "w", encoding="utf-8") as f:
-                f.write(output)
+            exp_path = os.path.join(path, "etl-scale", "_resources", "ceh", "rdv")
+            self.export_hub_resource(exp_path, entry.hub, entry.src_cd, tags)
 
+        for entry in registry.bk_schemas.values():
             # Ресурс БК-схемы
-            template = self.env.get_template(self.template_bk_json)
-            output = template.render(hub=hub, tags=tags)
-            file_name: str = os.path.join(path, f'ceh.{hub.hub_name}.{hub.bk_schema_name}.json')
-            with open(file_name, "w", encoding="utf-8") as f:
-                f.write(output)
+            exp_path = os.path.join(path, "etl-scale", "_resources", "ceh", "rdv")
+            self.export_bk_resource(exp_path, entry.hub, tags)
 
 
 class MappingObjectExporter:
     map_ctx: MappingContext
     uni_ctx: UniContext
     env: Environment
+    sink: OutputSink
     wf_file: str
     cf_file: str
     author_name: str
@@ -209,8 +206,9 @@ class MappingObjectExporter:
     template_cf_name: str = 'cf.yaml'  # Название шаблона CF
     template_py_name: str = 'wf.py'    # Название PY файла рабочего потока
 
-    def __init__(self, env, ctx, author, uni_ctx, tags):
+    def __init__(self, env, ctx, author, uni_ctx, tags, sink):
         self.env = env
+        self.sink = sink
         self.map_ctx = ctx
         self.author_name = author
         self.wf_file = f"wf_{self.map_ctx.work_flow_name}"
@@ -218,9 +216,16 @@ class MappingObjectExporter:
         self.uni_ctx = uni_ctx
         self.tags = tags
 
-    def _get_filled_cf_mapping(self):
-        template = self.env.get_template(self.template_cf_name)
-        return template.render(
+    def export_wf(self, path):
+        file_name: str = os.path.join(path, self.wf_file + '.yaml')
+        self.sink.write_template(file_name, self.env.get_template(self.template_wf_name),
+                                 ctx=self.map_ctx, wf_file=self.wf_file, uni_ctx=self.uni_ctx, tags=self.tags)
+
+    def export_cf(self, path):
+        file_name: str = os.path.join(path, self.cf_file + '.yaml')
+        self.sink.write_template(
+            file_name,
+            self.env.get_template(self.template_cf_name),
             ctx=self.map_ctx,
             wf_file=self.wf_file,
             cf_file=self.cf_file,
@@ -229,43 +234,26 @@ class MappingObjectExporter:
             tags=self.tags
         )
 
-    def export_wf(self, path):
-        os.makedirs(path, exist_ok=True)
-
-        template = self.env.get_template(self.template_wf_name)
-        output = template.render(ctx=self.map_ctx, wf_file=self.wf_file, uni_ctx=self.uni_ctx, tags=self.tags)
-
-        file_name: str = os.path.join(path, self.wf_file + '.yaml')
-        with open(file_name, "w", encoding="utf-8") as f:
-            f.write(output)
-
-    def export_cf(self, path):
-        os.makedirs(path, exist_ok=True)
-
-        output = self._get_filled_cf_mapping()
-
-        file_name: str = os.path.join(path, self.cf_file + '.yaml')
-        with open(file_name, "w", encoding="utf-8") as f:
-            f.write(output)
-
     def export_py(self, path):
-        os.makedirs(path, exist_ok=True)
-
         file_name: str = os.path.join(path, self.wf_file + '.py')
-        shutil.copy(os.path.join(Conf.templates_path, 'wf.py'), file_name)
+        self.sink.copy_file(os.path.join(Conf.templates_path, self.template_py_name), file_name,
+                            template_name=self.template_py_name)
 
 
 class MartPackExporter:
     exp_obj: MartMapping
     path: str
+    sink: OutputSink
 
     _src_exporter: SourceObjectExporter
     _tgt_exporter: TargetObjectExporter
     _mapping_exporter: MappingObjectExporter
 
-    def __init__(self, exp_obj, path, env, author):
+    def __init__(self, exp_obj, path, env, author, sink=None, shared_hubs=False):
         self.exp_obj = exp_obj
         self.path = path
+        # Вывод файлов. Если не задан, то файлы выводятся в каталог path
+        self.sink = sink if sink is not None else OutputSink(path)
 
         # Данные для формирования секции "tags""
         tags_val = {'src_cd': self.exp_obj.mapping_ctx.src_cd, 'src_tbl': self.exp_obj.src_ctx.name,
@@ -274,12 +262,13 @@ class MartPackExporter:
                     'cf_flow': 'cf_' + self.exp_obj.mapping_ctx.work_flow_name,
                     'wf_flow': 'wf_' + self.exp_obj.mapping_ctx.work_flow_name, 'alg': self.exp_obj.mapping_ctx.algo}
 
-        self.tags: list = _get_tags_list(tags_tmpl=Conf.tags, tags_val=tags_val)
+        self.tags: list = Conf.tags_renderer.render(tags_val)
 
-        self._src_exporter = SourceObjectExporter(env, self.exp_obj.src_ctx, self.exp_obj.uni_ctx)
-        self._tgt_exporter = TargetObjectExporter(env=env, ctx=self.exp_obj.tgt_ctx, uni_ctx=self.exp_obj.uni_ctx)
+        self._src_exporter = SourceObjectExporter(env, self.exp_obj.src_ctx, self.exp_obj.uni_ctx, self.sink)
+        self._tgt_exporter = TargetObjectExporter(env=env, ctx=self.exp_obj.tgt_ctx, uni_ctx=self.exp_obj.uni_ctx,
+                                                  sink=self.sink, shared_hubs=shared_hubs)
         self._mapping_exporter = MappingObjectExporter(env=env, ctx=self.exp_obj.mapping_ctx, author=author,
-                                                       uni_ctx=self.exp_obj.uni_ctx, tags=self.tags)
+                                                       uni_ctx=self.exp_obj.uni_ctx, tags=self.tags, sink=self.sink)
 
     def load(self):
         """
@@ -288,41 +277,41 @@ class MartPackExporter:
 
         """
         # Описание таблицы - источника
-        exp_path = os.path.join(self.path, r"etl-scale\general_ledger\src_rdv\schema\db_tables")
+        exp_path = os.path.join(self.path, "etl-scale", "general_ledger", "src_rdv", "schema", "db_tables")
         self._src_exporter.export(exp_path)
 
         # Описание uni - ресурса таблицы источника
-        exp_path = os.path.join(self.path, r"etl-scale\_resources\uni")
+        exp_path = os.path.join(self.path, "etl-scale", "_resources", "uni")
         self._src_exporter.export_uni_resource(exp_path)
 
         # Описание целевой таблицы (mart)
-        exp_path = os.path.join(self.path, r"etl-scale\general_ledger\src_rdv\schema\ceh\rdv")
+        exp_path = os.path.join(self.path, "etl-scale", "general_ledger", "src_rdv", "schema", "ceh", "rdv")
         self._tgt_exporter.export_yaml(exp_path)
 
         # Скрипт создания целевой таблицы (mart)
-        exp_path = os.path.join(self.path, r"adgp\extensions\ripper\.data")
+        exp_path = os.path.join(self.path, "adgp", "extensions", "ripper", ".data")
         self._tgt_exporter.export_sql(exp_path)
 
         # Необязательные скрипты создания/заполнения hub - таблиц
-        exp_path = os.path.join(self.path, r"src\hub")
+        exp_path = os.path.join(self.path, "src", "hub")
         self._tgt_exporter.export_hub_sql(exp_path)
 
         # Скрипт для формирования view на целевую таблицу
-        exp_path = os.path.join(self.path, r"src")
+        exp_path = os.path.join(self.path, "src")
         self._tgt_exporter.export_sql_view(exp_path)
 
         # Описание ресурса целевой таблицы (mart)
-        exp_path = os.path.join(self.path, r"etl-scale\_resources\ceh\rdv")
+        exp_path = os.path.join(self.path, "etl-scale", "_resources", "ceh", "rdv")
         self._tgt_exporter.export_ceh_resource(exp_path)
 
         # Рабочий поток (wf_*.yaml)
-        exp_path = os.path.join(self.path, r"etl-scale\general_ledger\src_rdv\schema\work_flows")
+        exp_path = os.path.join(self.path, "etl-scale", "general_ledger", "src_rdv", "schema", "work_flows")
         self._mapping_exporter.export_wf(exp_path)
 
         # py - файл потока управления (cf_*.py)
-        exp_path = os.path.join(self.path, r"etl-scale\general_ledger\src_rdv\flow_dumps")
+        exp_path = os.path.join(self.path, "etl-scale", "general_ledger", "src_rdv", "flow_dumps")
         self._mapping_exporter.export_cf(exp_path)
 
         # py - файл рабочего потока (wf_*.py)
-        exp_path = os.path.join(self.path, r"etl-scale\general_ledger\src_rdv\dags")
+        exp_path = os.path.join(self.path, "etl-scale", "general_ledger", "src_rdv", "dags")
         self._mapping_exporter.export_py(exp_path)
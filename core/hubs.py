@@ -0,0 +1,66 @@
+import logging
+from dataclasses import dataclass, field
+
+from core.config import Config as Conf
+from core.context import HubFieldContext
+
+# Подкаталог каталога вывода для файлов общих хабов
+HUBS_PATH: str = '_hubs'
+
+
+@dataclass
+class HubEntry:
+    """
+    Ссылка целевой таблицы на хаб
+    """
+    # Описание хаба из данных целевой таблицы
+    hub: HubFieldContext
+    # Имя источника целевой таблицы (подставляется в описание BK-схемы)
+    src_cd: str
+    # Имя целевой таблицы
+    tgt_table: str
+
+
+@dataclass
+class HubRegistry:
+    """
+    Реестр хабов запуска. Хабы, на которые ссылаются несколько целевых таблиц, формируются один раз.
+    Ключ хаба - attr:bk_object, ключ BK-схемы - (attr:bk_object, attr:bk_schema).
+    Учитывается первое описание хаба/BK-схемы, отличающиеся описания из других таблиц выводятся в журнал
+    """
+    # Хабы: attr:bk_object - первая ссылка на хаб
+    hubs: dict[str, HubEntry] = field(default_factory=dict)
+    # BK-схемы: (attr:bk_object, attr:bk_schema) - первая ссылка на BK-схему
+    bk_schemas: dict[tuple[str, str], HubEntry] = field(default_factory=dict)
+
+    def add(self, entry: HubEntry):
+        """
+        Добавляет ссылку на хаб и проверяет, что она не противоречит ранее добавленным
+        """
+        hub: HubFieldContext = entry.hub
+
+        first: HubEntry | None = self.hubs.get(hub.hub_name)
+        if first is None:
+            self.hubs[hub.hub_name] = entry
+        else:
+            if (first.hub.name, first.hub.hub_field) != (hub.name, hub.hub_field):
+                self._warning(entry, first, f"поля хаба '{hub.name}', '{hub.hub_field}' отличаются от "
+                                            f"'{first.hub.name}', '{first.hub.hub_field}'")
+            if first.hub.bk_schema_name != hub.bk_schema_name:
+                self._warning(entry, first, f"BK-схема '{hub.bk_schema_name}' отличается от "
+                                            f"'{first.hub.bk_schema_name}'. "
+                                            f"Описание хаба формируется по BK-схеме '{first.hub.bk_schema_name}'")
+
+        key: tuple[str, str] = (hub.hub_name, hub.bk_schema_name)
+        first = self.bk_schemas.get(key)
+        if first is None:
+            self.bk_schemas[key] = entry
+        elif first.src_cd != entry.src_cd:
+            self._warning(entry, first, f"источник BK-схемы '{hub.bk_schema_name}' - '{entry.src_cd}' "
+                                        f"отличается от '{first.src_cd}'")
+
+    @staticmethod
+    def _warning(entry: HubEntry, first: HubEntry, msg: str):
+        logging.warning(f"Хаб '{entry.hub.hub_name}' целевой таблицы '{entry.tgt_table}': {msg} "
+                        f"(таблица '{first.tgt_table}')")
+        Conf.is_warning = True
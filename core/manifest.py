@@ -0,0 +1,205 @@
+import hashlib
+import json
+import logging
+import os
+
+import pandas as pd
+from jinja2 import TemplateSyntaxError, meta
+
+from core.config import Config
+from core.hubs import HubRegistry
+
+# Версия формата манифеста. При изменении все таблицы будут сформированы заново
+MANIFEST_VERSION: int = 2
+
+# Параметры файла конфигурации, которые влияют на содержимое файлов потока
+FINGERPRINT_CONFIG_KEYS: list[str] = ['tags', 'resource_tags', 'setting_up_field_lists', 'field_type_list',
+                                      'excel_data_definition', 'shared_hubs']
+
+
+def get_template_hashes() -> dict[str, str]:
+    """
+    Возвращает хеши шаблонов каталога Config.templates_path. Хеш шаблона учитывает содержимое шаблонов,
+    на которые он ссылается ({% include %}, {% extends %}, {% import %}), в том числе косвенно.
+    Если имя шаблона в ссылке вычисляется при формировании, то шаблон зависит от всех шаблонов каталога
+
+    Returns: Словарь "имя шаблона" - строка sha256
+    """
+    env = Config.env
+    sources: dict[str, bytes] = dict()
+    references: dict[str, set[str | None]] = dict()
+    # Шаблоны, скомпилированные при загрузке конфигурации (посторонние файлы каталога пропущены)
+    for name in Config.templates:
+        source: str = env.loader.get_source(env, name)[0]
+        sources[name] = source.encode('utf-8')
+        try:
+            references[name] = set(meta.find_referenced_templates(env.parse(source)))
+        except TemplateSyntaxError:
+            # Ошибка в шаблоне будет выдана при формировании файлов
+            references[name] = set()
+
+    for name, referenced in references.items():
+        if None in referenced:
+            references[name] = set(sources)
+
+    hashes: dict[str, str] = dict()
+    for name in sorted(sources):
+        dependencies: set[str] = set()
+        stack: list[str] = [name]
+        while stack:
+            for dependency in references.get(stack.pop(), set()):
+                if dependency not in dependencies:
+                    dependencies.add(dependency)
+                    stack.append(dependency)
+        dependencies.add(name)
+
+        template_hash = hashlib.sha256()
+        for dependency in sorted(dependencies):
+            template_hash.update(dependency.encode('utf-8'))
+            template_hash.update(hashlib.sha256(sources.get(dependency, b'')).digest())
+        hashes[name] = template_hash.hexdigest()
+
+    return hashes
+
+
+class RunManifest:
+    """
+    Манифест запуска - файл в каталоге out_path с "отпечатками" (fingerprint) целевых таблиц.
+    Для каждой таблицы сохраняются также сформированные файлы с именами шаблонов (artifacts)
+    и хеши этих шаблонов (templates, см. get_template_hashes).
+    Если "отпечаток" таблицы не изменился с прошлого запуска, то формируются только файлы, шаблоны которых
+    изменились. Если шаблоны не изменились, то файлы потока повторно не формируются.
+    """
+    file_name: str = 'generator_manifest.json'
+
+    path: str
+    base_fingerprint: str
+    # Хеши шаблонов запуска
+    templates: dict[str, str]
+    # Таблицы: имя таблицы - {fingerprint, artifacts: {путь файла - имя шаблона}, templates: {имя шаблона - хеш}}
+    tables: dict[str, dict]
+    _prev_tables: dict[str, dict]
+
+    def __init__(self, out_path: str, load_mode: str, author: str):
+        """
+        Args:
+            out_path: Каталог, в котором формируются подкаталоги потоков
+            load_mode: Режим загрузки
+            author: Автор потоков
+        """
+        self.path = os.path.join(out_path, self.file_name)
+        self.base_fingerprint = self._get_base_fingerprint(load_mode=load_mode, author=author)
+        self.templates = get_template_hashes()
+        self.tables = dict()
+        self._prev_tables = dict()
+
+        if not os.path.isfile(self.path):
+            return
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                manifest: dict = json.load(f)
+        except Exception:
+            logging.warning(f'Ошибка чтения манифеста "{self.path}". Все потоки будут сформированы заново',
+                            exc_info=True)
+            return
+
+        if manifest.get('version') == MANIFEST_VERSION:
+            self._prev_tables = manifest.get('tables', dict())
+            # Таблицы, которые не обрабатываются в этом запуске, остаются в манифесте
+            self.tables.update(self._prev_tables)
+
+    @staticmethod
+    def _get_base_fingerprint(load_mode: str, author: str) -> str:
+        """
+        "Отпечаток" данных, общих для всех таблиц: параметры запуска, настройки.
+        Шаблоны не входят в "отпечаток", их изменение проверяется по каждому файлу (get_changed_templates)
+        """
+        fingerprint = hashlib.sha256()
+        config: dict = {key: Config.config.get(key) for key in FINGERPRINT_CONFIG_KEYS}
+        fingerprint.update(json.dumps([MANIFEST_VERSION, load_mode, author, config],
+                                      sort_keys=True, ensure_ascii=False, default=str).encode('utf-8'))
+
+        return fingerprint.hexdigest()
+
+    def get_fingerprint(self, mapping: pd.DataFrame, stream_row: pd.DataFrame,
+                        hub_short_names: dict[str, str] | None = None) -> str:
+        """
+        Возвращает "отпечаток" целевой таблицы
+
+        Args:
+            mapping: Строки листа 'Детали загрузок Src-RDV' для таблицы
+            stream_row: Строка листа 'Перечень загрузок Src-RDV' для таблицы
+            hub_short_names: Короткие имена hub-таблиц таблицы (зависят от hub-таблиц других целевых таблиц)
+
+        Returns: Строка sha256
+        """
+        fingerprint = hashlib.sha256(self.base_fingerprint.encode('utf-8'))
+        fingerprint.update(mapping.to_csv(index=False).encode('utf-8'))
+        fingerprint.update(stream_row.to_csv(index=False).encode('utf-8'))
+        fingerprint.update(json.dumps(hub_short_names or dict(), sort_keys=True).encode('utf-8'))
+        return fingerprint.hexdigest()
+
+    def get_hubs_fingerprint(self, registry: HubRegistry) -> str:
+        """
+        Возвращает "отпечаток" общих хабов запуска (запись манифеста HUBS_PATH)
+
+        Args:
+            registry: Реестр хабов запуска
+
+        Returns: Строка sha256
+        """
+        fingerprint = hashlib.sha256(self.base_fingerprint.encode('utf-8'))
+        hubs: list = [(name, repr(entry.hub), entry.src_cd) for name, entry in sorted(registry.hubs.items())]
+        bk_schemas: list = [(list(key), repr(entry.hub), entry.src_cd)
+                            for key, entry in sorted(registry.bk_schemas.items())]
+        fingerprint.update(json.dumps([hubs, bk_schemas], ensure_ascii=False).encode('utf-8'))
+        return fingerprint.hexdigest()
+
+    def get_changed_templates(self, tgt_table: str, fingerprint: str, out_path_tbl: str) -> set[str] | None:
+        """
+        Проверяет, что таблица уже сформирована в прошлом запуске с тем же "отпечатком", и возвращает
+        шаблоны, которые изменились с прошлого запуска
+
+        Args:
+            tgt_table: Имя целевой таблицы (HUBS_PATH - общие хабы)
+            fingerprint: "Отпечаток" таблицы
+            out_path_tbl: Каталог файлов потока таблицы
+
+        Returns: None - все файлы потока нужно сформировать, пустое множество - файлы потока формировать не нужно,
+            иначе имена шаблонов, файлы которых нужно сформировать заново
+        """
+        entry: dict | None = self._prev_tables.get(tgt_table)
+        if not entry or entry.get('fingerprint') != fingerprint or not os.path.isdir(out_path_tbl):
+            return None
+
+        prev_templates: dict[str, str] = entry.get('templates', dict())
+        return {name for name in set(entry.get('artifacts', dict()).values())
+                if self.templates.get(name) != prev_templates.get(name)}
+
+    def get_entry(self, tgt_table: str, fingerprint: str, artifacts: dict[str, str]) -> dict:
+        """
+        Возвращает запись манифеста для таблицы
+
+        Args:
+            tgt_table: Имя целевой таблицы
+            fingerprint: "Отпечаток" таблицы
+            artifacts: Сформированные файлы: путь относительно out_path - имя шаблона
+
+        Returns: Запись манифеста. Если сформированы не все файлы (изменились только шаблоны),
+            то файлы прошлого запуска остаются в записи
+        """
+        entry: dict = self._prev_tables.get(tgt_table, dict())
+        if entry.get('fingerprint') == fingerprint:
+            artifacts = {**entry.get('artifacts', dict()), **artifacts}
+        return {'fingerprint': fingerprint, 'artifacts': artifacts,
+                'templates': {name: self.templates.get(name) for name in sorted(set(artifacts.values()))}}
+
+    def update(self, tgt_table: str, entry: dict):
+        self.tables[tgt_table] = entry
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({'version': MANIFEST_VERSION, 'tables': self.tables}, f, ensure_ascii=False, indent=2,
+                      sort_keys=True)
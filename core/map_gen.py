@@ -1,42 +1,374 @@
+import cProfile
+import glob
 import os
 import io
+import pstats
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing, contextmanager
+from typing import Iterator
 from jinja2 import Environment
 from pandas import DataFrame
 
 from core.exceptions import IncorrectMappingException
-from core.exporters import MartPackExporter
-from core.mapping import MappingMeta, MartMapping, StreamData
+from core.exporters import MartPackExporter, HubObjectExporter
+from core.hubs import HUBS_PATH, HubEntry, HubRegistry
+from core.manifest import RunManifest
+from core.metrics import run_metrics
+from core.output import OutputSink, MemorySink, create_sink
+from core.progress import RunProgress, TableResult
+from core.mapping import HubShortNames, MappingMeta, MartMapping, StreamData
 import logging
 from core.config import Config as Conf
 import re
 
 
-def mapping_generator(
-        file_path: str,
+def _generate_table(
+        tbl_index: int,
+        tgt_table: str,
+        mapping_meta: MappingMeta,
         out_path: str,
         load_mode: str,
         env: Environment,
-        author: str
-) -> None:
-    """Функция генератора маппинга, вызывает функционал по генерации
-       файлов
+        author: str,
+        wf_templates_list: list[str],
+        manifest: RunManifest | None,
+        sink: OutputSink,
+        hubs: list[HubEntry] | None = None
+) -> tuple[str, str | None]:
+    """Формирование файлов потока для одной целевой таблицы
 
     Args:
-        file_path (str): Полный путь к файлу маппинга РДВ
+        tbl_index (int): Порядковый номер таблицы
+        tgt_table (str): Имя целевой таблицы
+        mapping_meta (MappingMeta): Данные EXCEL
         out_path (str): Каталог, в котором будут сформированы подкаталоги с описанием потоков
         load_mode (str): Режим загрузки (increment, snapshot)
         env (Environment): Окружение шаблонов jinja2
         author (str): Наименование автора потоков для заполнения в шаблоне
+        wf_templates_list (list[str]): Список шаблонов имен потоков, которые будут обработаны
+        manifest (RunManifest | None): Манифест инкрементального формирования
+        sink (OutputSink): Вывод файлов
+        hubs (list[HubEntry] | None): Если задан, то файлы хабов не формируются, а ссылки на хабы добавляются в список
+            (хабы формируются один раз за запуск)
+
+    Returns: (состояние - см. TableResult.status, запись манифеста для таблицы - RunManifest.get_entry, или None)
+    """
+
+    if tbl_index > 0:
+        logging.info('')
+
+    logging.info('>>>>> Begin >>>>>')
+    logging.info(f"{tbl_index} {tgt_table}")
+
+    # Проверяем соответствие названия целевой таблицы шаблону
+    pattern: str = Conf.field_type_list.get('tgt_table_name_regexp',
+                                            r"^[a-z][a-z0-9_]*\.[a-z][a-z0-9_]*$")
+    if not re.match(pattern, tgt_table):
+        logging.error(f'Имя целевой таблицы "{tgt_table}" на листе "Перечень загрузок Src-RDV" '
+                      f'не соответствует шаблону "{pattern}"')
+        raise IncorrectMappingException("Имя целевой таблицы не определено")
+
+    # Данные "Перечень загрузок Src-RDV" листа для таблицы
+    stream_data: StreamData = StreamData(df=mapping_meta.get_list_by_table(tgt_table),
+                                         tgt_table=tgt_table)
+
+    # Проверяем таблицу-источник
+    src_table: str | None = stream_data.src_table
+    pattern: str = Conf.field_type_list.get('src_table_name_regexp',
+                                            r"^[a-zA-Z][a-zA-Z0-9_]*\.[a-zA-Z][a-zA-Z0-9_]*$")
+    if not re.match(pattern, src_table):
+        logging.error(f'Имя таблицы-источника "{src_table}" на листе "Перечень загрузок Src-RDV" '
+                      f'не соответствует шаблону "{pattern}"')
+        raise IncorrectMappingException("Имя таблицы-источника не определено")
+    logging.info(f'src_table = {src_table}')
+
+    # Данные для заданной целевой таблицы
+    mapping: DataFrame = mapping_meta.get_mapping_by_table(tgt_table)
+
+    # Возвращает наименование (логическое) "источника" для заданной целевой таблицы - поле src_sd
+    src_cd: str | None = mapping_meta.get_src_cd_by_table(tgt_table)
+    if not src_cd:
+        logging.error(f'Для целевой таблицы "{tgt_table}" неверно задано/не задано имя источника')
+        logging.error('Имя источника задается в колонке "Expression" для поля "src_cd"')
+        raise IncorrectMappingException("Имя источника не определено")
+    logging.info(f'src_cd = {src_cd}')
+
+    # Имя потока без wf_/cf_
+    flow_name: str | None = stream_data.flow_name
+
+    base_flow_name = flow_name.removeprefix('wf_')
+    if not base_flow_name:
+        logging.error(f'Для таблицы {tgt_table} неверно задано/не задано поле "Название потока"/Flow_name ')
+        raise IncorrectMappingException("Имя потока не определено")
+    logging.info(f'flow_name = {flow_name}')
+
+    # Фильтр по шаблону имени потока из файла конфигурации
+    if not [True for pattern in wf_templates_list if re.match(pattern, flow_name)]:
+        logging.info(f'Поток "{flow_name}" обрабатываться не будет, т.к. не соответствует ни одному из шаблонов '
+                     f'в файле конфигурации')
+        return 'skipped', None
+
+    # Имя источника - Source_name
+    source_name: str = stream_data.source_name.upper()
+    if not base_flow_name:
+        logging.error(f'Для таблицы {tgt_table} неверно задано/не задано поле "Источник данных'
+                      f' (транспорт)"/Source_name')
+        raise IncorrectMappingException("Поле 'Source_name' не определено")
+    logging.info(f'source_name = {source_name}')
+
+    # Алгоритм - Algorithm_UID
+    algorithm_uid: str = stream_data.algorithm_uid
+    if not algorithm_uid:
+        logging.error(f'Для таблицы {tgt_table} неверно задано/не задано поле "UID алгоритма"/"Algorithm_UID"')
+        raise IncorrectMappingException("Поле 'Algorithm_UID' не определено")
+    logging.info(f'algorithm_uid = {algorithm_uid}')
+
+    # Название схемы таблицы (берется из названия таблицы src_table)
+    source_system_schema: str | None = src_table.split('.')[0]
+    if not source_system_schema:
+        logging.error(f'На листе "Перечень загрузок Src-RDV" '
+                      f'неверно задано/не задано имя схемы источника в имени таблицы "{src_table}"')
+        raise IncorrectMappingException("Имя схемы источника не определено")
+
+    # Каталог для файлов
+    out_path_tbl = os.path.join(out_path, tgt_table)
+
+    fingerprint: str | None = None
+    # Шаблоны, файлы которых формируются. None - все файлы потока
+    render_templates: set[str] | None = None
+    if manifest:
+        fingerprint = manifest.get_fingerprint(mapping=mapping,
+                                               stream_row=mapping_meta.get_list_by_table(tgt_table),
+                                               hub_short_names=mapping_meta.get_hub_short_names_by_table(tgt_table))
+        render_templates = manifest.get_changed_templates(tgt_table=tgt_table, fingerprint=fingerprint,
+                                                          out_path_tbl=out_path_tbl)
+        if render_templates:
+            logging.info(f'Данные потока {base_flow_name} не изменились, формируются файлы шаблонов: '
+                         f'{", ".join(sorted(render_templates))}')
+
+    # Файлы потока формировать не нужно
+    is_unchanged: bool = render_templates is not None and not render_templates
+    if is_unchanged and hubs is None:
+        logging.info(f'Данные потока {base_flow_name} не изменились, файлы не формируются')
+        return 'unchanged', None
+
+    # Подготовка данных для файлов для одной таблицы
+    with run_metrics.table_phase('context'):
+        exp_obj = MartMapping(
+            mart_name=tgt_table,
+            mart_mapping=mapping,
+            src_cd=src_cd,
+            data_capture_mode=load_mode,
+            source_system=source_name,
+            work_flow_name=base_flow_name,
+            source_system_schema=source_system_schema,
+            issues=mapping_meta.get_issues_by_table(tgt_table),
+            hub_short_names=mapping_meta.hub_short_names
+        )
+
+    # Ссылки на общие хабы добавляются и для таблиц, файлы которых не формируются:
+    # общие хабы формируются по всем таблицам запуска
+    if hubs is not None:
+        hubs.extend(HubEntry(hub=hub, src_cd=src_cd, tgt_table=tgt_table) for hub in exp_obj.tgt_ctx.hub_ctx_list)
+
+    if is_unchanged:
+        logging.info(f'Данные потока {base_flow_name} не изменились, файлы не формируются')
+        return 'unchanged', None
+
+    logging.info(f'Каталог потока {base_flow_name}: {out_path_tbl}')
+
+    # Объект для формирования данных для вывода в файлы
+    mp_exporter = MartPackExporter(
+        exp_obj=exp_obj,
+        path=out_path_tbl,
+        env=env,
+        author=author,
+        sink=sink,
+        shared_hubs=hubs is not None)
+
+    # Вывод данных в файлы
+    sink.pop_artifacts()
+    sink.render_templates = render_templates
+    try:
+        with run_metrics.table_phase('export'):
+            mp_exporter.load()
+    finally:
+        sink.render_templates = None
+    logging.info(f'Файлы потока {base_flow_name} сформированы')
+
+    entry: dict | None = None
+    if manifest:
+        entry = manifest.get_entry(tgt_table=tgt_table, fingerprint=fingerprint, artifacts=sink.pop_artifacts())
+    # partial - сформированы только файлы измененных шаблонов
+    return 'done' if render_templates is None else 'partial', entry
+
+
+class _LogCollector(logging.Handler):
+    """
+    Накапливает записи журнала процесса-исполнителя.
+    Записи передаются в основной процесс и выводятся в журнал в порядке следования таблиц
+    """
+    records: list[logging.LogRecord]
+    # Признак предупреждения (Config.is_warning) за время сбора записей, см. _table_log
+    is_warning: bool
+
+    def __init__(self):
+        super().__init__()
+        self.records = list()
+        self.is_warning = False
+
+    def emit(self, record: logging.LogRecord):
+        # Запись должна "пережить" передачу в другой процесс
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        self.records.append(record)
+
+
+# Состояние процесса-исполнителя, заполняется в _init_worker
+_worker_state: dict = dict()
+
+
+def _init_worker(config_state: dict, mapping_metas: list[MappingMeta], params: dict):
+    """
+    Инициализация процесса-исполнителя: восстановление состояния Config, данных EXCEL, параметров запуска
+    """
+    Conf.set_state(config_state)
+
+    collector = _LogCollector()
+    root_logger = logging.getLogger()
+    for handler in list(root_logger.handlers):
+        root_logger.removeHandler(handler)
+    root_logger.addHandler(collector)
+    root_logger.setLevel(logging.INFO)
+
+    _worker_state.update(params)
+    _worker_state['mapping_metas'] = mapping_metas
+    _worker_state['collector'] = collector
+
+
+def _run_task(func, *args) -> tuple:
     """
+    Выполнение задачи в процессе-исполнителе
 
+    Returns: (результат func, признак предупреждения, исключение или None, записи журнала)
+    """
+    collector: _LogCollector = _worker_state['collector']
+    collector.records = list()
     Conf.is_warning = False
 
-    logging.info(f"file_path: {file_path}")
-    logging.info(f"out_path: {out_path}")
-    logging.info(f"load_mode: {load_mode}")
-    # logging.info(f"source_system: {source_system}")
-    logging.info(f"author: {author}")
+    result = None
+    error: Exception | None = None
+    try:
+        result = func(*args)
+    except Exception as err:
+        error = err
+
+    return result, Conf.is_warning, error, collector.records
+
+
+def _generate_table_task(meta_index: int, tbl_index: int,
+                         tgt_table: str) -> tuple[str, dict | None, tuple, list | None, dict, list[str]]:
+    """
+    Формирование файлов потока для одной целевой таблицы в процессе-исполнителе
+
+    Returns: (состояние таблицы, запись манифеста, результат вывода файлов - OutputSink.pop_output,
+              ссылки на общие хабы, замеры времени - RunMetrics.pop, выведенные файлы - OutputSink.pop_paths)
+    """
+    sink: OutputSink = _worker_state['sink']
+    hubs: list[HubEntry] | None = list() if _worker_state['shared_hubs'] else None
+    try:
+        with run_metrics.table(tgt_table):
+            status, entry = _generate_table(tbl_index=tbl_index,
+                                            tgt_table=tgt_table,
+                                            mapping_meta=_worker_state['mapping_metas'][meta_index],
+                                            out_path=_worker_state['out_path'],
+                                            load_mode=_worker_state['load_mode'],
+                                            env=Conf.env,
+                                            author=_worker_state['author'],
+                                            wf_templates_list=_worker_state['wf_templates_list'],
+                                            manifest=_worker_state['manifest'],
+                                            sink=sink,
+                                            hubs=hubs)
+    except Exception:
+        # Файлы таблицы с ошибкой не передаются в основной процесс и не попадают в результат следующей таблицы
+        sink.pop_output()
+        sink.pop_paths()
+        raise
+    return status, entry, sink.pop_output(), hubs, run_metrics.pop(), sink.pop_paths()
+
 
+def _get_result(future) -> tuple:
+    """
+    Ожидает результат задачи процесса-исполнителя. Записи журнала задачи выводятся в журнал,
+    признак предупреждения передается в Config
+
+    Returns: (результат задачи, исключение или None)
+    """
+    result, is_warning, error, records = future.result()
+    for record in records:
+        logging.getLogger(record.name).handle(record)
+
+    if is_warning:
+        Conf.is_warning = True
+
+    return result, error
+
+
+def _get_results(futures: list):
+    """
+    Возвращает результаты задач процессов-исполнителей в порядке следования задач.
+    Журнал выводится в том же порядке, что и при последовательном выполнении.
+    Ошибка первой "упавшей" задачи передается вызывающему
+    """
+    for future in futures:
+        result, error = _get_result(future)
+        if error is not None:
+            for waiting in futures:
+                waiting.cancel()
+            raise error
+
+        yield result
+
+
+@contextmanager
+def _table_log():
+    """
+    Сбор предупреждений и ошибок журнала и признака предупреждения (Config.is_warning) одной целевой таблицы.
+    Признак предупреждения запуска сохраняется
+    """
+    collector = _LogCollector()
+    collector.setLevel(logging.WARNING)
+    root_logger = logging.getLogger()
+    root_logger.addHandler(collector)
+
+    is_warning: bool = Conf.is_warning
+    Conf.is_warning = False
+    try:
+        yield collector
+    finally:
+        root_logger.removeHandler(collector)
+        collector.is_warning = Conf.is_warning
+        Conf.is_warning = is_warning or collector.is_warning
+
+
+def _get_workers(workers: int | None, tasks_count: int) -> int:
+    """
+    Количество процессов: None - значение параметра workers из файла конфигурации, 0 - по количеству процессоров
+    """
+    if workers is None:
+        workers = Conf.config.get('workers', 1)
+    if not workers:
+        workers = os.cpu_count() or 1
+    return min(workers, tasks_count)
+
+
+def _read_mapping_meta(file_path: str, use_cache: bool = True) -> MappingMeta:
+    """
+    Чтение данных из EXCEL-файла. use_cache=False - кэш данных EXCEL (cache_path) не используется
+    """
     logging.info(f'Чтение данных из файла "{file_path}"')
 
     # Чтение данных их EXCEL
@@ -50,116 +382,577 @@ def mapping_generator(
         raise IncorrectMappingException(msg)
 
     # Данные EXCEL
-    mapping_meta = MappingMeta(byte_data)
+    return MappingMeta(byte_data, use_cache=use_cache)
+
+
+@contextmanager
+def _measure_run(save_files: bool = True):
+    """
+    Замеры времени запуска (см. RunMetrics). Замеры выводятся в журнал и в JSON-файл <log_file>_metrics.json.
+    Если в файле конфигурации задан параметр profile, то запуск выполняется под cProfile,
+    статистика записывается в файл <log_file>.prof (процессы-исполнители не профилируются).
+    save_files=False - замеры и статистика выводятся только в журнал (формирование в память)
+    """
+    run_metrics.reset()
+    log_base: str = os.path.splitext(Conf.log_file)[0]
+
+    profiler: cProfile.Profile | None = None
+    if Conf.config.get('profile', False):
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    try:
+        with run_metrics.phase('total'):
+            yield
+    finally:
+        if profiler:
+            profiler.disable()
+            if save_files:
+                profile_file: str = log_base + '.prof'
+                profiler.dump_stats(profile_file)
+                logging.info(f'Статистика cProfile: {profile_file}')
+            stream = io.StringIO()
+            pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(20)
+            logging.info(stream.getvalue())
 
-    # Список целевых таблиц
-    map_objects: list[str] = mapping_meta.get_tgt_tables_list()
+        run_metrics.report()
+        if save_files:
+            metrics_file: str = log_base + '_metrics.json'
+            run_metrics.save(metrics_file)
+            logging.info(f'Замеры времени: {metrics_file}')
+
+
+def _generate_hubs(hubs_path: str, registry: HubRegistry, env: Environment, manifest: RunManifest | None,
+                   sink: OutputSink):
+    """
+    Формирование файлов общих хабов запуска. При инкрементальном формировании общие хабы записываются в манифест
+    как таблица HUBS_PATH: если хабы не изменились, то формируются только файлы измененных шаблонов
+    """
+    fingerprint: str | None = None
+    render_templates: set[str] | None = None
+    if manifest:
+        fingerprint = manifest.get_hubs_fingerprint(registry)
+        render_templates = manifest.get_changed_templates(tgt_table=HUBS_PATH, fingerprint=fingerprint,
+                                                          out_path_tbl=hubs_path)
+        if render_templates is not None and not render_templates:
+            logging.info('Общие хабы не изменились, файлы не формируются')
+            return
+        if render_templates:
+            logging.info(f'Общие хабы не изменились, формируются файлы шаблонов: '
+                         f'{", ".join(sorted(render_templates))}')
+
+    sink.pop_artifacts()
+    sink.render_templates = render_templates
+    try:
+        HubObjectExporter(env=env, sink=sink).load(hubs_path, registry)
+    finally:
+        sink.render_templates = None
+
+    if manifest:
+        manifest.update(tgt_table=HUBS_PATH,
+                        entry=manifest.get_entry(tgt_table=HUBS_PATH, fingerprint=fingerprint,
+                                                 artifacts=sink.pop_artifacts()))
+
+
+def _iter_tables(
+        mapping_metas: list[MappingMeta],
+        out_path: str,
+        load_mode: str,
+        env: Environment,
+        author: str,
+        workers: int | None,
+        out_format: str | None,
+        sink: OutputSink | None = None,
+        progress: RunProgress | None = None,
+        incremental: bool | None = None
+) -> Iterator[TableResult]:
+    """
+    Формирование файлов потоков для всех целевых таблиц из списка данных EXCEL, результат выдается по каждой таблице.
+    Если sink не задан, то он создается по формату вывода out_format.
+    incremental - инкрементальное формирование, None - значение параметра incremental из файла конфигурации.
+    Если задан progress, то в него передается ход запуска, запуск прерывается по запросу между таблицами.
+    Общие хабы и архив записываются после последней таблицы. Если перебор прекращен досрочно, то вывод прерывается
+    """
+
+    # Список целевых таблиц: (номер данных EXCEL, имя таблицы)
+    map_objects: list[tuple[int, str]] = [(meta_index, tgt_table)
+                                          for meta_index, mapping_meta in enumerate(mapping_metas)
+                                          for tgt_table in mapping_meta.get_tgt_tables_list()]
 
     # Список шаблонов имен потоков и/или имен потоков, которые будут обработаны
     wf_templates_list = Conf.config.get('wf_templates_list', list('.+'))
 
-    # Цикл по списку целевых таблиц
-    for tbl_index, tgt_table in enumerate(map_objects):
-        if tbl_index > 0:
-            logging.info('')
+    # Вывод файлов: в каталог (файлы, содержимое которых не изменилось, не перезаписываются) или в один архив.
+    # Файлы записываются потоками записи параллельно с формированием следующих файлов (write_threads)
+    if sink is None:
+        sink = create_sink(out_path, out_format or Conf.config.get('out_format', 'dir'),
+                           Conf.config.get('write_threads', 0))
 
-        logging.info('>>>>> Begin >>>>>')
-        logging.info(f"{tbl_index} {tgt_table}")
-
-        # Проверяем соответствие названия целевой таблицы шаблону
-        pattern: str = Conf.field_type_list.get('tgt_table_name_regexp',
-                                                r"^[a-z][a-z0-9_]*\.[a-z][a-z0-9_]*$")
-        if not re.match(pattern, tgt_table):
-            logging.error(f'Имя целевой таблицы "{tgt_table}" на листе "Перечень загрузок Src-RDV" '
-                          f'не соответствует шаблону "{pattern}"')
-            raise IncorrectMappingException("Имя целевой таблицы не определено")
-
-        # Данные "Перечень загрузок Src-RDV" листа для таблицы
-        stream_data: StreamData = StreamData(df=mapping_meta.mapping_list, tgt_table=tgt_table)
-
-        # Проверяем таблицу-источник
-        src_table: str | None = stream_data.src_table
-        pattern: str = Conf.field_type_list.get('src_table_name_regexp',
-                                                r"^[a-zA-Z][a-zA-Z0-9_]*\.[a-zA-Z][a-zA-Z0-9_]*$")
-        if not re.match(pattern, src_table):
-            logging.error(f'Имя таблицы-источника "{src_table}" на листе "Перечень загрузок Src-RDV" '
-                          f'не соответствует шаблону "{pattern}"')
-            raise IncorrectMappingException("Имя таблицы-источника не определено")
-        logging.info(f'src_table = {src_table}')
-
-        # Данные для заданной целевой таблицы
-        mapping: DataFrame = mapping_meta.get_mapping_by_table(tgt_table)
-
-        # Возвращает наименование (логическое) "источника" для заданной целевой таблицы - поле src_sd
-        src_cd: str | None = mapping_meta.get_src_cd_by_table(tgt_table)
-        if not src_cd:
-            logging.error(f'Для целевой таблицы "{tgt_table}" неверно задано/не задано имя источника')
-            logging.error('Имя источника задается в колонке "Expression" для поля "src_cd"')
-            raise IncorrectMappingException("Имя источника не определено")
-        logging.info(f'src_cd = {src_cd}')
-
-        # Имя потока без wf_/cf_
-        flow_name: str | None = stream_data.flow_name
-
-        base_flow_name = flow_name.removeprefix('wf_')
-        if not base_flow_name:
-            logging.error(f'Для таблицы {tgt_table} неверно задано/не задано поле "Название потока"/Flow_name ')
-            raise IncorrectMappingException("Имя потока не определено")
-        logging.info(f'flow_name = {flow_name}')
-
-        # Фильтр по шаблону имени потока из файла конфигурации
-        if not [True for pattern in wf_templates_list if re.match(pattern, flow_name)]:
-            logging.info(f'Поток "{flow_name}" обрабатываться не будет, т.к. не соответствует ни одному из шаблонов '
-                         f'в файле конфигурации')
-            continue
-
-        # Имя источника - Source_name
-        source_name: str = stream_data.source_name.upper()
-        if not base_flow_name:
-            logging.error(f'Для таблицы {tgt_table} неверно задано/не задано поле "Источник данных'
-                          f' (транспорт)"/Source_name')
-            raise IncorrectMappingException("Поле 'Source_name' не определено")
-        logging.info(f'source_name = {source_name}')
-
-        # Алгоритм - Algorithm_UID
-        algorithm_uid: str = stream_data.algorithm_uid
-        if not algorithm_uid:
-            logging.error(f'Для таблицы {tgt_table} неверно задано/не задано поле "UID алгоритма"/"Algorithm_UID"')
-            raise IncorrectMappingException("Поле 'Algorithm_UID' не определено")
-        logging.info(f'algorithm_uid = {algorithm_uid}')
-
-        # Название схемы таблицы (берется из названия таблицы src_table)
-        source_system_schema: str | None = src_table.split('.')[0]
-        if not source_system_schema:
-            logging.error(f'На листе "Перечень загрузок Src-RDV" '
-                          f'неверно задано/не задано имя схемы источника в имени таблицы "{src_table}"')
-            raise IncorrectMappingException("Имя схемы источника не определено")
-
-        # Подготовка данных для файлов для одной таблицы
-        exp_obj = MartMapping(
-            mart_name=tgt_table,
-            mart_mapping=mapping,
-            src_cd=src_cd,
-            data_capture_mode=load_mode,
-            source_system=source_name,
-            work_flow_name=base_flow_name,
-            source_system_schema=source_system_schema
-        )
+    # Инкрементальное формирование: таблицы, данные которых не изменились, повторно не формируются
+    manifest: RunManifest | None = None
+    if incremental is None:
+        incremental = Conf.config.get('incremental', False)
+    if incremental:
+        if sink.is_incremental:
+            manifest = RunManifest(out_path=out_path, load_mode=load_mode, author=author)
+        else:
+            # Архив (память) формируется заново, в нем должны быть файлы всех потоков
+            logging.info('Инкрементальное формирование при выводе в архив (память) не используется')
 
-        # Каталог для файлов
-        out_path_tbl = os.path.join(out_path, tgt_table)
-        logging.info(f'Каталог потока {base_flow_name}: {out_path_tbl}')
+    # Общие хабы: файлы хаба формируются один раз за запуск в подкаталоге HUBS_PATH
+    hub_registry: HubRegistry | None = None
+    if Conf.config.get('shared_hubs', False):
+        hub_registry = HubRegistry()
 
-        # Объект для формирования данных для вывода в файлы
-        mp_exporter = MartPackExporter(
-            exp_obj=exp_obj,
-            path=out_path_tbl,
-            env=env,
-            author=author)
+    try:
+        with run_metrics.phase('tables'):
+            yield from _iter_tables_to_sink(map_objects=map_objects, mapping_metas=mapping_metas,
+                                            out_path=out_path, load_mode=load_mode, env=env, author=author,
+                                            workers=workers, wf_templates_list=wf_templates_list,
+                                            manifest=manifest, sink=sink, hub_registry=hub_registry,
+                                            progress=progress)
+
+        if hub_registry:
+            hubs_path: str = os.path.join(out_path, HUBS_PATH)
+            logging.info('')
+            logging.info(f'Общие хабы: {len(hub_registry.hubs)}, BK-схемы: {len(hub_registry.bk_schemas)}, '
+                         f'каталог: {hubs_path}')
+            with run_metrics.phase('hubs'):
+                _generate_hubs(hubs_path=hubs_path, registry=hub_registry, env=env, manifest=manifest, sink=sink)
+    except BaseException:
+        sink.abort()
+        raise
 
-        # Вывод данных в файлы
-        mp_exporter.load()
-        logging.info(f'Файлы потока {base_flow_name} сформированы')
+    with run_metrics.phase('output'):
+        sink.close()
+
+    if manifest:
+        manifest.save()
 
     logging.info('')
-    
\ No newline at end of file
+    sink.report()
+
+
+def _generate_tables(
+        mapping_metas: list[MappingMeta],
+        out_path: str,
+        load_mode: str,
+        env: Environment,
+        author: str,
+        workers: int | None,
+        out_format: str | None,
+        sink: OutputSink | None = None,
+        progress: RunProgress | None = None
+) -> None:
+    """
+    Формирование файлов потоков для всех целевых таблиц из списка данных EXCEL (см. _iter_tables).
+    Ошибка в данных первой таблицы с ошибкой передается вызывающему, вывод прерывается
+    """
+    with closing(_iter_tables(mapping_metas=mapping_metas, out_path=out_path, load_mode=load_mode, env=env,
+                              author=author, workers=workers, out_format=out_format, sink=sink,
+                              progress=progress)) as results:
+        for result in results:
+            if result.error is not None:
+                raise result.error
+
+
+def _get_table_result(tbl_index: int, total: int, tgt_table: str, status: str, error: Exception | None,
+                      collector: _LogCollector, paths: list[str]) -> TableResult:
+    """
+    Результат формирования файлов потока целевой таблицы
+    """
+    return TableResult(tgt_table=tgt_table, index=tbl_index, total=total, status=status,
+                       is_warning=collector.is_warning,
+                       warnings=[record.getMessage() for record in collector.records],
+                       paths=paths, metrics=dict(run_metrics.tables.get(tgt_table, dict())), error=error)
+
+
+def _iter_tables_to_sink(
+        map_objects: list[tuple[int, str]],
+        mapping_metas: list[MappingMeta],
+        out_path: str,
+        load_mode: str,
+        env: Environment,
+        author: str,
+        workers: int | None,
+        wf_templates_list: list[str],
+        manifest: RunManifest | None,
+        sink: OutputSink,
+        hub_registry: HubRegistry | None,
+        progress: RunProgress | None
+) -> Iterator[TableResult]:
+    """
+    Цикл формирования файлов потоков (последовательно или пулом процессов).
+    Ошибка в данных EXCEL (IncorrectMappingException) целевой таблицы возвращается в результате таблицы,
+    прочие ошибки передаются вызывающему
+    """
+
+    # Количество процессов для формирования потоков
+    workers = _get_workers(workers, len(map_objects))
+    total: int = len(map_objects)
+
+    if progress:
+        progress.start_tables(total)
+
+    if workers <= 1:
+        # Цикл по списку целевых таблиц
+        for tbl_index, (meta_index, tgt_table) in enumerate(map_objects):
+            if progress:
+                progress.check()
+                progress.step(tgt_table)
+
+            status: str = 'error'
+            error: Exception | None = None
+            with _table_log() as collector:
+                try:
+                    hubs: list[HubEntry] | None = list() if hub_registry else None
+                    with run_metrics.table(tgt_table):
+                        status, entry = _generate_table(tbl_index=tbl_index,
+                                                        tgt_table=tgt_table,
+                                                        mapping_meta=mapping_metas[meta_index],
+                                                        out_path=out_path,
+                                                        load_mode=load_mode,
+                                                        env=env,
+                                                        author=author,
+                                                        wf_templates_list=wf_templates_list,
+                                                        manifest=manifest,
+                                                        sink=sink,
+                                                        hubs=hubs)
+                    if hub_registry:
+                        for hub_entry in hubs:
+                            hub_registry.add(hub_entry)
+                    if manifest and entry:
+                        manifest.update(tgt_table=tgt_table, entry=entry)
+                except IncorrectMappingException as err:
+                    error = err
+
+            if progress:
+                progress.table_done(tgt_table)
+            yield _get_table_result(tbl_index, total, tgt_table, status, error, collector, sink.pop_paths())
+
+    else:
+        logging.info(f'Количество процессов: {workers}')
+        params: dict = {'out_path': out_path, 'load_mode': load_mode, 'author': author,
+                        'wf_templates_list': wf_templates_list, 'manifest': manifest,
+                        'sink': sink.get_worker_sink(), 'shared_hubs': hub_registry is not None}
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(Conf.get_state(), mapping_metas, params)) as executor:
+            futures = [executor.submit(_run_task, _generate_table_task, meta_index, tbl_index, tgt_table)
+                       for tbl_index, (meta_index, tgt_table) in enumerate(map_objects)]
+
+            try:
+                for tbl_index, ((meta_index, tgt_table), future) in enumerate(zip(map_objects, futures)):
+                    if progress:
+                        progress.check()
+
+                    status: str = 'error'
+                    paths: list[str] = list()
+                    with _table_log() as collector:
+                        result, error = _get_result(future)
+                        if error is None:
+                            status, entry, output, hubs, metrics, paths = result
+                            sink.merge_output(output)
+                            run_metrics.merge(metrics)
+                            if hub_registry:
+                                for hub_entry in hubs:
+                                    hub_registry.add(hub_entry)
+                            if manifest and entry:
+                                manifest.update(tgt_table=tgt_table, entry=entry)
+                        elif not isinstance(error, IncorrectMappingException):
+                            raise error
+
+                    # Файлы таблицы выведены процессом-исполнителем
+                    sink.pop_paths()
+                    if progress:
+                        progress.table_done(tgt_table)
+                    yield _get_table_result(tbl_index, total, tgt_table, status, error, collector, paths)
+            finally:
+                # Ошибка, прерывание или досрочное завершение перебора:
+                # задачи, которые еще не начали выполняться, отменяются
+                for future in futures:
+                    future.cancel()
+
+
+def mapping_generator(
+        file_path: str,
+        out_path: str,
+        load_mode: str,
+        env: Environment,
+        author: str,
+        workers: int | None = None,
+        out_format: str | None = None,
+        progress: RunProgress | None = None
+) -> None:
+    """Функция генератора маппинга, вызывает функционал по генерации
+       файлов
+
+    Args:
+        file_path (str): Полный путь к файлу маппинга РДВ
+        out_path (str): Каталог, в котором будут сформированы подкаталоги с описанием потоков
+        load_mode (str): Режим загрузки (increment, snapshot)
+        env (Environment): Окружение шаблонов jinja2
+        author (str): Наименование автора потоков для заполнения в шаблоне
+        workers (int | None): Количество процессов для параллельного формирования потоков.
+            None - значение параметра workers из файла конфигурации, 0 - по количеству процессоров
+        out_format (str | None): Формат вывода: dir - каталог out_path, zip/tar/tar.gz - один архив out_path.<формат>.
+            None - значение параметра out_format из файла конфигурации
+        progress (RunProgress | None): Ход запуска (для отображения в диалоге) и прерывание между таблицами
+            (GenerationCancelledException)
+    """
+
+    Conf.is_warning = False
+
+    logging.info(f"file_path: {file_path}")
+    logging.info(f"out_path: {out_path}")
+    logging.info(f"load_mode: {load_mode}")
+    # logging.info(f"source_system: {source_system}")
+    logging.info(f"author: {author}")
+
+    with _measure_run():
+        if progress:
+            progress.step('Чтение данных EXCEL')
+        with run_metrics.phase('read'):
+            mapping_meta: MappingMeta = _read_mapping_meta(file_path)
+
+        _generate_tables(mapping_metas=[mapping_meta], out_path=out_path, load_mode=load_mode, env=env,
+                         author=author, workers=workers, out_format=out_format, progress=progress)
+
+
+def render_mapping(
+        file_data: str | bytes,
+        load_mode: str,
+        env: Environment,
+        author: str,
+        workers: int | None = None
+) -> dict[str, str]:
+    """Формирование файлов потоков в памяти, без записи на диск
+       (для встраивания генератора в другие программы и замеров производительности)
+
+    Args:
+        file_data (str | bytes): Полный путь к файлу маппинга РДВ или содержимое файла
+        load_mode (str): Режим загрузки (increment, snapshot)
+        env (Environment): Окружение шаблонов jinja2
+        author (str): Наименование автора потоков для заполнения в шаблоне
+        workers (int | None): Количество процессов для параллельного формирования потоков.
+            None - значение параметра workers из файла конфигурации, 0 - по количеству процессоров
+
+    Returns: Словарь: путь к файлу (относительно каталога вывода, с разделителем "/") - содержимое файла
+    """
+
+    Conf.is_warning = False
+
+    logging.info(f"load_mode: {load_mode}")
+    logging.info(f"author: {author}")
+
+    sink = MemorySink()
+    # Файлы не записываются: замеры времени выводятся только в журнал, кэш данных EXCEL не используется
+    with _measure_run(save_files=False):
+        with run_metrics.phase('read'):
+            if isinstance(file_data, str):
+                mapping_meta: MappingMeta = _read_mapping_meta(file_data, use_cache=False)
+            else:
+                mapping_meta: MappingMeta = MappingMeta(io.BytesIO(file_data), use_cache=False)
+
+        _generate_tables(mapping_metas=[mapping_meta], out_path=sink.root, load_mode=load_mode, env=env,
+                         author=author, workers=workers, out_format=None, sink=sink)
+    return sink.files
+
+
+def get_batch_files(path: str) -> list[str]:
+    """
+    Возвращает список EXCEL-файлов для пакетного формирования
+
+    Args:
+        path (str): Каталог с EXCEL-файлами или шаблон имени файлов (glob), например "maps/*.xlsx"
+
+    Returns: Отсортированный список файлов
+    """
+    if os.path.isdir(path):
+        path = os.path.join(path, '*.xlsx')
+
+    # Файлы вида "~$*.xlsx" - временные файлы открытых в EXCEL книг
+    return sorted(file_path for file_path in glob.glob(path)
+                  if os.path.isfile(file_path) and not os.path.basename(file_path).startswith('~$'))
+
+
+def _read_batch_files(file_paths: list[str], workers: int | None) -> list[MappingMeta]:
+    """
+    Чтение EXCEL-файлов пакета (параллельно, если задано несколько процессов) и проверка,
+    что имена целевых таблиц не повторяются во всех файлах
+    """
+    # Чтение EXCEL-файлов
+    workers_count: int = _get_workers(workers, len(file_paths))
+    if workers_count <= 1:
+        mapping_metas: list[MappingMeta] = [_read_mapping_meta(file_path) for file_path in file_paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers_count, initializer=_init_worker,
+                                 initargs=(Conf.get_state(), list(), dict())) as executor:
+            futures = [executor.submit(_run_task, _read_mapping_meta, file_path) for file_path in file_paths]
+            mapping_metas: list[MappingMeta] = list(_get_results(futures))
+
+    # Проверяем наличие дубликатов целевых таблиц во всех файлах
+    is_error: bool = False
+    visited: dict[str, str] = dict()
+    for file_path, mapping_meta in zip(file_paths, mapping_metas):
+        for tgt_table in mapping_meta.get_tgt_tables_list():
+            if tgt_table in visited:
+                logging.error(f"Целевая таблица '{tgt_table}' присутствует в файлах "
+                              f"'{visited[tgt_table]}' и '{file_path}'")
+                is_error = True
+            else:
+                visited[tgt_table] = file_path
+
+    if is_error:
+        raise IncorrectMappingException("Повторяющиеся названия целевых таблиц в разных файлах")
+
+    # Общий реестр коротких имен hub-таблиц всех файлов пакета: короткие имена не совпадают в разных файлах
+    hub_short_names = HubShortNames([hub_name for mapping_meta in mapping_metas
+                                     for hub_name in mapping_meta.get_hub_names()])
+    for mapping_meta in mapping_metas:
+        mapping_meta.hub_short_names = hub_short_names
+
+    return mapping_metas
+
+
+def batch_generator(
+        file_paths: list[str],
+        out_path: str,
+        load_mode: str,
+        env: Environment,
+        author: str,
+        workers: int | None = None,
+        out_format: str | None = None,
+        progress: RunProgress | None = None
+) -> None:
+    """Пакетное формирование файлов потоков по нескольким EXCEL-файлам маппинга.
+       Файлы читаются параллельно, потоки всех файлов формируются общим пулом процессов.
+       Имена целевых таблиц не должны повторяться во всех файлах
+
+    Args:
+        file_paths (list[str]): Список EXCEL-файлов маппинга РДВ
+        out_path (str): Каталог, в котором будут сформированы подкаталоги с описанием потоков
+        load_mode (str): Режим загрузки (increment, snapshot)
+        env (Environment): Окружение шаблонов jinja2
+        author (str): Наименование автора потоков для заполнения в шаблоне
+        workers (int | None): Количество процессов для параллельного чтения файлов и формирования потоков.
+            None - значение параметра workers из файла конфигурации, 0 - по количеству процессоров
+        out_format (str | None): Формат вывода: dir - каталог out_path, zip/tar/tar.gz - один архив out_path.<формат>.
+            None - значение параметра out_format из файла конфигурации
+        progress (RunProgress | None): Ход запуска (для отображения в диалоге) и прерывание между таблицами
+            (GenerationCancelledException)
+    """
+
+    Conf.is_warning = False
+
+    logging.info(f"file_paths: {len(file_paths)}")
+    logging.info(f"out_path: {out_path}")
+    logging.info(f"load_mode: {load_mode}")
+    logging.info(f"author: {author}")
+
+    if not file_paths:
+        msg = "Не найдены EXCEL-файлы для пакетного формирования"
+        logging.error(msg)
+        raise IncorrectMappingException(msg)
+
+    with _measure_run():
+        if progress:
+            progress.step('Чтение данных EXCEL')
+        with run_metrics.phase('read'):
+            mapping_metas: list[MappingMeta] = _read_batch_files(file_paths, workers)
+
+        _generate_tables(mapping_metas=mapping_metas, out_path=out_path, load_mode=load_mode, env=env,
+                         author=author, workers=workers, out_format=out_format, progress=progress)
+
+
+def iter_tables(
+        file_paths: list[str],
+        out_path: str,
+        load_mode: str,
+        env: Environment,
+        author: str,
+        workers: int | None = None,
+        out_format: str | None = None,
+        progress: RunProgress | None = None
+) -> Iterator[TableResult]:
+    """Формирование файлов потоков с выдачей результата по каждой целевой таблице по мере формирования
+       (отображение хода формирования, остановка после N ошибок, обработка сформированных файлов "на лету").
+       Ошибка в данных EXCEL целевой таблицы не прерывает формирование, а возвращается в результате таблицы
+       (status='error'). Ошибки чтения EXCEL и шаблонов передаются вызывающему.
+       Общие хабы и архив записываются после результата последней таблицы. Если перебор результатов
+       прекращен досрочно (break, close), то вывод прерывается: архив не создается, манифест не записывается
+
+    Args:
+        file_paths (list[str]): Список EXCEL-файлов маппинга РДВ (один файл или пакет, см. batch_generator)
+        out_path (str): Каталог, в котором будут сформированы подкаталоги с описанием потоков
+        load_mode (str): Режим загрузки (increment, snapshot)
+        env (Environment): Окружение шаблонов jinja2
+        author (str): Наименование автора потоков для заполнения в шаблоне
+        workers (int | None): Количество процессов для параллельного чтения файлов и формирования потоков.
+            None - значение параметра workers из файла конфигурации, 0 - по количеству процессоров
+        out_format (str | None): Формат вывода: dir - каталог out_path, zip/tar/tar.gz - один архив out_path.<формат>.
+            None - значение параметра out_format из файла конфигурации
+        progress (RunProgress | None): Ход запуска и прерывание между таблицами (GenerationCancelledException)
+
+    Yields: Результат формирования файлов потока целевой таблицы (в порядке следования таблиц)
+    """
+
+    Conf.is_warning = False
+
+    logging.info(f"file_paths: {len(file_paths)}")
+    logging.info(f"out_path: {out_path}")
+    logging.info(f"load_mode: {load_mode}")
+    logging.info(f"author: {author}")
+
+    if not file_paths:
+        msg = "Не найдены EXCEL-файлы для формирования"
+        logging.error(msg)
+        raise IncorrectMappingException(msg)
+
+    with _measure_run():
+        if progress:
+            progress.step('Чтение данных EXCEL')
+        with run_metrics.phase('read'):
+            if len(file_paths) == 1:
+                mapping_metas: list[MappingMeta] = [_read_mapping_meta(file_paths[0])]
+            else:
+                mapping_metas: list[MappingMeta] = _read_batch_files(file_paths, workers)
+
+        yield from _iter_tables(mapping_metas=mapping_metas, out_path=out_path, load_mode=load_mode, env=env,
+                                author=author, workers=workers, out_format=out_format, progress=progress)
+
+
+def iter_meta_tables(
+        mapping_metas: list[MappingMeta],
+        out_path: str,
+        load_mode: str,
+        env: Environment,
+        author: str,
+        workers: int | None = None,
+        out_format: str | None = None,
+        incremental: bool | None = None
+) -> Iterator[TableResult]:
+    """Формирование файлов потоков по уже прочитанным данным EXCEL (см. iter_tables).
+       Используется, если данные EXCEL хранятся в памяти между запусками (режим наблюдения)
+
+    Args:
+        mapping_metas (list[MappingMeta]): Данные EXCEL-файлов
+        out_path (str): Каталог, в котором будут сформированы подкаталоги с описанием потоков
+        load_mode (str): Режим загрузки (increment, snapshot)
+        env (Environment): Окружение шаблонов jinja2
+        author (str): Наименование автора потоков для заполнения в шаблоне
+        workers (int | None): Количество процессов для параллельного формирования потоков.
+            None - значение параметра workers из файла конфигурации, 0 - по количеству процессоров
+        out_format (str | None): Формат вывода: dir - каталог out_path, zip/tar/tar.gz - один архив out_path.<формат>.
+            None - значение параметра out_format из файла конфигурации
+        incremental (bool | None): Инкрементальное формирование (формируются только таблицы, "отпечаток" которых
+            изменился). None - значение параметра incremental из файла конфигурации
+
+    Yields: Результат формирования файлов потока целевой таблицы (в порядке следования таблиц)
+    """
+
+    Conf.is_warning = False
+
+    with _measure_run():
+        yield from _iter_tables(mapping_metas=mapping_metas, out_path=out_path, load_mode=load_mode, env=env,
+                                author=author, workers=workers, out_format=out_format, incremental=incremental)
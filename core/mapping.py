@@ -1,5 +1,8 @@
-import random
+import hashlib
 import string
+import sys
+
+import numpy
 
 import pandas
 import pandas as pd
@@ -10,9 +13,11 @@ from pandas import DataFrame
 import logging
 
 from core.config import Config
+from .cache import get_mapping_cache_key, load_mapping_cache, save_mapping_cache
 from .context import (SourceContext, TargetContext, MappingContext, DAPPSourceContext, UniContext,
                       HubFieldContext)
 from .exceptions import IncorrectMappingException
+from .validation import MappingIssue, validate_mapping
 
 
 class StreamData:
@@ -35,8 +40,13 @@ class StreamData:
     comment: str
 
     def __init__(self, df: pd.DataFrame, tgt_table: str):
+        """
+        Args:
+            df: Строки листа 'Перечень загрузок Src-RDV' (см. MappingMeta.get_list_by_table)
+            tgt_table: Имя целевой таблицы
+        """
 
-        self.row = df.query(f'tgt_table == "{tgt_table}"')
+        self.row = df[df['tgt_table'] == tgt_table]
         if len(self.row) == 0:
             logging.error(f"Не найдено имя целевой таблицы '{tgt_table}' "
                           f"на листе 'Перечень загрузок Src-RDV'")
@@ -64,15 +74,15 @@ class StreamData:
         # self.comment = self.row_dict["comment"]
 
 
-def _generate_mapping_df(file_data: bytes, sheet_name: str):
+def _generate_mapping_df(excel: pd.ExcelFile, sheet_name: str):
     """
     Трансформирует полученные данные EXCEL в тип DataFrame.
     Обрабатываются только данные листа из sheet_name.
     Проверяет в данных наличие колонок из списка.
 
     Параметры:
-        file_data: bytes
-            Данные в виде "строки", считанные их EXCEL-файла
+        excel: pd.ExcelFile
+            Открытая книга EXCEL
         sheet_name: str
             Название листа в книге EXCEL
 
@@ -82,10 +92,12 @@ def _generate_mapping_df(file_data: bytes, sheet_name: str):
 
     columns = Config.excel_data_definition.get('columns', dict())
     columns_list: list[str] = [col_name.lower().strip() for col_name in columns[sheet_name]]
+    columns_set: set[str] = set(columns_list)
 
-    # Преобразование данных в DataFrame
+    # Преобразование данных в DataFrame. Читаем только колонки из списка
     try:
-        mapping: DataFrame = pd.read_excel(file_data, sheet_name=sheet_name, header=1)
+        mapping: DataFrame = excel.parse(sheet_name=sheet_name, header=1,
+                                         usecols=lambda col: str(col).lower().strip() in columns_set)
     except Exception:
         logging.exception("Ошибка преобразования данных в DataFrame")
         raise
@@ -111,13 +123,186 @@ def _generate_mapping_df(file_data: bytes, sheet_name: str):
     return mapping
 
 
+# Колонки листа 'Детали загрузок Src-RDV', значения которых переводятся в нижний регистр (и удаляются пробелы)
+MAPPING_LOWER_COLUMNS: list[str] = ['src_attr', 'src_attr_datatype', 'tgt_attribute', 'tgt_attr_datatype', 'tgt_pk']
+# Колонки с повторяющимися значениями: значения хранятся в одном экземпляре (sys.intern)
+MAPPING_INTERN_COLUMNS: list[str] = ['algorithm_uid', 'subalgorithm_uid', 'src_table', 'tgt_table',
+                                     'tgt_attr_mandatory', 'attr:conversion_type', 'attr:bk_schema', 'attr:bk_object',
+                                     'attr:nulldefault']
+LIST_INTERN_COLUMNS: list[str] = ['tgt_table', 'src_table', 'source_name', 'target_rdv_object_type', 'scd_type']
+
+
+def _normalize_columns(df: DataFrame, lower_columns: list[str], intern_columns: list[str]) -> DataFrame:
+    """
+    "Нормализация" значений колонок за один проход по каждой колонке.
+    Каждое различное значение обрабатывается один раз, одинаковые значения заменяются одним экземпляром строки.
+
+    Параметры:
+        df: Данные листа
+        lower_columns: Колонки, значения которых переводятся в нижний регистр и из них удаляются пробелы
+            по краям (как .str.lower().str.strip(): значения, которые не являются строкой или NaN, заменяются на NaN)
+        intern_columns: Колонки, строковые значения которых не изменяются (числовые колонки не обрабатываются)
+
+    Возвращаемое значение:
+        Данные листа с "нормализованными" колонками
+    """
+    def normalize(values: pd.Series, is_lower: bool) -> list:
+        cache: dict[str, str] = dict()
+        ret: list = list()
+        for val in values.tolist():
+            if type(val) is str:
+                norm_val: str | None = cache.get(val)
+                if norm_val is None:
+                    norm_val = cache[val] = sys.intern(val.lower().strip() if is_lower else val)
+                ret.append(norm_val)
+            elif is_lower and not pd.isna(val):
+                ret.append(numpy.nan)
+            else:
+                ret.append(val)
+        return ret
+
+    columns: dict[str, pd.Series] = dict()
+    for col_name, is_lower in [(col_name, True) for col_name in lower_columns] + \
+                              [(col_name, False) for col_name in intern_columns]:
+        # Числовые колонки (например, все значения - числа) не изменяются
+        if not is_lower and df[col_name].dtype != object:
+            continue
+        columns[col_name] = pd.Series(normalize(df[col_name], is_lower), index=df.index, dtype=object)
+
+    return df.assign(**columns)
+
+
+def _search_group(pattern: str, val: str, group: str) -> str | float:
+    """
+    Значение группы group первого совпадения с шаблоном pattern (как .str.extract) или NaN
+    """
+    match = re.search(pattern, val)
+    return match.group(group) if match else numpy.nan
+
+
+def _load_mapping_workbook(file_data) -> tuple[DataFrame, DataFrame]:
+    """
+    Читает книгу EXCEL за один проход: файл открывается один раз,
+    обрабатываются только листы 'Детали загрузок Src-RDV' и 'Перечень загрузок Src-RDV'.
+
+    Параметры:
+        file_data: Данные, считанные из EXCEL-файла (BytesIO) или путь к файлу
+
+    Возвращаемое значение:
+        Данные листов 'Детали загрузок Src-RDV' и 'Перечень загрузок Src-RDV'
+    """
+    try:
+        excel = pd.ExcelFile(file_data)
+    except Exception:
+        logging.exception("Ошибка открытия книги EXCEL")
+        raise
+
+    with excel:
+        mapping_df = _generate_mapping_df(excel=excel, sheet_name='Детали загрузок Src-RDV')
+        mapping_list = _generate_mapping_df(excel=excel, sheet_name='Перечень загрузок Src-RDV')
+
+    return mapping_df, mapping_list
+
+
+class HubShortNames:
+    """
+    Реестр коротких имен hub-таблиц (short_name в wf.yaml).
+    Короткое имя однозначно определяется именем hub-таблицы: одни и те же данные всегда дают одинаковые файлы.
+    Реестр исключает совпадение коротких имен разных hub-таблиц
+    """
+    # Шаблон short_name в wf.yaml. Длина short_name должна быть от 3 до 23 символов
+    pattern: str = r"^[a-z][a-z0-9_]{2,22}$"
+
+    # Имя hub-таблицы (со схемой) - короткое имя
+    _names: dict[str, str]
+    # Короткое имя - имя hub-таблицы (со схемой)
+    _used: dict[str, str]
+
+    def __init__(self, hub_names=None):
+        """
+        Args:
+            hub_names: Имена hub-таблиц ("схема.таблица"), которые регистрируются сразу.
+                Регистрация выполняется в отсортированном порядке, что-бы результат не зависел от порядка таблиц
+        """
+        self._names = dict()
+        self._used = dict()
+        for hub_name in sorted(set(hub_names or list())):
+            self.get(hub_name)
+
+    @staticmethod
+    def _get_suffix(hub_name: str, attempt: int) -> str:
+        digest: bytes = hashlib.sha1(f'{hub_name}:{attempt}'.encode('utf-8')).digest()
+        return ''.join(string.ascii_lowercase[b % len(string.ascii_lowercase)] for b in digest[0:5])
+
+    def get(self, hub_name: str) -> str:
+        """
+        Возвращает короткое имя hub-таблицы
+
+        Args:
+            hub_name: Имя hub-таблицы со схемой ("схема.таблица")
+        """
+        if hub_name in self._names:
+            return self._names[hub_name]
+
+        h_name: str = hub_name.split('.')[-1]
+        if re.match(self.pattern, h_name) and self._used.get(h_name, hub_name) == hub_name:
+            short_name = h_name
+        else:
+            # Суффикс - хеш от имени hub-таблицы. При совпадении с уже использованным именем берется следующий хеш
+            attempt: int = 0
+            while True:
+                short_name = 'hub_' + h_name.removeprefix('hub_')[0:12] + '_' + self._get_suffix(hub_name, attempt)
+                if short_name not in self._used:
+                    break
+                attempt += 1
+
+        self._names[hub_name] = short_name
+        self._used[short_name] = hub_name
+        return short_name
+
+
 class MappingMeta:
     # Данные листа 'Детали загрузок Src-RDV'
     mapping_df: pd.DataFrame
     # Данные листа 'Перечень загрузок Src-RDV'
     mapping_list: pd.DataFrame
 
-    def __init__(self, byte_data):
+    def __init__(self, byte_data, use_cache: bool = True, validate: bool = True):
+        """
+        Args:
+            byte_data: Содержимое EXCEL-файла (BytesIO)
+            use_cache: Использовать кэш данных EXCEL (cache_path). False - кэш не читается и не записывается
+            validate: Проверить данные всех целевых таблиц. False - проверка выполняется отдельно (validate),
+                например, для замера времени этапов
+        """
+
+        # Повторный запуск для того же файла (и тех же настроек) берет "нормализованные" данные из кэша
+        cache_key: str | None = get_mapping_cache_key(byte_data.getvalue()) if use_cache else None
+        cached = load_mapping_cache(cache_key)
+        if cached is not None:
+            logging.info('Данные EXCEL прочитаны из кэша')
+            self.mapping_df, self.mapping_list = cached
+            self.tgt_tables_list: list[str] = self.mapping_list['tgt_table'].dropna().tolist()
+        else:
+            self._read_mapping(byte_data)
+            save_mapping_cache(cache_key, self.mapping_df, self.mapping_list)
+
+        # Индекс строк обоих листов по имени целевой таблицы, что-бы не "сканировать" данные для каждой таблицы
+        self._mapping_index: dict[str, DataFrame] = dict(tuple(self.mapping_df.groupby('tgt_table', sort=False)))
+        self._list_index: dict[str, DataFrame] = dict(tuple(self.mapping_list.groupby('tgt_table', sort=False)))
+
+        # Проверка атрибутов всех целевых таблиц за один проход по данным
+        self._issues: dict[str, list[MappingIssue]] = dict()
+        if validate:
+            self.validate()
+
+        # Реестр коротких имен всех hub-таблиц. При пакетном формировании заменяется общим реестром всех файлов
+        self.hub_short_names: HubShortNames = HubShortNames(self.get_hub_names())
+
+    def _read_mapping(self, byte_data):
+        """
+        Чтение данных из EXCEL, проверка и "нормализация" данных
+        """
 
         is_error: bool = False
         tgt_pk: set = {'pk', 'bk', 'rk'}
@@ -132,34 +317,28 @@ class MappingMeta:
             else:
                 return False
 
-        # Проверка, очистка данных, преобразование в DataFrame
+        # Проверка, очистка данных, преобразование в DataFrame. Книга читается один раз
+        self.mapping_df, self.mapping_list = _load_mapping_workbook(byte_data)
+
         # Детали загрузок Src-RDV
-        self.mapping_df = _generate_mapping_df(file_data=byte_data, sheet_name='Детали загрузок Src-RDV')
 
         # Оставляем только строки, в которых заполнено поле 'Tgt_table'
         self.mapping_df = self.mapping_df.dropna(subset=['tgt_table'])
 
-        # Преобразуем значения в "нужный" регистр
-        self.mapping_df['src_attr'] = self.mapping_df['src_attr'].str.lower()
-        self.mapping_df['src_attr'] = self.mapping_df['src_attr'].str.strip()
-
-        self.mapping_df['src_attr_datatype'] = self.mapping_df['src_attr_datatype'].str.lower()
-        self.mapping_df['src_attr_datatype'] = self.mapping_df['src_attr_datatype'].str.strip()
-
-        self.mapping_df['tgt_attribute'] = self.mapping_df['tgt_attribute'].str.lower()
-        self.mapping_df['tgt_attribute'] = self.mapping_df['tgt_attribute'].str.strip()
-
-        self.mapping_df['tgt_attr_datatype'] = self.mapping_df['tgt_attr_datatype'].str.lower()
-        self.mapping_df['tgt_attr_datatype'] = self.mapping_df['tgt_attr_datatype'].str.strip()
-
-        self.mapping_df['tgt_pk'] = self.mapping_df['tgt_pk'].str.lower()
-        self.mapping_df['tgt_pk'] = self.mapping_df['tgt_pk'].str.strip()
+        # Преобразуем значения в "нужный" регистр, удаляем пробелы, повторяющиеся значения храним в одном экземпляре
+        self.mapping_df = _normalize_columns(self.mapping_df, lower_columns=MAPPING_LOWER_COLUMNS,
+                                             intern_columns=MAPPING_INTERN_COLUMNS)
+        self.mapping_list = _normalize_columns(self.mapping_list, lower_columns=[],
+                                               intern_columns=LIST_INTERN_COLUMNS)
 
         # Заменяем значения NaN на пустые строки, что-бы дальше "не мучится"
         self.mapping_df['tgt_pk'] = self.mapping_df['tgt_pk'].fillna(value="")
 
-        # Проверяем состав поля 'tgt_pk'
-        err_rows: pd.DataFrame = self.mapping_df[~self.mapping_df['tgt_pk'].apply(test_tgt_pk)]
+        # Проверяем состав поля 'tgt_pk'. Различных значений поля немного, проверяется каждое значение один раз
+        tgt_pk_values: pd.Series = self.mapping_df['tgt_pk']
+        tgt_pk_unique: list = tgt_pk_values.unique().tolist()
+        is_tgt_pk: dict = {val: test_tgt_pk(val) for val in tgt_pk_unique}
+        err_rows: pd.DataFrame = self.mapping_df[~tgt_pk_values.map(is_tgt_pk).astype(bool)]
         if len(err_rows) > 0:
             logging.error(f"Неверно указаны значения в поле 'tgt_pk'")
             for line in str(err_rows).splitlines():
@@ -167,17 +346,14 @@ class MappingMeta:
             logging.error(f'Допустимые значения: {tgt_pk}')
             is_error = True
 
-        # "Разворачиваем" колонку Tgt_PK в отдельные признаки
-        self.mapping_df = self.mapping_df.assign(_pk=lambda _df: _df['tgt_pk'].str.
-                                                 extract('(^|,)(?P<_pk>pk)(,|$)')['_pk'])
-
-        # Признак формирования значения hub из поля _rk/_id
-        self.mapping_df = self.mapping_df.assign(_rk=lambda _df: _df['tgt_pk'].str.
-                                                 extract(r'(^|,)(?P<_rk>rk|bk)(,|$)')['_rk'])
+        # "Разворачиваем" колонку Tgt_PK в отдельные признаки:
+        # _pk - поле входит в PK, _rk - признак формирования значения hub из поля _rk/_id
+        pk_values: dict = {val: _search_group(r'(^|,)(?P<_pk>pk)(,|$)', val, '_pk') for val in tgt_pk_unique}
+        rk_values: dict = {val: _search_group(r'(^|,)(?P<_rk>rk|bk)(,|$)', val, '_rk') for val in tgt_pk_unique}
+        self.mapping_df = self.mapping_df.assign(_pk=tgt_pk_values.map(pk_values).astype(object),
+                                                 _rk=tgt_pk_values.map(rk_values).astype(object))
 
         # Перечень загрузок Src-RDV ------------------------------------------------------------------------------------
-        self.mapping_list = _generate_mapping_df(file_data=byte_data, sheet_name='Перечень загрузок Src-RDV')
-
         # Список целевых таблиц. Проверяем наличие дубликатов в списке
         self.tgt_tables_list: list[str] = self.mapping_list['tgt_table'].dropna().tolist()
         visited: set = set()
@@ -202,14 +378,53 @@ class MappingMeta:
         """
         Возвращает список (DataFrame) строк для заданной целевой таблицы
         """
-        df: DataFrame = self.mapping_df[self.mapping_df['tgt_table'] == tgt_table].dropna(how="all")
+        df: DataFrame = self._mapping_index.get(tgt_table, self.mapping_df.iloc[0:0]).dropna(how="all")
         return df
 
+    def get_list_by_table(self, tgt_table: str) -> pd.DataFrame:
+        """
+        Возвращает строки листа 'Перечень загрузок Src-RDV' для заданной целевой таблицы
+        """
+        return self._list_index.get(tgt_table, self.mapping_list.iloc[0:0])
+
+    def validate(self):
+        """
+        Проверка атрибутов всех целевых таблиц (замечания - get_issues_by_table)
+        """
+        self._issues = validate_mapping(self.mapping_df)
+
+    @staticmethod
+    def _get_hub_names(mapping: DataFrame) -> list[str]:
+        hub_names = mapping.loc[mapping['attr:conversion_type'] == 'hub', 'attr:bk_object']
+        return [hub_name for hub_name in hub_names.dropna().unique()
+                if type(hub_name) is str and re.match(r"^[a-z][a-z0-9_]*\.[a-z][a-z0-9_]*$", hub_name)]
+
+    def get_hub_names(self) -> list[str]:
+        """
+        Возвращает имена hub-таблиц ("схема.таблица") всех целевых таблиц
+        """
+        return self._get_hub_names(self.mapping_df)
+
+    def get_hub_short_names_by_table(self, tgt_table: str) -> dict[str, str]:
+        """
+        Возвращает короткие имена hub-таблиц заданной целевой таблицы: имя hub-таблицы - короткое имя.
+        Короткое имя зависит и от hub-таблиц других целевых таблиц (совпадение имен)
+        """
+        mapping: DataFrame = self._mapping_index.get(tgt_table, self.mapping_df.iloc[0:0])
+        return {hub_name: self.hub_short_names.get(hub_name) for hub_name in sorted(self._get_hub_names(mapping))}
+
+    def get_issues_by_table(self, tgt_table: str) -> list[MappingIssue]:
+        """
+        Возвращает замечания проверки данных для заданной целевой таблицы
+        """
+        return self._issues.get(tgt_table, list())
+
     def get_src_cd_by_table(self, tgt_table: str) -> str | None:
         """
         Возвращает наименование источника для заданной целевой таблицы. Если None, то источник не найден
         """
-        src_cd_obj = self.mapping_df.query(f'tgt_table == "{tgt_table}" and tgt_attribute == "src_cd"')['expression']
+        mapping: DataFrame = self._mapping_index.get(tgt_table, self.mapping_df.iloc[0:0])
+        src_cd_obj = mapping.loc[mapping['tgt_attribute'] == 'src_cd', 'expression']
         if len(src_cd_obj) == 0:
             logging.error(f"Не найдено поле 'src_cd' в таблице '{tgt_table}'")
             return None
@@ -259,9 +474,19 @@ class MartMapping:
     # Режим загрузки "дельты" - значение параметра в файле описания рабочего потока
     delta_mode: str = 'new'
     algorithm_UID: str | None = None
+    # Замечания проверки данных таблицы (см. validate_mapping). None - проверка выполняется при инициализации
+    issues: list[MappingIssue] | None = None
+    # Реестр коротких имен hub-таблиц запуска (см. MappingMeta). None - реестр только для этой таблицы
+    hub_short_names: HubShortNames | None = None
 
     # Инициализация данных
     def __post_init__(self):
+        if self.issues is None:
+            self.issues = validate_mapping(self.mart_mapping).get(self.mart_name, list())
+
+        if self.hub_short_names is None:
+            self.hub_short_names = HubShortNames()
+
         # Подготовка контекста источника
         self._src_ctx_post_init()
 
@@ -285,76 +510,39 @@ class MartMapping:
                                   hdp_processed=hdp_processed,
                                   hdp_processed_conversion=hdp_processed_conversion)
 
-    def _get_tgt_table_fields(self) -> list:
+    def _log_issues(self, section: str) -> bool:
         """
-        Возвращает список полей целевой таблицы с типами данных и признаком "null"/"not null"
-        Выполняет проверку типов и обязательных полей
+        Выводит в журнал замечания проверки данных (см. validate_mapping) для раздела section
+
+        Returns: True, если среди замечаний есть ошибки
         """
+        is_error: bool = False
+        for issue in self.issues:
+            if issue.section != section:
+                continue
 
-        # Включение режима "копирование при записи"
-        pd.options.mode.copy_on_write = True
+            for line in issue.lines:
+                logging.log(issue.level, line)
 
-        corresp_datatype = Config.field_type_list.get("corresp_datatype", None)
-        if not corresp_datatype:
-            corresp_datatype = {
-                'string': ['text'],
-                'timestamp': ['timestamp'],
-                'bigint': ['bigint'],
-                'decimal': ['decimal'],
-                'date': ['date']
-            }
-
-        def check_datatypes(row) -> bool:
-            if type(row['src_attr_datatype']) is not str or type(row['tgt_attr_datatype']) is not str:
-                return False
+            if issue.level >= logging.ERROR:
+                is_error = True
+            else:
+                Config.is_warning = True
 
-            # Проверка _id / _rk полей
-            if (row['src_attr'].removesuffix('_id') and row['tgt_attribute'].removesuffix('_rk') and
-                    row['src_attr_datatype'] == 'string' and row['tgt_attr_datatype'] == 'bigint'):
-                return True
+        return is_error
 
-            return row['tgt_attr_datatype'] in corresp_datatype[row['src_attr_datatype']]
+    def _get_tgt_table_fields(self) -> list:
+        """
+        Возвращает список полей целевой таблицы с типами данных и признаком "null"/"not null"
+        Проверки типов и обязательных полей выполняются в validate_mapping
+        """
 
-        is_error: bool = False
+        # Включение режима "копирование при записи"
+        pd.options.mode.copy_on_write = True
 
-        src = self.mart_mapping[['src_table', 'src_attr', 'src_attr_datatype']].dropna(how='all')
         tgt = self.mart_mapping[['tgt_attribute', 'tgt_attr_datatype', 'tgt_attr_mandatory', 'tgt_pk', 'comment',
                                  '_pk', '_rk']].dropna(subset=['tgt_attribute', 'tgt_attr_datatype'])
 
-        # Удаляем строки для которых не заполнены поля источника и/или целевой таблицы.
-        data_types = self.mart_mapping[['src_attr', 'src_attr_datatype',
-                                        'tgt_attribute', 'tgt_attr_datatype']].dropna(how='any')
-        # Проверяем соответствие типов данных источника и целевой таблицы.
-        tmp_df = data_types.apply(func=check_datatypes, axis=1, result_type='reduce')
-        err_rows = data_types[~tmp_df]
-        if len(err_rows) > 0:
-            Config.is_warning = True
-            logging.warning(f"Типы данных источника полей и целевой таблицы различаются")
-            logging.warning(f"Проверьте корректность заполнения атрибутов")
-            for line in str(err_rows).splitlines():
-                logging.warning(line)
-
-        # Проверяем типы данных, заданные для источника. Читаем данные из настроек программы
-        src_attr_datatype: dict = Config.field_type_list.get('src_attr_datatype', dict())
-        err_rows = src[~src['src_attr_datatype'].isin(src_attr_datatype)]
-        if len(err_rows) > 0:
-            logging.error(f"Неверно указаны типы данных источника '{src.iloc[0].at['src_table']}':")
-            for line in str(err_rows).splitlines():
-                logging.error(line)
-            logging.error(f'Допустимые типы данных: {src_attr_datatype}')
-            is_error = True
-
-        # Проверяем типы данных для целевой таблицы. Читаем данные из настроек программы
-        tgt_attr_datatype: dict = Config.field_type_list.get('tgt_attr_datatype', dict())
-        err_rows = tgt[~tgt['tgt_attr_datatype'].isin(tgt_attr_datatype)]
-        if len(err_rows) > 0:
-            logging.error(f"Неверно указаны типы данных в строках для целевой таблицы '{self.mart_name}':")
-            for line in str(err_rows).splitlines():
-                logging.error(line)
-
-            logging.error(f'Допустимые типы данных: {tgt_attr_datatype}')
-            is_error = True
-
         # Заполняем признак 'Tgt_attr_mandatory'.
         # При чтении данных Панда заменяет строку 'null' на значение 'nan'
         # Поэтому производим "обратную" замену ...
@@ -365,57 +553,7 @@ class MartMapping:
         tgt['comment'] = tgt['comment'].fillna(value='')
         pd.options.mode.chained_assignment = chained_assignment
 
-        err_rows = tgt[~tgt['tgt_attr_mandatory'].isin(['null', 'not null'])]
-        if len(err_rows) > 0:
-            logging.error(f"Неверно указан признак null/not null для целевой таблицы '{self.mart_name}':")
-            for line in str(err_rows).splitlines():
-                logging.error(line)
-            is_error = True
-
-        # Проверка: Поля 'pk' должны быть "not null"
-        err_rows = tgt.query('_pk in ["pk"] and tgt_attr_mandatory != "not null"')
-        if len(err_rows) > 0:
-            logging.error(f"Неверно указан признак 'Tgt_attr_mandatory' для целевой таблицы '{self.mart_name}':")
-            logging.error("Поля отмеченные как 'pk' должны быть 'not null'")
-            for line in str(err_rows).splitlines():
-                logging.error(line)
-            is_error = True
-
-        # Проверка полей, тип которых фиксирован
-        tgt_attr_predefined_datatype: dict = Config.field_type_list.get('tgt_attr_predefined_datatype', dict())
-        for fld_name in tgt_attr_predefined_datatype.keys():
-            err_rows = tgt.query(f"tgt_attribute == '{fld_name}'")
-            if len(err_rows) == 0:
-                logging.error(f"Не найден обязательный атрибут '{fld_name}' для целевой таблицы '{self.mart_name}'")
-                is_error = True
-
-            elif len(err_rows) > 1:
-                logging.error(f"Обязательный атрибут '{fld_name}' для целевой таблицы '{self.mart_name}'"
-                              f" указан более одного раза")
-                for line in str(err_rows).splitlines():
-                    logging.error(line)
-                is_error = True
-
-            else:
-                if (err_rows.iloc[0]['tgt_attr_datatype'] != tgt_attr_predefined_datatype[fld_name][0] or
-                        err_rows.iloc[0]['tgt_attr_mandatory'] != tgt_attr_predefined_datatype[fld_name][1]):
-                    logging.error(
-                        f"Параметры обязательного атрибута '{fld_name}' для целевой таблицы '{self.mart_name}'"
-                        f" указаны неверно")
-                    for line in str(err_rows).splitlines():
-                        logging.error(line)
-                    is_error = True
-
-        # Проверяем соответствие названия полей целевой таблицы шаблону
-        pattern: str = Config.field_type_list.get('tgt_attr_name_regexp', r"^[a-zA-Z][a-zA-Z0-9_]*$")
-        err_rows = tgt[~tgt.tgt_attribute.str.match(pattern).fillna(True)]
-        if len(err_rows) > 0:
-            logging.error(f"Названия полей целевой таблицы '{self.mart_name}' не соответствуют шаблону '{pattern}'")
-            for index, fld_name in err_rows['tgt_attribute'].items():
-                logging.error(fld_name)
-            is_error = True
-
-        if is_error:
+        if self._log_issues('tgt'):
             raise IncorrectMappingException(f"Неверно указаны атрибуты для целевой таблицы '{self.mart_name}'")
 
         return tgt.to_numpy().tolist()
@@ -439,8 +577,6 @@ class MartMapping:
         hub_list = hub.to_numpy().tolist()
 
         # Проверяем корректность имен
-        # Шаблон формирования short_name в wf.yaml
-        pattern = r"^[a-z][a-z0-9_]{2,22}$"
         bk_object_pattern = r"^[a-z][a-z0-9_]*\.[a-z][a-z0-9_]*$"
 
         ret_list: list = list()
@@ -483,12 +619,7 @@ class MartMapping:
             else:
                 h_schema, h_name = hh[2].split('.')
 
-            # Длина short_name должна быть от 2 до 22 символов
-            if not re.match(pattern, h_name):
-                h_short_name = ('hub_' + h_name.removeprefix('hub_')[0:12] + '_' +
-                                ''.join(random.choice(string.ascii_lowercase) for i in range(5)))
-            else:
-                h_short_name = h_name
+            h_short_name: str = self.hub_short_names.get(hh[2])
 
             hub_ctx.hub_schema = h_schema
             hub_ctx.hub_name_only = h_name
@@ -509,6 +640,7 @@ class MartMapping:
     def _get_src_table_fields(self) -> list:
         """
         Возвращает список полей источника с типами данных
+        Проверки названий и обязательных полей выполняются в validate_mapping
         """
         src_attr: DataFrame = self.mart_mapping[['src_attr', 'src_attr_datatype', 'src_table']] \
             .dropna(how="any")
@@ -518,41 +650,7 @@ class MartMapping:
         # Удаление дубликатов в списке полей
         src_attr = src_attr.drop_duplicates(subset=['src_attr'])
 
-        is_error: bool = False
-        # Проверяем соответствие названия полей источника шаблону
-        pattern: str = Config.field_type_list.get('src_attr_name_regexp', r"^[a-zA-Z][a-zA-Z0-9_\\$]*$")
-        err_rows = src_attr[~src_attr.src_attr.str.match(pattern)]
-        if len(err_rows) > 0:
-            logging.error(f"Названия полей в таблице - источнике '{src_tbl_name}' не соответствуют шаблону '{pattern}'")
-            for index, fld_name in err_rows['src_attr'].items():
-                logging.error(fld_name)
-            is_error = True
-
-        # Проверяем обязательные поля
-        src_attr_predefined_datatype: dict = Config.field_type_list.get('src_attr_predefined_datatype', dict())
-        for fld_name in src_attr_predefined_datatype.keys():
-            err_rows = src_attr.query(f"src_attr == '{fld_name}'")
-            if len(err_rows) == 0:
-                logging.error(f"Не найден обязательный атрибут '{fld_name}' таблицы - источника '{src_tbl_name}'")
-                is_error = True
-
-            elif len(err_rows) > 1:
-                logging.error(f"Обязательный атрибут '{fld_name}' для таблицы - источника '{src_tbl_name}'"
-                              f" указан более одного раза")
-                for line in str(err_rows).splitlines():
-                    logging.error(line)
-                is_error = True
-
-            else:
-                if err_rows.iloc[0]['src_attr_datatype'] != src_attr_predefined_datatype[fld_name][0]:
-                    logging.error(
-                        f"Параметры обязательного атрибута '{fld_name}' для целевой таблицы '{src_tbl_name}'"
-                        f" указаны неверно")
-                    for line in str(err_rows).splitlines():
-                        logging.error(line)
-                    is_error = True
-
-        if is_error:
+        if self._log_issues('src'):
             raise IncorrectMappingException(f"Неверно указаны атрибуты таблицы - источника '{src_tbl_name}'")
 
         # Преобразуем к виду python list
@@ -0,0 +1,137 @@
+import json
+import logging
+import time
+from contextlib import contextmanager
+
+from jinja2 import Template
+
+
+class RunMetrics:
+    """
+    Замеры времени запуска: этапы запуска, целевые таблицы, шаблоны (время формирования и размер результата).
+    Процесс-исполнитель передает свои замеры в основной процесс (pop/merge)
+    """
+    # Этапы запуска: название этапа - время, с
+    phases: dict[str, float]
+    # Целевые таблицы: имя таблицы - {seconds, context, export, size}
+    tables: dict[str, dict]
+    # Шаблоны: имя шаблона - {count, seconds, size}
+    templates: dict[str, dict]
+
+    # Замеры текущей целевой таблицы
+    _table: dict | None
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.phases = dict()
+        self.tables = dict()
+        self.templates = dict()
+        self._table = None
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Замер этапа запуска
+        """
+        start: float = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    @contextmanager
+    def table(self, tgt_table: str):
+        """
+        Замер формирования файлов целевой таблицы
+        """
+        self._table = {'seconds': 0.0, 'context': 0.0, 'export': 0.0, 'size': 0}
+        self.tables[tgt_table] = self._table
+        start: float = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._table['seconds'] = time.perf_counter() - start
+            self._table = None
+
+    @contextmanager
+    def table_phase(self, name: str):
+        """
+        Замер этапа формирования файлов текущей целевой таблицы (context - подготовка данных, export - вывод файлов)
+        """
+        start: float = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self._table is not None:
+                self._table[name] += time.perf_counter() - start
+
+    def render(self, template: Template, **kwargs) -> str:
+        """
+        Формирование текста по шаблону с замером времени и размера результата
+        """
+        start: float = time.perf_counter()
+        output: str = template.render(**kwargs)
+        seconds: float = time.perf_counter() - start
+
+        size: int = len(output)
+        stat: dict = self.templates.setdefault(template.name, {'count': 0, 'seconds': 0.0, 'size': 0})
+        stat['count'] += 1
+        stat['seconds'] += seconds
+        stat['size'] += size
+        if self._table is not None:
+            self._table['size'] += size
+        return output
+
+    def pop(self) -> dict:
+        """
+        Возвращает замеры таблиц и шаблонов и обнуляет их (для передачи из процесса-исполнителя)
+        """
+        data: dict = {'tables': self.tables, 'templates': self.templates}
+        self.tables = dict()
+        self.templates = dict()
+        return data
+
+    def merge(self, data: dict):
+        """
+        Добавляет замеры процесса-исполнителя, полученные через pop
+        """
+        self.tables.update(data['tables'])
+        for name, stat in data['templates'].items():
+            total: dict = self.templates.setdefault(name, {'count': 0, 'seconds': 0.0, 'size': 0})
+            for key, value in stat.items():
+                total[key] += value
+
+    def get_summary(self) -> dict:
+        return {'phases': self.phases, 'tables': self.tables, 'templates': self.templates}
+
+    def save(self, file_name: str):
+        """
+        Запись замеров в JSON-файл
+        """
+        with open(file_name, 'w', encoding='utf-8') as f:
+            json.dump(self.get_summary(), f, ensure_ascii=False, indent=2)
+
+    def report(self, top: int = 10):
+        """
+        Вывод замеров в журнал: этапы, шаблоны, самые "медленные" таблицы
+        """
+        logging.info('')
+        logging.info('>>>>> Замеры времени >>>>>')
+        for name, seconds in self.phases.items():
+            logging.info(f'Этап {name}: {seconds:.3f} с')
+
+        for name, stat in sorted(self.templates.items(), key=lambda item: -item[1]['seconds']):
+            logging.info(f"Шаблон {name}: файлов - {stat['count']}, {stat['seconds']:.3f} с, "
+                         f"{stat['size']} символов")
+
+        tables = sorted(self.tables.items(), key=lambda item: -item[1]['seconds'])[:top]
+        for tgt_table, stat in tables:
+            logging.info(f"Таблица {tgt_table}: {stat['seconds']:.3f} с (данные - {stat['context']:.3f} с, "
+                         f"файлы - {stat['export']:.3f} с), {stat['size']} символов")
+        logging.info('<<<<< Замеры времени <<<<<')
+
+
+# Замеры текущего запуска
+run_metrics: RunMetrics = RunMetrics()
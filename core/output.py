@@ -0,0 +1,459 @@
+import hashlib
+import io
+import logging
+import os
+import queue
+import tarfile
+import threading
+import time
+import zipfile
+import zlib
+from collections import Counter
+
+from jinja2 import Template
+
+from core.metrics import run_metrics
+
+# Форматы вывода: dir - файлы в каталоге, остальные - один архив
+OUT_FORMATS: dict[str, str] = {'dir': '', 'zip': '.zip', 'tar': '.tar', 'tar.gz': '.tar.gz'}
+
+# Размер очереди файлов одного потока записи. Если запись не успевает, то формирование файлов ожидает
+WRITE_QUEUE_SIZE: int = 32
+
+
+class OutputSink:
+    """
+    Вывод сформированных файлов. Все файлы потоков записываются через объект этого класса:
+     * каталоги создаются один раз;
+     * файл, содержимое которого не изменилось, не перезаписывается (сравнение по размеру и хешу);
+     * ведется подсчет новых, измененных и не измененных файлов.
+    Если задано количество потоков записи (write_threads), то файлы записываются в фоне: сформированный файл
+    помещается в очередь потока записи, формирование следующих файлов продолжается. Файл всегда записывается
+    одним и тем же потоком (по имени файла), поэтому повторная запись файла выполняется в порядке формирования.
+    Ошибка записи передается вызывающему в flush/close
+    """
+    # Корневой каталог вывода
+    root: str
+    # Количество файлов: new - новые, written - перезаписанные, unchanged - без изменений
+    stats: Counter
+    # Файлы, выведенные после последнего вызова pop_paths: путь относительно root с разделителем "/"
+    paths: list[str]
+    # Файлы, сформированные по шаблонам после последнего вызова pop_artifacts: путь относительно root - имя шаблона
+    artifacts: dict[str, str]
+    # Отбор шаблонов: формируются только файлы этих шаблонов (частичное формирование). None - все файлы
+    render_templates: set[str] | None = None
+    # Возможно инкрементальное формирование (файлы предыдущего запуска сохраняются)
+    is_incremental: bool = True
+
+    # Количество потоков записи. 0 - файлы записываются сразу
+    write_threads: int
+
+    # Созданные каталоги
+    _dirs: set[str]
+    # Содержимое копируемых файлов
+    _copy_cache: dict[str, bytes]
+    # Очереди и потоки записи
+    _queues: list[queue.Queue]
+    _threads: list[threading.Thread]
+    # Первая ошибка записи
+    _error: Exception | None
+    # Вывод прерван (abort): файлы из очередей не записываются
+    _aborted: bool
+    _lock: threading.Lock
+
+    def __init__(self, root: str, write_threads: int = 0):
+        self.root = root
+        self.stats = Counter()
+        self.paths = list()
+        self.artifacts = dict()
+        self.write_threads = write_threads
+        self._dirs = set()
+        self._copy_cache = dict()
+        self._queues = list()
+        self._threads = list()
+        self._error = None
+        self._aborted = False
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        # Объект передается в процесс-исполнитель (get_worker_sink): потоки записи, очереди и блокировка
+        # не передаются, создаются заново в __setstate__
+        state: dict = self.__dict__.copy()
+        for name in ('_queues', '_threads', '_lock'):
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self._queues = list()
+        self._threads = list()
+        self._lock = threading.Lock()
+
+    def write_text(self, file_name: str, output: str):
+        """
+        Запись текстового файла в кодировке utf-8. Перевод строки, как и при записи в текстовом режиме, зависит от ОС
+
+        Args:
+            file_name: Полный путь к файлу
+            output: Содержимое файла
+        """
+        if os.linesep != '\n':
+            output = output.replace('\n', os.linesep)
+        self.write_bytes(file_name, output.encode('utf-8'))
+
+    def is_selected(self, template_name: str) -> bool:
+        """
+        Проверяет, что файлы шаблона формируются (см. render_templates)
+        """
+        return self.render_templates is None or template_name in self.render_templates
+
+    def write_template(self, file_name: str, template: Template, **kwargs):
+        """
+        Формирование файла по шаблону (RunMetrics.render) и его вывод. Имя шаблона запоминается в artifacts.
+        Файлы шаблонов, не попавших в отбор render_templates, не формируются
+
+        Args:
+            file_name: Полный путь к файлу
+            template: Шаблон
+            **kwargs: Данные для шаблона
+        """
+        if not self.is_selected(template.name):
+            return
+        self.artifacts[self.get_rel_name(file_name)] = template.name
+        self.write_text(file_name, run_metrics.render(template, **kwargs))
+
+    def copy_file(self, src_file_name: str, file_name: str, template_name: str | None = None):
+        """
+        Копирование файла (содержимое файла-источника читается один раз за запуск)
+
+        Args:
+            src_file_name: Файл-источник
+            file_name: Полный путь к файлу
+            template_name: Имя файла-источника в каталоге шаблонов. Если задано, то запоминается в artifacts
+                (см. write_template)
+        """
+        if template_name is not None:
+            if not self.is_selected(template_name):
+                return
+            self.artifacts[self.get_rel_name(file_name)] = template_name
+
+        if src_file_name not in self._copy_cache:
+            with open(src_file_name, 'rb') as f:
+                self._copy_cache[src_file_name] = f.read()
+        self.write_bytes(file_name, self._copy_cache[src_file_name])
+
+    def write_bytes(self, file_name: str, data: bytes):
+        """
+        Вывод файла: запись сразу или помещение в очередь потока записи
+
+        Args:
+            file_name: Полный путь к файлу
+            data: Содержимое файла
+        """
+        self.paths.append(self.get_rel_name(file_name))
+
+        if not self.write_threads:
+            self._write_bytes(file_name, data)
+            return
+
+        if self._error is not None:
+            # Запись прекращается после первой ошибки
+            self.flush()
+        if not self._threads:
+            self._start_writers()
+        self._queues[zlib.crc32(file_name.encode('utf-8')) % len(self._queues)].put((file_name, data))
+
+    def _start_writers(self):
+        for index in range(self.write_threads):
+            file_queue: queue.Queue = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+            thread = threading.Thread(target=self._writer, args=(file_queue,), name=f'writer-{index}', daemon=True)
+            self._queues.append(file_queue)
+            self._threads.append(thread)
+            thread.start()
+
+    def _writer(self, file_queue: queue.Queue):
+        """
+        Поток записи: записывает файлы из очереди до получения None. После ошибки или прерывания вывода (abort)
+        файлы не записываются
+        """
+        while True:
+            item: tuple[str, bytes] | None = file_queue.get()
+            try:
+                if item is None:
+                    return
+                if self._error is None and not self._aborted:
+                    self._write_bytes(*item)
+            except Exception as err:
+                logging.error(f'Ошибка записи файла {item[0]}: {err}')
+                with self._lock:
+                    if self._error is None:
+                        self._error = err
+            finally:
+                file_queue.task_done()
+
+    def flush(self):
+        """
+        Ожидание записи всех файлов из очередей. Ошибка записи передается вызывающему
+        """
+        for file_queue in self._queues:
+            file_queue.join()
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _stop_writers(self):
+        """
+        Завершение потоков записи (после записи файлов из очередей)
+        """
+        for file_queue in self._queues:
+            file_queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._queues = list()
+        self._threads = list()
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _write_bytes(self, file_name: str, data: bytes):
+        """
+        Запись файла, если его содержимое изменилось
+        """
+        path: str = os.path.dirname(file_name)
+        if path not in self._dirs:
+            os.makedirs(path, exist_ok=True)
+            self._dirs.add(path)
+
+        if os.path.isfile(file_name):
+            if os.path.getsize(file_name) == len(data):
+                with open(file_name, 'rb') as f:
+                    if hashlib.sha256(f.read()).digest() == hashlib.sha256(data).digest():
+                        self._count('unchanged')
+                        return
+            self._count('written')
+        else:
+            self._count('new')
+
+        with open(file_name, 'wb') as f:
+            f.write(data)
+
+    def get_rel_name(self, file_name: str) -> str:
+        """
+        Возвращает путь к файлу относительно root с разделителем "/"
+        """
+        return os.path.relpath(file_name, self.root or os.curdir).replace(os.sep, '/')
+
+    def pop_paths(self) -> list[str]:
+        """
+        Возвращает список выведенных файлов и обнуляет его (файлы одной целевой таблицы)
+        """
+        paths = self.paths
+        self.paths = list()
+        return paths
+
+    def pop_artifacts(self) -> dict[str, str]:
+        """
+        Возвращает файлы, сформированные по шаблонам, и обнуляет их (файлы одной целевой таблицы)
+        """
+        artifacts = self.artifacts
+        self.artifacts = dict()
+        return artifacts
+
+    def get_worker_sink(self) -> 'OutputSink':
+        """
+        Возвращает объект вывода файлов для процесса-исполнителя
+        """
+        return OutputSink(self.root, self.write_threads)
+
+    def pop_output(self) -> tuple[Counter, list[tuple[str, bytes]]]:
+        """
+        Возвращает счетчики и не записанные файлы и обнуляет их
+        (используется для передачи результата из процесса-исполнителя)
+        """
+        self.flush()
+        stats = self.stats
+        self.stats = Counter()
+        return stats, list()
+
+    def merge_output(self, output: tuple[Counter, list[tuple[str, bytes]]]):
+        """
+        Добавляет результат процесса-исполнителя, полученный через pop_output
+        """
+        stats, files = output
+        self.stats.update(stats)
+        for file_name, data in files:
+            self.write_bytes(file_name, data)
+
+    def close(self):
+        """
+        Завершение вывода: ожидание записи всех файлов
+        """
+        try:
+            self.flush()
+        finally:
+            self._stop_writers()
+
+    def abort(self):
+        """
+        Прерывание вывода при ошибке: файлы, которые ожидают записи в очередях, не записываются
+        """
+        self._aborted = True
+        self._stop_writers()
+
+    def report(self):
+        """
+        Вывод в журнал количества файлов
+        """
+        logging.info(f"Файлы: новые - {self.stats['new']}, измененные - {self.stats['written']}, "
+                     f"без изменений - {self.stats['unchanged']}")
+
+
+class BufferSink(OutputSink):
+    """
+    Накапливает файлы в памяти. Используется процессами-исполнителями при выводе в архив:
+    файлы передаются в основной процесс и записываются в архив в порядке следования таблиц
+    """
+    # Файлы: (полный путь, содержимое)
+    files: list[tuple[str, bytes]]
+
+    def __init__(self, root: str):
+        super().__init__(root)
+        self.files = list()
+
+    def write_bytes(self, file_name: str, data: bytes):
+        self.paths.append(self.get_rel_name(file_name))
+        self.files.append((file_name, data))
+
+    def pop_output(self) -> tuple[Counter, list[tuple[str, bytes]]]:
+        # Счетчики считаются при записи файлов в основном процессе
+        files = self.files
+        self.files = list()
+        return Counter(), files
+
+
+class ArchiveSink(OutputSink):
+    """
+    Вывод всех файлов запуска в один архив (zip, tar, tar.gz) за один проход, без промежуточных файлов.
+    Структура каталогов в архиве та же, что и в каталоге root.
+    Архив записывается во временный файл, который переименовывается в close
+    """
+    # Имя файла архива
+    archive_name: str
+    is_incremental: bool = False
+
+    _tmp_name: str
+    _archive: zipfile.ZipFile | tarfile.TarFile
+    _mtime: float
+    _names: set[str]
+
+    def __init__(self, root: str, out_format: str, write_threads: int = 0):
+        # Архив записывается одним потоком
+        super().__init__(root, min(write_threads, 1))
+        self.archive_name = os.path.normpath(root) + OUT_FORMATS[out_format]
+        self._tmp_name = self.archive_name + '.tmp'
+        self._mtime = time.time()
+        self._names = set()
+
+        os.makedirs(os.path.dirname(self.archive_name) or '.', exist_ok=True)
+        if out_format == 'zip':
+            self._archive = zipfile.ZipFile(self._tmp_name, 'w', compression=zipfile.ZIP_DEFLATED)
+        else:
+            self._archive = tarfile.open(self._tmp_name, 'w:gz' if out_format == 'tar.gz' else 'w')
+
+    def _write_bytes(self, file_name: str, data: bytes):
+        # Имя файла в архиве - путь относительно root с разделителем "/"
+        arc_name: str = self.get_rel_name(file_name)
+        if arc_name in self._names:
+            # Файл уже записан (например, общий для нескольких потоков), архив не допускает замену
+            self._count('unchanged')
+            return
+        self._names.add(arc_name)
+
+        if isinstance(self._archive, zipfile.ZipFile):
+            self._archive.writestr(arc_name, data)
+        else:
+            info = tarfile.TarInfo(arc_name)
+            info.size = len(data)
+            info.mtime = self._mtime
+            self._archive.addfile(info, io.BytesIO(data))
+        self._count('new')
+
+    def get_worker_sink(self) -> OutputSink:
+        # Процессы-исполнители передают файлы в основной процесс
+        return BufferSink(self.root)
+
+    def close(self):
+        try:
+            super().close()
+        except BaseException:
+            self.abort()
+            raise
+        self._archive.close()
+        os.replace(self._tmp_name, self.archive_name)
+
+    def abort(self):
+        """
+        Прерывание вывода: временный файл архива удаляется
+        """
+        super().abort()
+        self._archive.close()
+        if os.path.isfile(self._tmp_name):
+            os.remove(self._tmp_name)
+
+    def report(self):
+        logging.info(f"Архив: {self.archive_name}, файлов - {self.stats['new']}")
+
+
+class MemorySink(OutputSink):
+    """
+    Вывод файлов в память (без обращения к диску): словарь "путь относительно root" - содержимое файла.
+    Перевод строки в содержимом - "\\n"
+    """
+    # Файлы: путь относительно root с разделителем "/" - содержимое
+    files: dict[str, str]
+    is_incremental: bool = False
+
+    def __init__(self, root: str = ''):
+        super().__init__(root)
+        self.files = dict()
+
+    def write_text(self, file_name: str, output: str):
+        rel_name: str = self.get_rel_name(file_name)
+        self.paths.append(rel_name)
+        self.stats['written' if rel_name in self.files else 'new'] += 1
+        self.files[rel_name] = output
+
+    def write_bytes(self, file_name: str, data: bytes):
+        self.write_text(file_name, data.decode('utf-8'))
+
+    def get_worker_sink(self) -> OutputSink:
+        return MemorySink(self.root)
+
+    def pop_output(self) -> tuple[Counter, list[tuple[str, bytes]]]:
+        # Счетчики считаются при добавлении файлов в основном процессе
+        files = [(os.path.join(self.root, rel_name), output.encode('utf-8'))
+                 for rel_name, output in self.files.items()]
+        self.files = dict()
+        self.stats = Counter()
+        return Counter(), files
+
+    def report(self):
+        logging.info(f"Файлы в памяти: {len(self.files)}")
+
+
+def create_sink(root: str, out_format: str = 'dir', write_threads: int = 0) -> OutputSink:
+    """
+    Создает объект вывода файлов
+
+    Args:
+        root: Каталог вывода. Для архива - имя архива без расширения
+        out_format: Формат вывода (dir, zip, tar, tar.gz)
+        write_threads: Количество потоков записи. 0 - файлы записываются сразу (для архива - не больше 1)
+    """
+    if out_format not in OUT_FORMATS:
+        raise ValueError(f"Неизвестный формат вывода '{out_format}'. Допустимые значения: {', '.join(OUT_FORMATS)}")
+
+    if OUT_FORMATS[out_format]:
+        return ArchiveSink(root, out_format, write_threads)
+    return OutputSink(root, write_threads)
@@ -0,0 +1,102 @@
+import threading
+import time
+from dataclasses import dataclass, field
+
+from core.exceptions import GenerationCancelledException
+
+
+class RunProgress:
+    """
+    Ход запуска генератора: количество целевых таблиц, обработанные таблицы, текущий этап, прерывание.
+    Изменяется потоком формирования, читается потоком диалога (get_state)
+    """
+    # Количество целевых таблиц
+    total: int
+    # Количество обработанных таблиц
+    done: int
+    # Текущий этап/целевая таблица
+    current: str
+    # Время начала запуска (time.perf_counter)
+    started: float
+
+    def __init__(self):
+        self.total = 0
+        self.done = 0
+        self.current = ''
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+
+    def step(self, current: str):
+        """
+        Начало этапа/формирования целевой таблицы
+        """
+        with self._lock:
+            self.current = current
+
+    def start_tables(self, total: int):
+        """
+        Начало формирования файлов потоков
+        """
+        with self._lock:
+            self.total = total
+            self.done = 0
+
+    def table_done(self, tgt_table: str):
+        """
+        Файлы потока целевой таблицы сформированы
+        """
+        with self._lock:
+            self.done += 1
+            self.current = tgt_table
+
+    def get_state(self) -> tuple[int, int, str, float]:
+        """
+        Returns: (обработано таблиц, всего таблиц, текущий этап/таблица, время с начала запуска, с)
+        """
+        with self._lock:
+            return self.done, self.total, self.current, time.perf_counter() - self.started
+
+    def cancel(self):
+        """
+        Запрос на прерывание. Запуск прерывается перед формированием следующей целевой таблицы
+        """
+        self._cancel.set()
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def check(self):
+        """
+        Прерывает запуск (GenerationCancelledException), если был запрос на прерывание
+        """
+        if self._cancel.is_set():
+            raise GenerationCancelledException(f"Формирование прервано, обработано таблиц: {self.done} из {self.total}")
+
+
+@dataclass
+class TableResult:
+    """
+    Результат формирования файлов потока одной целевой таблицы (см. map_gen.iter_tables)
+    """
+    # Имя целевой таблицы
+    tgt_table: str
+    # Порядковый номер таблицы (с 0)
+    index: int
+    # Количество целевых таблиц запуска
+    total: int
+    # done - файлы сформированы, unchanged - данные не изменились (инкрементальное формирование),
+    # partial - данные не изменились, сформированы только файлы измененных шаблонов,
+    # skipped - поток не соответствует wf_templates_list, error - ошибка в данных EXCEL
+    status: str
+    # Признак предупреждения (см. Config.is_warning)
+    is_warning: bool = False
+    # Предупреждения и ошибки из журнала
+    warnings: list[str] = field(default_factory=list)
+    # Сформированные файлы: путь относительно каталога вывода с разделителем "/"
+    paths: list[str] = field(default_factory=list)
+    # Замеры времени (см. RunMetrics.tables): seconds, context, export - время, с; size - размер файлов, символов
+    metrics: dict = field(default_factory=dict)
+    # Ошибка в данных EXCEL (status == 'error')
+    error: Exception | None = None
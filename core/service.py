@@ -0,0 +1,273 @@
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import Counter
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from jinja2 import TemplateError
+
+from core.config import Config as Conf
+from core.exceptions import IncorrectMappingException
+from core.output import OUT_FORMATS
+
+# Адрес и порт сервиса по умолчанию
+SERVICE_HOST: str = '127.0.0.1'
+SERVICE_PORT: int = 8780
+# Максимальный размер EXCEL-файла в запросе, байт
+MAX_UPLOAD_SIZE: int = 100 * 1024 * 1024
+# Максимальное количество запросов на формирование (выполняемый и ожидающие). Следующие запросы отклоняются (503)
+MAX_QUEUE: int = 8
+
+# Допустимые расширения EXCEL-файла
+EXCEL_EXTENSIONS: list[str] = ['.xlsx', '.xlsm', '.xls', '.ods']
+# Тип содержимого ответа по формату архива
+ARCHIVE_CONTENT_TYPES: dict[str, str] = {'zip': 'application/zip', 'tar': 'application/x-tar',
+                                         'tar.gz': 'application/gzip'}
+
+
+class ServiceError(Exception):
+    """
+    Ошибка в параметрах запроса (код ответа status)
+    """
+    status: HTTPStatus
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class GenerationService:
+    """
+    Сервис формирования файлов потоков: EXCEL-файл из запроса формируется через mapping_generator,
+    результат возвращается одним архивом.
+    Конфигурация и скомпилированные шаблоны загружаются один раз при запуске сервиса.
+    Запросы принимаются параллельно, формирование выполняется по одному запросу (журнал, Config.is_warning
+    и замеры запуска общие для процесса), остальные запросы ожидают. Параллельность внутри запроса - workers
+    """
+    author: str
+    load_mode: str
+    workers: int | None
+    max_queue: int
+    started: float
+
+    # Счетчики запросов на формирование: total, done, warnings, errors, rejected
+    stats: Counter
+    # Количество запросов на формирование (выполняемый и ожидающие)
+    active: int
+    # Время формирования, с: последнего запроса и суммарное
+    last_seconds: float
+    total_seconds: float
+
+    def __init__(self, author: str, load_mode: str, workers: int | None = None, max_queue: int = MAX_QUEUE):
+        self.author = author
+        self.load_mode = load_mode
+        self.workers = workers
+        self.max_queue = max_queue
+        self.started = time.time()
+        self.stats = Counter()
+        self.active = 0
+        self.last_seconds = 0.0
+        self.total_seconds = 0.0
+        self._lock = threading.Lock()
+        self._generate_lock = threading.Lock()
+
+    def _count(self, key: str, seconds: float | None = None):
+        with self._lock:
+            self.stats[key] += 1
+            if seconds is not None:
+                self.last_seconds = seconds
+                self.total_seconds += seconds
+
+    def generate(self, file_data: bytes, file_name: str, params: dict[str, str]) -> tuple[bytes, str, bool]:
+        """
+        Формирование файлов потоков по EXCEL-файлу из запроса
+
+        Args:
+            file_data: Содержимое EXCEL-файла
+            file_name: Имя EXCEL-файла (используется для имени архива)
+            params: Параметры запроса: author, load_mode, format (zip, tar, tar.gz)
+
+        Returns: (содержимое архива, имя архива, признак предупреждения - см. Config.is_warning)
+        """
+        self._count('total')
+        out_format: str = params.get('format', 'zip')
+        if out_format not in ARCHIVE_CONTENT_TYPES:
+            raise ServiceError(HTTPStatus.BAD_REQUEST, f"Неизвестный формат архива '{out_format}'. "
+                                                       f"Допустимые значения: {', '.join(ARCHIVE_CONTENT_TYPES)}")
+        load_mode: str = params.get('load_mode', self.load_mode)
+        if load_mode != 'increment':
+            raise ServiceError(HTTPStatus.BAD_REQUEST, f"Неизвестный принцип загрузки '{load_mode}'")
+        author: str = params.get('author', self.author)
+
+        base_name, ext = os.path.splitext(os.path.basename(file_name))
+        if ext.lower() not in EXCEL_EXTENSIONS:
+            raise ServiceError(HTTPStatus.BAD_REQUEST, f"Недопустимое расширение файла '{file_name}'. "
+                                                       f"Допустимые значения: {', '.join(EXCEL_EXTENSIONS)}")
+        base_name = re.sub(r'[^\w.-]', '_', base_name) or 'mapping'
+
+        with self._lock:
+            if self.active >= self.max_queue:
+                self.stats['rejected'] += 1
+                raise ServiceError(HTTPStatus.SERVICE_UNAVAILABLE,
+                                   f"Сервис занят, запросов в очереди: {self.active}")
+            self.active += 1
+
+        # Импорт при первом запросе (pandas, библиотеки чтения EXCEL), см. warm_up
+        from core.map_gen import mapping_generator
+
+        try:
+            with tempfile.TemporaryDirectory(prefix='ceh-rdv-service-') as work_path:
+                excel_file: str = os.path.join(work_path, base_name + ext.lower())
+                with open(excel_file, 'wb') as f:
+                    f.write(file_data)
+                out_path: str = os.path.join(work_path, base_name)
+
+                with self._generate_lock:
+                    logging.info('')
+                    logging.info(f'Запрос на формирование: {file_name}, автор: {author}, формат: {out_format}')
+                    start: float = time.perf_counter()
+                    try:
+                        mapping_generator(file_path=excel_file, out_path=out_path, load_mode=load_mode,
+                                          env=Conf.env, author=author, workers=self.workers, out_format=out_format)
+                    except Exception:
+                        self._count('errors', time.perf_counter() - start)
+                        raise
+                    is_warning: bool = Conf.is_warning
+                    self._count('warnings' if is_warning else 'done', time.perf_counter() - start)
+
+                archive_name: str = out_path + OUT_FORMATS[out_format]
+                with open(archive_name, 'rb') as f:
+                    return f.read(), os.path.basename(archive_name), is_warning
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    def get_health(self) -> dict:
+        """
+        Состояние сервиса и счетчики запросов
+        """
+        with self._lock:
+            generated: int = self.stats['done'] + self.stats['warnings'] + self.stats['errors']
+            return {
+                'status': 'ok',
+                'uptime': round(time.time() - self.started, 3),
+                'config': Conf.config_file,
+                'templates_path': Conf.templates_path,
+                'templates': len(Conf.templates),
+                'active': self.active,
+                'max_queue': self.max_queue,
+                'requests': dict(self.stats),
+                'last_seconds': round(self.last_seconds, 3),
+                'avg_seconds': round(self.total_seconds / generated, 3) if generated else 0.0
+            }
+
+    @staticmethod
+    def warm_up():
+        """
+        Загрузка модулей формирования до первого запроса
+        """
+        import core.map_gen  # noqa: F401
+
+
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+    """
+    Обработка запросов:
+     * GET /health - состояние сервиса и счетчики запросов (JSON);
+     * POST /generate?name=<EXCEL-файл>&author=...&load_mode=...&format=zip|tar|tar.gz - содержимое EXCEL-файла
+       в теле запроса, ответ - архив файлов потоков. Ошибка - JSON {"error": "..."}
+    """
+    server: 'GenerationServer'
+    protocol_version = 'HTTP/1.1'
+
+    def _send(self, status: HTTPStatus, body: bytes, content_type: str, headers: dict[str, str] | None = None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or dict()).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: HTTPStatus, data: dict):
+        self._send(status, json.dumps(data, ensure_ascii=False).encode('utf-8'), 'application/json; charset=utf-8')
+
+    def do_GET(self):
+        if urlsplit(self.path).path == '/health':
+            self._send_json(HTTPStatus.OK, self.server.service.get_health())
+        else:
+            self._send_json(HTTPStatus.NOT_FOUND, {'error': f'Неизвестный адрес {self.path}'})
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path != '/generate':
+            self.close_connection = True
+            self._send_json(HTTPStatus.NOT_FOUND, {'error': f'Неизвестный адрес {self.path}'})
+            return
+
+        service: GenerationService = self.server.service
+        params: dict[str, str] = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        try:
+            size: int = int(self.headers.get('Content-Length', 0))
+            if size <= 0:
+                raise ServiceError(HTTPStatus.LENGTH_REQUIRED, 'В запросе нет EXCEL-файла')
+            if size > MAX_UPLOAD_SIZE:
+                self.close_connection = True
+                raise ServiceError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                   f'Размер файла больше {MAX_UPLOAD_SIZE} байт')
+            file_data: bytes = self.rfile.read(size)
+            output, archive_name, is_warning = service.generate(file_data, params.get('name', 'mapping.xlsx'),
+                                                                 params)
+
+        except ServiceError as err:
+            self._send_json(err.status, {'error': str(err)})
+        except (IncorrectMappingException, ValueError) as err:
+            self._send_json(HTTPStatus.UNPROCESSABLE_ENTITY, {'error': f'Ошибка в данных EXCEL: {err}'})
+        except TemplateError as err:
+            logging.exception('Ошибка шаблона')
+            self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {'error': f'Ошибка шаблона: {err}'})
+        except Exception as err:
+            logging.exception('Ошибка формирования файлов потоков')
+            self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {'error': f'Ошибка формирования: {err}'})
+        else:
+            self._send(HTTPStatus.OK, output, ARCHIVE_CONTENT_TYPES[params.get('format', 'zip')],
+                       {'Content-Disposition': f'attachment; filename="{archive_name}"',
+                        'X-Generator-Warning': str(is_warning).lower()})
+
+    def log_message(self, format, *args):
+        logging.info(f'{self.address_string()} {format % args}')
+
+
+class GenerationServer(ThreadingHTTPServer):
+    """
+    HTTP-сервер: каждый запрос обрабатывается в отдельном потоке
+    """
+    daemon_threads = True
+    service: GenerationService
+
+    def __init__(self, address: tuple[str, int], service: GenerationService):
+        super().__init__(address, ServiceRequestHandler)
+        self.service = service
+
+
+def run_service(host: str, port: int, author: str, load_mode: str, workers: int | None = None,
+                max_queue: int = MAX_QUEUE):
+    """
+    Запуск сервиса формирования до прерывания (Ctrl+C)
+    """
+    service = GenerationService(author=author, load_mode=load_mode, workers=workers, max_queue=max_queue)
+    service.warm_up()
+
+    with GenerationServer((host, port), service) as server:
+        address: str = f"http://{server.server_address[0]}:{server.server_address[1]}"
+        logging.info(f'Сервис формирования: {address}')
+        print(f"Сервис формирования: {address} (POST /generate, GET /health), завершение - Ctrl+C")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("Сервис завершен")
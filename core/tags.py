@@ -0,0 +1,41 @@
+from jinja2 import Template
+
+
+class TagsRenderer:
+    """
+    Формирование строк секции tags по шаблону из файла конфигурации (секции tags/resource_tags).
+    Шаблоны строк компилируются один раз, при создании объекта
+    """
+    # Скомпилированные шаблоны строк: (шаблон ключа, шаблон значения). Для строк без ключа - (None, шаблон)
+    _tags: list[tuple[Template | None, Template]]
+
+    def __init__(self, tags_tmpl):
+        """
+        Args:
+            tags_tmpl: Шаблон секции tags - список строк и/или словарей из одной пары ключ: значение
+        """
+        self._tags = list()
+        for tag in tags_tmpl or list():
+            if type(tag) is str:
+                self._tags.append((None, Template(tag)))
+            elif type(tag) is dict:
+                key = list(tag.keys())[0]
+                val = list(tag.values())[0]
+                self._tags.append((Template(str(key)), Template(str(val))))
+
+    def render(self, tags_val: dict) -> list[str]:
+        """
+        Args:
+            tags_val: Данные для формирования результата
+
+        Returns: Список строк для вставки в секцию tags
+        """
+        ret_tags: list[str] = list()
+        for key_tmpl, val_tmpl in self._tags:
+            val: str = val_tmpl.render(tags=tags_val)
+            if key_tmpl is None:
+                ret_tags.append(f"\"{val}\"")
+            else:
+                ret_tags.append(f"\"{key_tmpl.render(tags=tags_val)}:{val}\"")
+
+        return ret_tags
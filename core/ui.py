@@ -1,4 +1,5 @@
 import os
+import threading
 import tkinter as tk
 from tkinter import ttk, SOLID
 from tkinter.messagebox import showinfo, showerror, showwarning
@@ -8,9 +9,12 @@ from tkinter.ttk import Scrollbar
 
 from jinja2 import TemplateNotFound
 
-from core.map_gen import mapping_generator
 import core.exceptions as exp
 from core.config import Config as Conf
+from core.progress import RunProgress
+
+# Период опроса хода формирования, мс
+PROGRESS_POLL_MS: int = 100
 
 
 class MainWindow(tk.Tk):
@@ -27,8 +31,17 @@ class MainWindow(tk.Tk):
 
         self.env = Conf.env
 
+        # Формирование файлов выполняется в отдельном потоке, диалог опрашивает его ход (см. _check_export)
+        self._export_thread: threading.Thread | None = None
+        self._progress: RunProgress | None = None
+        # Результат формирования: (функция сообщения, заголовок, текст)
+        self._export_result: tuple | None = None
+        # Закрыть окно после завершения формирования
+        self._close_requested: bool = False
+
         self.wm_title("Генератор файлов описания потока")
-        self.geometry("500x500")
+        self.geometry("500x560")
+        self.protocol("WM_DELETE_WINDOW", self._close)
 
         frame = tk.Frame(
             self,       # Обязательный параметр, который указывает окно для размещения Frame.
@@ -94,12 +107,12 @@ class MainWindow(tk.Tk):
         frame_key.columnconfigure(1, weight=1)
         frame_key.columnconfigure(2, weight=1)
 
-        start_export_button = tk.Button(
+        self.start_export_button = tk.Button(
             frame_key,
             text="Формировать",
             command=self._export_mapping
         )
-        start_export_button.grid(row=0, column=0, sticky=tk.E, padx=10)
+        self.start_export_button.grid(row=0, column=0, sticky=tk.E, padx=10)
 
         view_log_button = tk.Button(
             frame_key,
@@ -111,10 +124,30 @@ class MainWindow(tk.Tk):
         exit_button = tk.Button(
             frame_key,
             text="Завершить",
-            command=self.destroy
+            command=self._close
         )
         exit_button.grid(row=0, column=2, sticky=tk.E, padx=10)
 
+        # Ход формирования: индикатор, текущая таблица и время, кнопка прерывания
+        frame_progress = tk.Frame(frame, padx=5, pady=5, borderwidth=0, relief=SOLID)
+        frame_progress.pack(anchor='nw', fill='both', padx=5, pady=5)
+        frame_progress.columnconfigure(0, weight=1)
+
+        self.progress_bar = ttk.Progressbar(frame_progress, mode='determinate')
+        self.progress_bar.grid(row=0, column=0, sticky=tk.EW, padx=10)
+
+        self.cancel_button = tk.Button(
+            frame_progress,
+            text="Прервать",
+            command=self._cancel_export,
+            state=tk.DISABLED
+        )
+        self.cancel_button.grid(row=0, column=1, sticky=tk.E, padx=10)
+
+        self.progress_text = tk.StringVar(value='')
+        label_progress = ttk.Label(frame_progress, textvariable=self.progress_text, font=("Arial", 9))
+        label_progress.grid(row=1, column=0, columnspan=2, sticky=tk.W, padx=10, pady=5)
+
     def _setup_file_path(self):
         self.file_path.set(filedialog.askopenfilename())
 
@@ -128,7 +161,8 @@ class MainWindow(tk.Tk):
         os.system(log_cmd)
 
     def _export_mapping(self):
-        msg: str
+        if self._export_thread:
+            return
 
         if not self.file_path.get():
             showerror("Ошибка", "EXCEL-файл с описанием данных не выбран")
@@ -142,42 +176,115 @@ class MainWindow(tk.Tk):
                 self.author.get(),
                 )):
             showerror("Ошибка", "Проверьте заполнение полей формы")
+            return
+
+        # Переменные tkinter читаются только в основном потоке
+        params: dict = dict(
+            file_path=self.file_path.get(),
+            out_path=os.path.abspath(self.out_path.get()),
+            # source_system=self.source_system.get(),
+            load_mode=self.load_mode.get(),
+            env=self.env,
+            author=self.author.get()
+        )
+
+        self._progress = RunProgress()
+        self._export_result = None
+        self._export_thread = threading.Thread(target=self._run_export, args=(params,), daemon=True)
+
+        self.start_export_button.configure(state=tk.DISABLED)
+        self.cancel_button.configure(state=tk.NORMAL)
+        self.progress_bar.configure(value=0, maximum=1)
+
+        self._export_thread.start()
+        self.after(PROGRESS_POLL_MS, self._check_export)
+
+    def _run_export(self, params: dict):
+        """
+        Формирование файлов потоков (выполняется в отдельном потоке, к элементам окна не обращается)
+        """
+        msg: str
+        try:
+
+            logging.info('Формирование файлов описания потоков ...')
+
+            # pandas и библиотеки чтения EXCEL загружаются при первом формировании, а не при запуске программы
+            from core.map_gen import mapping_generator
+
+            mapping_generator(progress=self._progress, **params)
+
+            if Conf.is_warning:
+                msg = ("Файлы потоков сформированы.\n"
+                       "Прочитайте предупреждения (warning) "
+                       "в журнале работы программы!")
+                self._export_result = (showwarning, "Предупреждение", msg)
+                logging.info("Файлы потоков сформированы с 'предупреждениями'")
+            else:
+                msg = "Файлы потоков сформированы"
+                self._export_result = (showinfo, "Успешно", msg)
+                logging.info(msg)
+
+        except exp.GenerationCancelledException as err:
+            logging.warning(err)
+            self._export_result = (showwarning, "Прервано", str(err))
+
+        except (exp.IncorrectMappingException, ValueError) as err:
+            logging.error(err)
+            msg = f"Ошибка: {err}.\nПроверьте журнал работы программы."
+            self._export_result = (showerror, "Ошибка", msg)
+
+        except TemplateNotFound:
+            msg = "Ошибка чтения шаблона.\nПроверьте журнал работы программы."
+            logging.exception("Ошибка чтения шаблона")
+            self._export_result = (showerror, "Ошибка", msg)
+
+        except OSError as err:
+            msg = f"Ошибка записи файлов: {err}.\nПроверьте журнал работы программы."
+            logging.exception("Ошибка записи файлов")
+            self._export_result = (showerror, "Ошибка", msg)
+
+        except Exception:
+            msg = "Неизвестная ошибка.\nПроверьте журнал работы программы."
+            logging.exception("Неизвестная ошибка")
+            self._export_result = (showerror, "Ошибка", msg)
+
+    def _check_export(self):
+        """
+        Отображение хода формирования. После завершения потока формирования выводится результат
+        """
+        done, total, current, elapsed = self._progress.get_state()
+        self.progress_bar.configure(value=done, maximum=max(total, 1))
+        counter: str = f'{done}/{total}  ' if total else ''
+        cancelled: str = '  прерывание ...' if self._progress.is_cancelled else ''
+        self.progress_text.set(f'{counter}{current}  ({elapsed:.0f} с){cancelled}')
+
+        if self._export_thread.is_alive():
+            self.after(PROGRESS_POLL_MS, self._check_export)
+            return
+
+        self._export_thread = None
+        self.start_export_button.configure(state=tk.NORMAL)
+        self.cancel_button.configure(state=tk.DISABLED)
+
+        if self._close_requested:
+            self.destroy()
+            return
+
+        if self._export_result:
+            show_message, title, msg = self._export_result
+            show_message(title=title, message=msg)
+
+    def _cancel_export(self):
+        if self._progress:
+            self._progress.cancel()
+            self.cancel_button.configure(state=tk.DISABLED)
+
+    def _close(self):
+        """
+        Закрытие окна. Если идет формирование, то оно прерывается, окно закрывается после его завершения
+        """
+        if self._export_thread:
+            self._close_requested = True
+            self._cancel_export()
         else:
-            try:
-
-                logging.info('Формирование файлов описания потоков ...')
-
-                mapping_generator(
-                    file_path=self.file_path.get(),
-                    out_path=os.path.abspath(self.out_path.get()),
-                    # source_system=self.source_system.get(),
-                    load_mode=self.load_mode.get(),
-                    env=self.env,
-                    author=self.author.get()
-                )
-
-                if Conf.is_warning:
-                    msg = ("Файлы потоков сформированы.\n"
-                           "Прочитайте предупреждения (warning) "
-                           "в журнале работы программы!")
-                    showwarning("Предупреждение", msg)
-                    logging.info("Файлы потоков сформированы с 'предупреждениями'")
-                else:
-                    msg = "Файлы потоков сформированы"
-                    showinfo("Успешно", msg)
-                    logging.info(msg)
-
-            except (exp.IncorrectMappingException, ValueError) as err:
-                logging.error(err)
-                msg = f"Ошибка: {err}.\nПроверьте журнал работы программы."
-                showerror(title="Ошибка", message=msg)
-
-            except TemplateNotFound:
-                msg = "Ошибка чтения шаблона.\nПроверьте журнал работы программы."
-                logging.exception("Ошибка чтения шаблона")
-                showerror(title="Ошибка", message=msg)
-
-            # except Exception:
-            #     msg = "Неизвестная ошибка.\nПроверьте журнал работы программы."
-            #     logging.exception("Неизвестная ошибка")
-            #     showerror(title="Ошибка", message=msg)
+            self.destroy()
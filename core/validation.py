@@ -0,0 +1,223 @@
+import logging
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from core.config import Config
+
+
+@dataclass
+class MappingIssue:
+    """
+    Замечание, найденное при проверке данных листа 'Детали загрузок Src-RDV'
+    """
+    # Раздел проверки: 'src' - атрибуты таблицы-источника, 'tgt' - атрибуты целевой таблицы
+    section: str
+    # Уровень сообщения: logging.ERROR/logging.WARNING
+    level: int
+    # Строки сообщения для вывода в журнал
+    lines: list[str] = field(default_factory=list)
+
+
+def _frame_lines(df: pd.DataFrame) -> list[str]:
+    """
+    Строки для вывода фрагмента данных в журнал. Колонка tgt_table не выводится
+    """
+    return str(df.drop(columns='tgt_table')).splitlines()
+
+
+class _IssueCollector:
+    """
+    Замечания, сгруппированные по целевым таблицам, в порядке выполнения проверок
+    """
+    issues: dict[str, list[MappingIssue]]
+
+    def __init__(self):
+        self.issues = dict()
+
+    def add(self, tgt_table: str, section: str, level: int, lines: list[str]):
+        self.issues.setdefault(tgt_table, list()).append(MappingIssue(section=section, level=level, lines=lines))
+
+    def add_rows(self, err_rows: pd.DataFrame, section: str, level: int, header, footer=None):
+        """
+        Добавляет замечание для каждой целевой таблицы, строки которой присутствуют в err_rows
+
+        Args:
+            err_rows: Строки с ошибками (все таблицы)
+            section: Раздел проверки
+            level: Уровень сообщения
+            header: Ф-ия, возвращающая заголовок сообщения по имени таблицы
+            footer: Ф-ия, возвращающая окончание сообщения по имени таблицы
+        """
+        for tgt_table, rows in err_rows.groupby('tgt_table', sort=False):
+            lines: list[str] = header(tgt_table) + _frame_lines(rows)
+            if footer:
+                lines += footer(tgt_table)
+            self.add(tgt_table=tgt_table, section=section, level=level, lines=lines)
+
+    def add_names(self, err_rows: pd.DataFrame, column: str, section: str, header):
+        """
+        Добавляет замечание со списком имен полей для каждой целевой таблицы, строки которой присутствуют в err_rows
+        """
+        for tgt_table, rows in err_rows.groupby('tgt_table', sort=False):
+            self.add(tgt_table=tgt_table, section=section, level=logging.ERROR,
+                     lines=header(tgt_table) + rows[column].tolist())
+
+    def add_predefined(self, attrs: pd.DataFrame, column: str, fld_name: str, tables, section: str,
+                       is_wrong, missing_msg, multiple_msg, wrong_msg):
+        """
+        Проверка обязательного атрибута fld_name для всех таблиц: атрибут должен присутствовать один раз
+        и иметь заданные параметры
+
+        Args:
+            attrs: Атрибуты (все таблицы)
+            column: Колонка с именем атрибута
+            fld_name: Имя обязательного атрибута
+            tables: Список всех целевых таблиц
+            section: Раздел проверки
+            is_wrong: Ф-ия, возвращающая признак неверных параметров атрибута (Series)
+            missing_msg, multiple_msg, wrong_msg: Ф-ии, возвращающие текст сообщения по имени таблицы
+        """
+        rows: pd.DataFrame = attrs[attrs[column] == fld_name]
+        counts: pd.Series = rows.groupby('tgt_table', sort=False).size()
+
+        for tgt_table in tables:
+            count: int = counts.get(tgt_table, 0)
+            if count == 0:
+                self.add(tgt_table=tgt_table, section=section, level=logging.ERROR, lines=[missing_msg(tgt_table)])
+
+        for tgt_table, tbl_rows in rows.groupby('tgt_table', sort=False):
+            if len(tbl_rows) > 1:
+                self.add(tgt_table=tgt_table, section=section, level=logging.ERROR,
+                         lines=[multiple_msg(tgt_table)] + _frame_lines(tbl_rows))
+            elif is_wrong(tbl_rows).iloc[0]:
+                self.add(tgt_table=tgt_table, section=section, level=logging.ERROR,
+                         lines=[wrong_msg(tgt_table)] + _frame_lines(tbl_rows))
+
+
+def validate_mapping(mapping_df: pd.DataFrame) -> dict[str, list[MappingIssue]]:
+    """
+    Проверка атрибутов всех целевых таблиц листа 'Детали загрузок Src-RDV' за один проход по данным:
+    соответствие типов данных, признак null/not null, обязательные атрибуты, названия полей, pk - поля
+
+    Args:
+        mapping_df: Данные листа 'Детали загрузок Src-RDV' (см. MappingMeta)
+
+    Returns: Замечания, сгруппированные по целевым таблицам
+    """
+    collector = _IssueCollector()
+    tables: list[str] = mapping_df['tgt_table'].unique().tolist()
+    field_type_list: dict = Config.field_type_list
+
+    # Атрибуты таблицы - источника ------------------------------------------------------------------------------------
+    src_attr: pd.DataFrame = mapping_df[['tgt_table', 'src_attr', 'src_attr_datatype', 'src_table']] \
+        .dropna(how="any", subset=['src_attr', 'src_attr_datatype', 'src_table'])
+    # Имя таблицы - источника берется из первой строки
+    src_tbl_names: dict = src_attr.drop_duplicates(subset=['tgt_table']).set_index('tgt_table')['src_table'].to_dict()
+    # Удаление дубликатов в списке полей
+    src_attr = src_attr.drop_duplicates(subset=['tgt_table', 'src_attr'])
+
+    # Проверяем соответствие названия полей источника шаблону
+    pattern: str = field_type_list.get('src_attr_name_regexp', r"^[a-zA-Z][a-zA-Z0-9_\\$]*$")
+    collector.add_names(
+        err_rows=src_attr[~src_attr.src_attr.str.match(pattern)], column='src_attr', section='src',
+        header=lambda tbl: [f"Названия полей в таблице - источнике '{src_tbl_names.get(tbl)}' "
+                            f"не соответствуют шаблону '{pattern}'"])
+
+    # Проверяем обязательные поля
+    src_attr_predefined_datatype: dict = field_type_list.get('src_attr_predefined_datatype', dict())
+    for fld_name, fld_params in src_attr_predefined_datatype.items():
+        collector.add_predefined(
+            attrs=src_attr, column='src_attr', fld_name=fld_name, tables=tables, section='src',
+            is_wrong=lambda rows: rows['src_attr_datatype'] != fld_params[0],
+            missing_msg=lambda tbl: f"Не найден обязательный атрибут '{fld_name}' таблицы - источника "
+                                    f"'{src_tbl_names.get(tbl)}'",
+            multiple_msg=lambda tbl: f"Обязательный атрибут '{fld_name}' для таблицы - источника "
+                                     f"'{src_tbl_names.get(tbl)}' указан более одного раза",
+            wrong_msg=lambda tbl: f"Параметры обязательного атрибута '{fld_name}' для целевой таблицы "
+                                  f"'{src_tbl_names.get(tbl)}' указаны неверно")
+
+    # Атрибуты целевой таблицы ----------------------------------------------------------------------------------------
+    src: pd.DataFrame = mapping_df[['tgt_table', 'src_table', 'src_attr', 'src_attr_datatype']] \
+        .dropna(how='all', subset=['src_table', 'src_attr', 'src_attr_datatype'])
+    tgt: pd.DataFrame = mapping_df[['tgt_table', 'tgt_attribute', 'tgt_attr_datatype', 'tgt_attr_mandatory', 'tgt_pk',
+                                    'comment', '_pk', '_rk']].dropna(subset=['tgt_attribute', 'tgt_attr_datatype'])
+
+    # Проверяем соответствие типов данных источника и целевой таблицы ("мягкая" проверка).
+    corresp_datatype = field_type_list.get("corresp_datatype", None)
+    if not corresp_datatype:
+        corresp_datatype = {
+            'string': ['text'],
+            'timestamp': ['timestamp'],
+            'bigint': ['bigint'],
+            'decimal': ['decimal'],
+            'date': ['date']
+        }
+    corresp_pairs: set = {f'{src_type}|{tgt_type}' for src_type, tgt_types in corresp_datatype.items()
+                          for tgt_type in (tgt_types or list())}
+
+    # Удаляем строки для которых не заполнены поля источника и/или целевой таблицы.
+    data_types = mapping_df[['tgt_table', 'src_attr', 'src_attr_datatype', 'tgt_attribute', 'tgt_attr_datatype']] \
+        .dropna(how='any', subset=['src_attr', 'src_attr_datatype', 'tgt_attribute', 'tgt_attr_datatype'])
+    is_corresp = (data_types['src_attr_datatype'] + '|' + data_types['tgt_attr_datatype']).isin(corresp_pairs)
+    # Пара полей _id / _rk для хабов
+    is_hub_pair = ((data_types['src_attr'].str.removesuffix('_id') != '') &
+                   (data_types['tgt_attribute'].str.removesuffix('_rk') != '') &
+                   (data_types['src_attr_datatype'] == 'string') &
+                   (data_types['tgt_attr_datatype'] == 'bigint'))
+    collector.add_rows(
+        err_rows=data_types[~(is_corresp | is_hub_pair)], section='tgt', level=logging.WARNING,
+        header=lambda tbl: ["Типы данных источника полей и целевой таблицы различаются",
+                            "Проверьте корректность заполнения атрибутов"])
+
+    # Проверяем типы данных, заданные для источника. Читаем данные из настроек программы
+    src_attr_datatype: dict = field_type_list.get('src_attr_datatype', dict())
+    src_first: dict = src.drop_duplicates(subset=['tgt_table']).set_index('tgt_table')['src_table'].to_dict()
+    collector.add_rows(
+        err_rows=src[~src['src_attr_datatype'].isin(src_attr_datatype)], section='tgt', level=logging.ERROR,
+        header=lambda tbl: [f"Неверно указаны типы данных источника '{src_first.get(tbl)}':"],
+        footer=lambda tbl: [f'Допустимые типы данных: {src_attr_datatype}'])
+
+    # Проверяем типы данных для целевой таблицы. Читаем данные из настроек программы
+    tgt_attr_datatype: dict = field_type_list.get('tgt_attr_datatype', dict())
+    collector.add_rows(
+        err_rows=tgt[~tgt['tgt_attr_datatype'].isin(tgt_attr_datatype)], section='tgt', level=logging.ERROR,
+        header=lambda tbl: [f"Неверно указаны типы данных в строках для целевой таблицы '{tbl}':"],
+        footer=lambda tbl: [f'Допустимые типы данных: {tgt_attr_datatype}'])
+
+    # Заполняем признак 'Tgt_attr_mandatory'.
+    # При чтении данных Панда заменяет строку 'null' на значение 'nan'
+    tgt = tgt.assign(tgt_attr_mandatory=tgt['tgt_attr_mandatory'].fillna(value="null"),
+                     comment=tgt['comment'].fillna(value=''))
+
+    collector.add_rows(
+        err_rows=tgt[~tgt['tgt_attr_mandatory'].isin(['null', 'not null'])], section='tgt', level=logging.ERROR,
+        header=lambda tbl: [f"Неверно указан признак null/not null для целевой таблицы '{tbl}':"])
+
+    # Проверка: Поля 'pk' должны быть "not null"
+    collector.add_rows(
+        err_rows=tgt[(tgt['_pk'] == 'pk') & (tgt['tgt_attr_mandatory'] != 'not null')], section='tgt',
+        level=logging.ERROR,
+        header=lambda tbl: [f"Неверно указан признак 'Tgt_attr_mandatory' для целевой таблицы '{tbl}':",
+                            "Поля отмеченные как 'pk' должны быть 'not null'"])
+
+    # Проверка полей, тип которых фиксирован
+    tgt_attr_predefined_datatype: dict = field_type_list.get('tgt_attr_predefined_datatype', dict())
+    for fld_name, fld_params in tgt_attr_predefined_datatype.items():
+        collector.add_predefined(
+            attrs=tgt, column='tgt_attribute', fld_name=fld_name, tables=tables, section='tgt',
+            is_wrong=lambda rows: ((rows['tgt_attr_datatype'] != fld_params[0]) |
+                                   (rows['tgt_attr_mandatory'] != fld_params[1])),
+            missing_msg=lambda tbl: f"Не найден обязательный атрибут '{fld_name}' для целевой таблицы '{tbl}'",
+            multiple_msg=lambda tbl: f"Обязательный атрибут '{fld_name}' для целевой таблицы '{tbl}'"
+                                     f" указан более одного раза",
+            wrong_msg=lambda tbl: f"Параметры обязательного атрибута '{fld_name}' для целевой таблицы '{tbl}'"
+                                  f" указаны неверно")
+
+    # Проверяем соответствие названия полей целевой таблицы шаблону
+    pattern: str = field_type_list.get('tgt_attr_name_regexp', r"^[a-zA-Z][a-zA-Z0-9_]*$")
+    collector.add_names(
+        err_rows=tgt[~tgt.tgt_attribute.str.match(pattern).fillna(True)], column='tgt_attribute', section='tgt',
+        header=lambda tbl: [f"Названия полей целевой таблицы '{tbl}' не соответствуют шаблону '{pattern}'"])
+
+    return collector.issues
@@ -0,0 +1,164 @@
+import io
+import logging
+import os
+import time
+from collections import Counter
+
+import yaml
+from jinja2 import TemplateError
+
+from core.config import Config as Conf
+from core.exceptions import IncorrectMappingException
+from core.map_gen import iter_meta_tables
+from core.mapping import MappingMeta
+
+# Период опроса файлов, с
+WATCH_INTERVAL: float = 1.0
+
+# Состояние файла: (время изменения, размер) или None, если файла нет
+FileState = tuple[int, int] | None
+
+
+def _get_file_state(file_name: str) -> FileState:
+    try:
+        stat = os.stat(file_name)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class MappingWatcher:
+    """
+    Режим наблюдения: файлы потоков формируются заново при изменении EXCEL-файла, файла конфигурации или шаблонов.
+    Конфигурация, скомпилированные шаблоны и данные EXCEL хранятся в памяти, заново читается только измененный файл
+    (при изменении файла конфигурации данные EXCEL тоже читаются заново: проверка данных и короткие имена хабов
+    зависят от настроек). Формирование инкрементальное (при выводе в каталог): формируются только таблицы,
+    "отпечаток" которых изменился (данные таблицы в EXCEL, настройки), при изменении шаблонов - только файлы
+    этих шаблонов. Изменения определяются опросом времени изменения и размера файлов
+    """
+    file_path: str
+    out_path: str
+    load_mode: str
+    author: str
+    workers: int | None
+    out_format: str | None
+    interval: float
+
+    # Данные EXCEL последнего чтения
+    mapping_meta: MappingMeta | None
+    # Состояние наблюдаемых файлов
+    _states: dict[str, FileState]
+    # Измененные файлы, обработка которых завершилась ошибкой (обрабатываются при следующем изменении)
+    _pending: set[str]
+
+    def __init__(self, file_path: str, out_path: str, load_mode: str, author: str, workers: int | None = None,
+                 out_format: str | None = None, interval: float = WATCH_INTERVAL):
+        self.file_path = os.path.abspath(file_path)
+        self.out_path = out_path
+        self.load_mode = load_mode
+        self.author = author
+        self.workers = workers
+        self.out_format = out_format
+        self.interval = interval
+        self.mapping_meta = None
+        self._states = dict()
+        self._pending = set()
+
+    def _get_states(self) -> dict[str, FileState]:
+        """
+        Состояние наблюдаемых файлов: EXCEL-файл, файл конфигурации, все файлы каталога шаблонов
+        """
+        file_names: list[str] = [self.file_path, Conf.config_file]
+        for root, dirs, files in os.walk(Conf.templates_path):
+            file_names.extend(os.path.join(root, file_name) for file_name in files)
+        return {file_name: _get_file_state(file_name) for file_name in file_names}
+
+    def _wait_changes(self) -> list[str]:
+        """
+        Ожидание изменения файлов. Изменение считается завершенным, если за период опроса файлы не менялись
+        (EXCEL и редакторы записывают файл не сразу)
+
+        Returns: Список измененных файлов
+        """
+        while True:
+            time.sleep(self.interval)
+            states: dict[str, FileState] = self._get_states()
+            if states == self._states:
+                continue
+
+            while True:
+                time.sleep(self.interval)
+                stable: dict[str, FileState] = self._get_states()
+                if stable == states:
+                    break
+                states = stable
+
+            changed: list[str] = sorted(file_name for file_name in states.keys() | self._states.keys()
+                                        if states.get(file_name) != self._states.get(file_name))
+            self._states = states
+            return changed
+
+    def generate(self, changed: list[str]) -> bool:
+        """
+        Формирование файлов потоков после изменения файлов
+
+        Args:
+            changed: Измененные файлы. Файл конфигурации и шаблоны - конфигурация читается заново,
+                EXCEL-файл и файл конфигурации - данные EXCEL читаются заново
+
+        Returns: True, если файлы сформированы без ошибок
+        """
+        start: float = time.perf_counter()
+        changed = sorted(set(changed) | self._pending)
+        is_config: bool = any(file_name != self.file_path for file_name in changed)
+        try:
+            if is_config:
+                logging.info(f'Повторное чтение конфигурации "{Conf.config_file}"')
+                Conf.load_config(Conf.config_file, keep_log=True)
+                Conf.log_skipped_templates()
+
+            if self.mapping_meta is None or self.file_path in changed or Conf.config_file in changed:
+                logging.info(f'Чтение данных из файла "{self.file_path}"')
+                with open(self.file_path, 'rb') as f:
+                    self.mapping_meta = MappingMeta(io.BytesIO(f.read()))
+
+            counts: Counter = Counter()
+            for result in iter_meta_tables(mapping_metas=[self.mapping_meta], out_path=self.out_path,
+                                           load_mode=self.load_mode, env=Conf.env, author=self.author,
+                                           workers=self.workers, out_format=self.out_format, incremental=True):
+                counts[result.status] += 1
+                if result.error is not None:
+                    print(f"{result.tgt_table}: ошибка: {result.error}")
+                elif result.status in ('done', 'partial'):
+                    print(f"{result.tgt_table}: файлов - {len(result.paths)}")
+
+        except (IncorrectMappingException, TemplateError, yaml.YAMLError, OSError, ValueError) as err:
+            # Программа продолжает работу, файлы будут сформированы после исправления ошибки
+            self._pending = set(changed)
+            logging.exception('Ошибка формирования файлов потоков')
+            print(f"Ошибка: {err}. Проверьте журнал работы программы.")
+            return False
+
+        self._pending = set()
+        warning: str = " Есть предупреждения (warning) в журнале!" if Conf.is_warning else ""
+        print(f"Сформировано таблиц: {counts['done']}, частично (изменены шаблоны): {counts['partial']}, "
+              f"без изменений: {counts['unchanged']}, "
+              f"ошибок: {counts['error']}, время: {time.perf_counter() - start:.2f} с.{warning}")
+        return not counts['error']
+
+    def run(self):
+        """
+        Формирование файлов потоков и ожидание изменений до прерывания (Ctrl+C)
+        """
+        self._states = self._get_states()
+        print(f"Наблюдение: {self.file_path}, {Conf.config_file}, {Conf.templates_path}")
+        try:
+            self.generate(list())
+            while True:
+                changed: list[str] = self._wait_changes()
+                print()
+                print(f"Изменены файлы: {', '.join(os.path.basename(file_name) for file_name in changed)}")
+                logging.info(f"Изменены файлы: {changed}")
+                self.generate(changed)
+        except KeyboardInterrupt:
+            print("Наблюдение завершено")
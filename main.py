@@ -1,12 +1,159 @@
 import argparse
-import ctypes
 import logging
 import os
 import pathlib
-import tkinter
 
 from core.config import Config
-from core.ui import MainWindow
+from core.output import OUT_FORMATS
+
+
+def _run_gui() -> int:
+    """
+    Запуск программы в режиме диалога
+    """
+    import ctypes
+    import tkinter
+    from core.ui import MainWindow
+
+    win = MainWindow()
+
+    ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID("VTB.ceh.ceh-rdv-generator.1_0")
+    resource_path = os.path.join(pathlib.Path(__file__).parent.resolve(), 'res')
+    win.iconbitmap(os.path.join(resource_path, "ceh-icon.ico"))
+    image = tkinter.PhotoImage(file=os.path.join(resource_path, "ceh-icon.png"))
+    win.iconphoto(True, image)
+
+    win.mainloop()
+    return 0
+
+
+def _run_generate(args: argparse.Namespace) -> int:
+    """
+    Формирование файлов потоков без диалога (команды generate, batch).
+    Результат каждой целевой таблицы выводится по мере формирования, формирование прерывается
+    после max_errors таблиц с ошибками.
+    Код возврата: 0 - файлы сформированы, 1 - ошибка в данных EXCEL, 2 - ошибка чтения шаблона,
+    3 - ошибка записи файлов
+    """
+    from contextlib import closing
+    from jinja2 import TemplateNotFound
+    from core.exceptions import IncorrectMappingException
+    from core.map_gen import iter_tables, get_batch_files
+
+    out_path: str = os.path.abspath(args.out or Config.config.get('out_path', '999'))
+    author: str = args.author or Config.config.get('author', 'Unknown Author')
+
+    errors: int = 0
+    try:
+        logging.info('Формирование файлов описания потоков ...')
+
+        if args.command == "batch":
+            file_paths: list[str] = get_batch_files(args.path)
+
+        else:
+            file_path: str = args.file or Config.excel_file
+            if not file_path:
+                msg = "EXCEL-файл с описанием данных не задан"
+                logging.error(msg)
+                print(f"Ошибка: {msg}")
+                return 1
+            file_paths: list[str] = [file_path]
+
+        with closing(iter_tables(
+            file_paths=file_paths,
+            out_path=out_path,
+            load_mode=args.load_mode,
+            env=Config.env,
+            author=author,
+            workers=args.workers,
+            out_format=args.out_format
+        )) as results:
+            for result in results:
+                seconds: float = result.metrics.get('seconds', 0.0)
+                print(f"[{result.index + 1}/{result.total}] {result.tgt_table}: {result.status}, "
+                      f"файлов - {len(result.paths)}, {seconds:.3f} с")
+                if result.error is not None:
+                    errors += 1
+                    print(f"Ошибка: {result.error}")
+                    if errors >= args.max_errors:
+                        msg = f"Формирование прервано, таблиц с ошибками: {errors}"
+                        logging.error(msg)
+                        print(f"{msg}. Проверьте журнал работы программы.")
+                        return 1
+
+    except (IncorrectMappingException, ValueError) as err:
+        logging.error(err)
+        print(f"Ошибка: {err}. Проверьте журнал работы программы.")
+        return 1
+
+    except TemplateNotFound:
+        logging.exception("Ошибка чтения шаблона")
+        print("Ошибка чтения шаблона. Проверьте журнал работы программы.")
+        return 2
+
+    except OSError as err:
+        logging.exception("Ошибка записи файлов")
+        print(f"Ошибка записи файлов: {err}. Проверьте журнал работы программы.")
+        return 3
+
+    if errors:
+        msg = f"Файлы потоков сформированы, таблиц с ошибками: {errors}"
+        print(f"{msg}. Проверьте журнал работы программы.")
+        logging.error(msg)
+        return 1
+
+    if Config.is_warning:
+        msg = "Файлы потоков сформированы с 'предупреждениями'"
+        print(f"{msg}. Прочитайте предупреждения (warning) в журнале работы программы!")
+    else:
+        msg = "Файлы потоков сформированы"
+        print(msg)
+    logging.info(msg)
+    return 0
+
+
+def _run_watch(args: argparse.Namespace) -> int:
+    """
+    Режим наблюдения (команда watch): файлы потоков формируются заново при изменении EXCEL-файла,
+    файла конфигурации или шаблонов. Завершение - Ctrl+C
+    """
+    from core.watch import MappingWatcher
+
+    file_path: str = args.file or Config.excel_file
+    if not file_path:
+        msg = "EXCEL-файл с описанием данных не задан"
+        logging.error(msg)
+        print(f"Ошибка: {msg}")
+        return 1
+
+    MappingWatcher(
+        file_path=file_path,
+        out_path=os.path.abspath(args.out or Config.config.get('out_path', '999')),
+        load_mode=args.load_mode,
+        author=args.author or Config.config.get('author', 'Unknown Author'),
+        workers=args.workers,
+        out_format=args.out_format,
+        interval=args.interval
+    ).run()
+    return 0
+
+
+def _run_serve(args: argparse.Namespace) -> int:
+    """
+    Сервис формирования (команда serve): HTTP-сервис, который формирует файлы потоков по EXCEL-файлу из запроса
+    и возвращает архив. Конфигурация и шаблоны загружаются один раз. Завершение - Ctrl+C
+    """
+    from core.service import run_service
+
+    run_service(
+        host=args.host,
+        port=args.port,
+        author=args.author or Config.config.get('author', 'Unknown Author'),
+        load_mode=args.load_mode,
+        workers=args.workers,
+        max_queue=args.max_queue
+    )
+    return 0
 
 
 def main() -> int:
@@ -18,6 +165,101 @@ def main() -> int:
         default='generator.yaml',
         help="Файл конфигурации"
     )
+    subparsers = parser.add_subparsers(dest="command")
+
+    # Формирование файлов потоков без диалога
+    generate_parser = subparsers.add_parser("generate", help="Сформировать файлы потоков без диалога")
+    generate_parser.add_argument(
+        "-f", "--file",
+        type=str,
+        help="EXCEL-файл с описанием данных. По умолчанию excel_file из файла конфигурации"
+    )
+
+    # Пакетное формирование файлов потоков по нескольким EXCEL-файлам
+    batch_parser = subparsers.add_parser("batch", help="Сформировать файлы потоков по нескольким EXCEL-файлам")
+    batch_parser.add_argument(
+        "path",
+        type=str,
+        help="Каталог с EXCEL-файлами или шаблон имени файлов, например \"maps/*.xlsx\""
+    )
+
+    # Режим наблюдения: формирование файлов потоков при изменении EXCEL-файла, конфигурации или шаблонов
+    watch_parser = subparsers.add_parser("watch", help="Формировать файлы потоков при изменении EXCEL-файла, "
+                                                       "файла конфигурации или шаблонов")
+    watch_parser.add_argument(
+        "-f", "--file",
+        type=str,
+        help="EXCEL-файл с описанием данных. По умолчанию excel_file из файла конфигурации"
+    )
+    watch_parser.add_argument(
+        "-i", "--interval",
+        type=float,
+        default=1.0,
+        help="Период опроса файлов, с"
+    )
+
+    # Сервис формирования: EXCEL-файл в HTTP-запросе, ответ - архив файлов потоков
+    serve_parser = subparsers.add_parser("serve", help="Запустить HTTP-сервис формирования файлов потоков")
+    serve_parser.add_argument(
+        "-H", "--host",
+        type=str,
+        default="127.0.0.1",
+        help="Адрес сервиса. По умолчанию 127.0.0.1 (только локальные запросы)"
+    )
+    serve_parser.add_argument(
+        "-p", "--port",
+        type=int,
+        default=8780,
+        help="Порт сервиса"
+    )
+    serve_parser.add_argument(
+        "-q", "--max-queue",
+        type=int,
+        default=8,
+        help="Максимальное количество запросов на формирование (выполняемый и ожидающие), "
+             "следующие запросы отклоняются"
+    )
+
+    for command_parser in (generate_parser, batch_parser, watch_parser):
+        command_parser.add_argument(
+            "-o", "--out",
+            type=str,
+            help="Каталог для формирования файлов потоков. По умолчанию out_path из файла конфигурации"
+        )
+        command_parser.add_argument(
+            "-F", "--out-format",
+            type=str,
+            choices=list(OUT_FORMATS),
+            help="Формат вывода: каталог или один архив. По умолчанию out_format из файла конфигурации"
+        )
+
+    for command_parser in (generate_parser, batch_parser, watch_parser, serve_parser):
+        command_parser.add_argument(
+            "-m", "--load-mode",
+            type=str,
+            default="increment",
+            choices=["increment"],
+            help="Принцип загрузки"
+        )
+        command_parser.add_argument(
+            "-a", "--author",
+            type=str,
+            help="Автор потока. По умолчанию author из файла конфигурации"
+        )
+        command_parser.add_argument(
+            "-w", "--workers",
+            type=int,
+            help="Количество процессов. По умолчанию workers из файла конфигурации"
+        )
+
+    for command_parser in (generate_parser, batch_parser):
+        command_parser.add_argument(
+            "-e", "--max-errors",
+            type=int,
+            default=1,
+            help="Прервать формирование после заданного количества целевых таблиц с ошибками в данных EXCEL. "
+                 "По умолчанию 1"
+        )
     args = parser.parse_args()
 
     # Файл настройки программы.
@@ -35,23 +277,24 @@ def main() -> int:
     logging.info(f"config={config_name}")
     logging.info(f"log_file={Config.log_file}")
     logging.info(f'templates_path="{Config.templates_path}"')
+    Config.log_skipped_templates()
 
-    win = MainWindow()
-
-    ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID("VTB.ceh.ceh-rdv-generator.1_0")
-    resource_path = os.path.join(pathlib.Path(__file__).parent.resolve(), 'res')
-    win.iconbitmap(os.path.join(resource_path, "ceh-icon.ico"))
-    image = tkinter.PhotoImage(file=os.path.join(resource_path, "ceh-icon.png"))
-    win.iconphoto(True, image)
-
-    win.mainloop()
+    if args.command in ("generate", "batch"):
+        exit_code = _run_generate(args)
+    elif args.command == "watch":
+        exit_code = _run_watch(args)
+    elif args.command == "serve":
+        exit_code = _run_serve(args)
+    else:
+        exit_code = _run_gui()
 
     logging.info('STOP')
-    return 0
+    return exit_code
 
 
 if __name__ == "__main__":
     exit_code = main()
     exit(exit_code)
-else:
+elif __name__ != "__mp_main__":
+    # Модуль повторно импортируется процессами-исполнителями (параллельный режим) под именем __mp_main__
     exit(100)
@@ -0,0 +1,28 @@
+import pytest
+import yaml
+
+from bench.run import ROOT_PATH
+from core.config import Config
+
+
+@pytest.fixture
+def load_config(tmp_path):
+    """
+    Загрузка конфигурации generator.yaml с шаблонами репозитория, кэшем и журналом во временном каталоге.
+    Параметры конфигурации можно заменить
+    """
+    def load(**params) -> str:
+        with open(ROOT_PATH / 'generator.yaml', 'r', encoding='utf-8') as f:
+            config: dict = yaml.safe_load(f)
+        config['templates'] = str(ROOT_PATH / 'templates.ods')
+        config['cache_path'] = str(tmp_path / 'cache')
+        config['log_file'] = str(tmp_path / 'generator.log')
+        config['workers'] = 1
+        config.update(params)
+        config_name: str = str(tmp_path / 'generator.yaml')
+        with open(config_name, 'w', encoding='utf-8') as f:
+            yaml.safe_dump(config, f, allow_unicode=True)
+        Config.load_config(config_name)
+        return config_name
+
+    return load
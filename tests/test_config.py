@@ -0,0 +1,29 @@
+import logging
+import os
+import shutil
+
+from bench.run import ROOT_PATH
+from core.config import Config
+
+
+def test_skipped_templates_not_logged_on_load(tmp_path, load_config):
+    """
+    Файлы каталога шаблонов не в кодировке utf-8 пропускаются без вывода в журнал при чтении конфигурации
+    (журнал настраивается после load_config), файлы каталога __pycache__ не компилируются
+    """
+    templates_path: str = str(tmp_path / 'templates')
+    shutil.copytree(ROOT_PATH / 'templates.ods', templates_path)
+    with open(os.path.join(templates_path, 'Thumbs.db'), 'wb') as f:
+        f.write(b'\xff\xfe\x00\x81')
+    os.makedirs(os.path.join(templates_path, '__pycache__'), exist_ok=True)
+    with open(os.path.join(templates_path, '__pycache__', 'wf.cpython-311.pyc'), 'wb') as f:
+        f.write(b'\xff\xfe\x00\x81')
+
+    root_logger = logging.getLogger()
+    handlers: list = list(root_logger.handlers)
+    load_config(templates=templates_path)
+
+    assert root_logger.handlers == handlers
+    assert Config.skipped_templates == ['Thumbs.db']
+    assert Config.templates
+    assert not [name for name in Config.templates if name == 'Thumbs.db' or '__pycache__' in name]
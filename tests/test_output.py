@@ -0,0 +1,112 @@
+import os
+import threading
+
+import pytest
+
+from core.output import OutputSink
+
+
+def _write_files(sink: OutputSink, root: str, count: int = 50, version: int = 0):
+    for index in range(count):
+        sink.write_text(os.path.join(root, f'dir_{index % 5}', f'file_{index}.txt'), f'{index} {version}\n' * index)
+
+
+def _read_files(root: str) -> dict[str, bytes]:
+    files: dict[str, bytes] = dict()
+    for path, dirs, file_names in os.walk(root):
+        for file_name in file_names:
+            full_name: str = os.path.join(path, file_name)
+            with open(full_name, 'rb') as f:
+                files[os.path.relpath(full_name, root)] = f.read()
+    return files
+
+
+@pytest.mark.parametrize('write_threads', [0, 3])
+def test_unchanged_files_not_written(tmp_path, write_threads):
+    """
+    Файл не перезаписывается, если не изменилось содержимое; изменение при том же размере выявляется по хешу
+    """
+    root: str = str(tmp_path)
+    file_name: str = os.path.join(root, 'a', 'file.txt')
+    other_name: str = os.path.join(root, 'a', 'other.txt')
+
+    sink = OutputSink(root, write_threads)
+    sink.write_text(file_name, 'abc')
+    sink.write_text(other_name, 'abc')
+    sink.close()
+    assert sink.stats == {'new': 2}
+    mtime: int = os.stat(file_name).st_mtime_ns
+
+    sink = OutputSink(root, write_threads)
+    sink.write_text(file_name, 'abc')
+    # Тот же размер, другое содержимое
+    sink.write_text(other_name, 'abd')
+    sink.close()
+    assert sink.stats == {'unchanged': 1, 'written': 1}
+    assert os.stat(file_name).st_mtime_ns == mtime
+    with open(other_name, 'r', encoding='utf-8') as f:
+        assert f.read() == 'abd'
+
+
+def test_threads_write_same_files(tmp_path):
+    """
+    Запись потоками дает те же файлы, что и запись сразу, в том числе при повторной записи файла
+    """
+    root_0: str = str(tmp_path / 'sync')
+    root_n: str = str(tmp_path / 'threads')
+    for root, write_threads in ((root_0, 0), (root_n, 4)):
+        sink = OutputSink(root, write_threads)
+        _write_files(sink, root, version=0)
+        _write_files(sink, root, version=1)
+        sink.close()
+        assert sink.stats == {'new': 50, 'written': 49, 'unchanged': 1}
+        assert len(sink.paths) == 100
+
+    files: dict[str, bytes] = _read_files(root_0)
+    assert len(files) == 50
+    assert _read_files(root_n) == files
+
+
+def test_write_error_raised_from_flush(tmp_path):
+    """
+    Ошибка записи потоком передается вызывающему в flush, следующие файлы не записываются
+    """
+    root: str = str(tmp_path)
+    # Файл вместо каталога: создать каталог для файла нельзя
+    with open(os.path.join(root, 'busy'), 'w') as f:
+        f.write('')
+
+    sink = OutputSink(root, 2)
+    sink.write_text(os.path.join(root, 'busy', 'file.txt'), 'abc')
+    with pytest.raises(OSError):
+        sink.flush()
+    # Ошибка передается один раз
+    sink.flush()
+    sink.close()
+    assert not sink.stats
+
+
+def test_abort_drops_pending_files(tmp_path):
+    """
+    При прерывании вывода файлы, ожидающие записи в очередях, не записываются
+    """
+    root: str = str(tmp_path)
+    sink = OutputSink(root, 1)
+    started = threading.Event()
+    release = threading.Event()
+    write_bytes = sink._write_bytes
+
+    def slow_write_bytes(file_name: str, data: bytes):
+        started.set()
+        release.wait(10)
+        write_bytes(file_name, data)
+
+    sink._write_bytes = slow_write_bytes
+    _write_files(sink, root, count=10)
+    # Первый файл записывается, остальные ожидают в очереди
+    assert started.wait(10)
+    threading.Timer(0.2, release.set).start()
+    sink.abort()
+
+    assert sink.stats == {'new': 1}
+    assert list(_read_files(root)) == [os.path.join('dir_0', 'file_0.txt')]
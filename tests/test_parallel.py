@@ -0,0 +1,66 @@
+import multiprocessing
+import os
+
+import pytest
+
+from bench.workbook import make_workbook
+from core.config import Config
+from core.map_gen import mapping_generator, render_mapping
+
+
+def _read_files(path) -> dict[str, bytes]:
+    files: dict[str, bytes] = dict()
+    for root, dirs, file_names in os.walk(path):
+        for file_name in file_names:
+            full_name: str = os.path.join(root, file_name)
+            with open(full_name, 'rb') as f:
+                files[os.path.relpath(full_name, path)] = f.read()
+    return files
+
+
+@pytest.fixture
+def spawn_start_method():
+    """
+    Процессы-исполнители запускаются методом spawn (по умолчанию в Windows): параметры процессов передаются
+    через pickle
+    """
+    method: str | None = multiprocessing.get_start_method(allow_none=True)
+    multiprocessing.set_start_method('spawn', force=True)
+    yield
+    multiprocessing.set_start_method(method, force=True)
+
+
+@pytest.mark.parametrize('write_threads', [0, 2])
+def test_mapping_generator_spawn(tmp_path, load_config, spawn_start_method, write_threads):
+    """
+    Параллельное формирование (workers=2) с методом запуска spawn дает те же файлы, что и последовательное
+    """
+    load_config(write_threads=write_threads)
+    file_name: str = str(tmp_path / 'mapping.xlsx')
+    make_workbook(file_name, tables=4, attrs=5, hubs=2)
+
+    mapping_generator(file_path=file_name, out_path=str(tmp_path / 'seq'), load_mode='increment',
+                      env=Config.env, author='test', workers=1)
+    mapping_generator(file_path=file_name, out_path=str(tmp_path / 'par'), load_mode='increment',
+                      env=Config.env, author='test', workers=2)
+
+    files: dict[str, bytes] = _read_files(tmp_path / 'seq')
+    assert files
+    assert _read_files(tmp_path / 'par') == files
+
+
+def test_archive_and_render_mapping_spawn(tmp_path, load_config, spawn_start_method):
+    """
+    Параллельное формирование архива и формирование в память с методом запуска spawn
+    """
+    load_config()
+    file_name: str = str(tmp_path / 'mapping.xlsx')
+    make_workbook(file_name, tables=4, attrs=5, hubs=2)
+
+    mapping_generator(file_path=file_name, out_path=str(tmp_path / 'arc'), load_mode='increment',
+                      env=Config.env, author='test', workers=2, out_format='zip')
+    assert os.path.isfile(tmp_path / 'arc.zip')
+
+    files: dict[str, str] = render_mapping(file_name, load_mode='increment', env=Config.env, author='test',
+                                           workers=1)
+    assert render_mapping(file_name, load_mode='increment', env=Config.env, author='test', workers=2) == files
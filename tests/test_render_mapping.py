@@ -0,0 +1,30 @@
+import os
+
+from bench.workbook import make_workbook
+from core.config import Config
+from core.map_gen import render_mapping
+
+
+def _list_files(path) -> set[str]:
+    return {os.path.join(root, file_name) for root, dirs, files in os.walk(path) for file_name in files}
+
+
+def test_render_mapping_writes_no_files(tmp_path, monkeypatch, load_config):
+    """
+    Формирование в память не записывает файлы: ни замеры времени, ни кэш данных EXCEL
+    """
+    load_config()
+
+    file_name: str = str(tmp_path / 'mapping.xlsx')
+    make_workbook(file_name, tables=2, attrs=5, hubs=1)
+    with open(file_name, 'rb') as f:
+        file_data: bytes = f.read()
+
+    monkeypatch.chdir(tmp_path)
+    before: set[str] = _list_files(tmp_path)
+    files: dict[str, str] = render_mapping(file_data, load_mode='increment', env=Config.env, author='test')
+    files_by_name: dict[str, str] = render_mapping(file_name, load_mode='increment', env=Config.env, author='test')
+
+    assert files
+    assert files_by_name == files
+    assert _list_files(tmp_path) == before
@@ -0,0 +1,192 @@
+import logging
+
+import pandas as pd
+import pytest
+
+from core.config import Config
+from core.validation import MappingIssue, validate_mapping
+
+FIELD_TYPE_LIST: dict = {
+    'src_attr_predefined_datatype': {'changeid': ['string']},
+    'tgt_attr_predefined_datatype': {'effective_dttm': ['timestamp', 'not null']},
+    'src_attr_name_regexp': r'^[a-zA-Z][a-zA-Z0-9_\$]*$',
+    'tgt_attr_name_regexp': r'^[a-zA-Z][a-zA-Z0-9_]{0,61}$',
+    'src_attr_datatype': ['string', 'timestamp', 'bigint'],
+    'tgt_attr_datatype': ['text', 'timestamp', 'bigint'],
+    'corresp_datatype': {'string': ['text'], 'timestamp': ['timestamp'], 'bigint': ['bigint']}
+}
+
+COLUMNS: list[str] = ['tgt_table', 'src_table', 'src_attr', 'src_attr_datatype', 'tgt_attribute', 'tgt_attr_datatype',
+                      'tgt_attr_mandatory', 'tgt_pk', 'comment', '_pk', '_rk']
+
+
+@pytest.fixture(autouse=True)
+def field_type_list(monkeypatch):
+    monkeypatch.setattr(Config, 'field_type_list', FIELD_TYPE_LIST, raising=False)
+
+
+def _row(tgt_table: str, src_table=None, src_attr=None, src_type=None, tgt_attr=None, tgt_type=None,
+         mandatory=None, pk: bool = False) -> list:
+    return [tgt_table, src_table, src_attr, src_type, tgt_attr, tgt_type, mandatory,
+            'pk' if pk else None, None, 'pk' if pk else None, None]
+
+
+def _table(tgt_table: str, src_table: str, *rows: list, predefined: bool = True) -> list[list]:
+    """
+    Строки целевой таблицы без ошибок (обязательные атрибуты, поле pk) и дополнительные строки rows
+    """
+    table: list[list] = [_row(tgt_table, src_table, 'id', 'string', 'id', 'text', 'not null', pk=True),
+                         _row(tgt_table, src_table, 'name', 'string', 'name', 'text')]
+    if predefined:
+        table += [_row(tgt_table, src_table, 'changeid', 'string'),
+                  _row(tgt_table, tgt_attr='effective_dttm', tgt_type='timestamp', mandatory='not null')]
+    return table + list(rows)
+
+
+def _frame(*tables: list[list]) -> pd.DataFrame:
+    return pd.DataFrame([row for table in tables for row in table], columns=COLUMNS)
+
+
+def _messages(issues: list[MappingIssue]) -> list[tuple[str, int, str]]:
+    """
+    Раздел, уровень и первая строка каждого замечания
+    """
+    return [(issue.section, issue.level, issue.lines[0]) for issue in issues]
+
+
+def test_valid_table():
+    assert validate_mapping(_frame(_table('rdv.a', 'src.a'))) == dict()
+
+
+def test_datatype_warning():
+    """
+    Различие типов данных источника и целевой таблицы - предупреждение. Пара полей _id / _rk хаба - не различие
+    """
+    issues = validate_mapping(_frame(_table(
+        'rdv.a', 'src.a',
+        _row('rdv.a', 'src.a', 'amount', 'bigint', 'amount', 'text'),
+        _row('rdv.a', 'src.a', 'client_id', 'string', 'client_rk', 'bigint'))))
+
+    assert list(issues) == ['rdv.a']
+    [issue] = issues['rdv.a']
+    assert (issue.section, issue.level) == ('tgt', logging.WARNING)
+    assert issue.lines[:2] == ["Типы данных источника полей и целевой таблицы различаются",
+                               "Проверьте корректность заполнения атрибутов"]
+    assert 'amount' in '\n'.join(issue.lines)
+    assert 'client_id' not in '\n'.join(issue.lines)
+
+
+def test_wrong_datatypes():
+    """
+    Недопустимые типы данных источника и целевой таблицы - ошибки. Тип источника, отсутствующий в corresp_datatype,
+    дает и предупреждение о различии типов
+    """
+    issues = validate_mapping(_frame(_table(
+        'rdv.a', 'src.a',
+        _row('rdv.a', 'src.a', 'price', 'money', 'price', 'text'),
+        _row('rdv.a', 'src.a', 'code', 'string', 'code', 'varchar'))))
+
+    assert _messages(issues['rdv.a']) == [
+        ('tgt', logging.WARNING, "Типы данных источника полей и целевой таблицы различаются"),
+        ('tgt', logging.ERROR, "Неверно указаны типы данных источника 'src.a':"),
+        ('tgt', logging.ERROR, "Неверно указаны типы данных в строках для целевой таблицы 'rdv.a':")]
+    assert issues['rdv.a'][1].lines[-1] == f"Допустимые типы данных: {FIELD_TYPE_LIST['src_attr_datatype']}"
+    assert issues['rdv.a'][2].lines[-1] == f"Допустимые типы данных: {FIELD_TYPE_LIST['tgt_attr_datatype']}"
+
+
+def test_predefined_attributes():
+    """
+    Обязательные атрибуты: отсутствует, указан более одного раза, неверные параметры
+    """
+    issues = validate_mapping(_frame(
+        _table('rdv.missing', 'src.m', predefined=False),
+        _table('rdv.multiple', 'src.d',
+               _row('rdv.multiple', tgt_attr='effective_dttm', tgt_type='timestamp', mandatory='not null')),
+        _table('rdv.wrong', 'src.w', predefined=False),
+        [_row('rdv.wrong', 'src.w', 'changeid', 'bigint'),
+         _row('rdv.wrong', tgt_attr='effective_dttm', tgt_type='timestamp', mandatory='null')]))
+
+    assert _messages(issues['rdv.missing']) == [
+        ('src', logging.ERROR, "Не найден обязательный атрибут 'changeid' таблицы - источника 'src.m'"),
+        ('tgt', logging.ERROR, "Не найден обязательный атрибут 'effective_dttm' для целевой таблицы 'rdv.missing'")]
+    assert _messages(issues['rdv.multiple']) == [
+        ('tgt', logging.ERROR, "Обязательный атрибут 'effective_dttm' для целевой таблицы 'rdv.multiple' "
+                               "указан более одного раза")]
+    assert _messages(issues['rdv.wrong']) == [
+        ('src', logging.ERROR, "Параметры обязательного атрибута 'changeid' для целевой таблицы 'src.w' "
+                               "указаны неверно"),
+        ('tgt', logging.ERROR, "Параметры обязательного атрибута 'effective_dttm' для целевой таблицы 'rdv.wrong' "
+                               "указаны неверно")]
+
+
+def test_mandatory_and_pk():
+    """
+    Признак null/not null: пустое значение - null, другие значения - ошибка. Поля pk должны быть not null
+    """
+    issues = validate_mapping(_frame(_table(
+        'rdv.a', 'src.a',
+        _row('rdv.a', 'src.a', 'descr', 'string', 'descr', 'text', 'nullable'),
+        _row('rdv.a', 'src.a', 'code', 'string', 'code', 'text', pk=True))))
+
+    assert _messages(issues['rdv.a']) == [
+        ('tgt', logging.ERROR, "Неверно указан признак null/not null для целевой таблицы 'rdv.a':"),
+        ('tgt', logging.ERROR, "Неверно указан признак 'Tgt_attr_mandatory' для целевой таблицы 'rdv.a':")]
+    assert 'descr' in '\n'.join(issues['rdv.a'][0].lines)
+    assert issues['rdv.a'][1].lines[1] == "Поля отмеченные как 'pk' должны быть 'not null'"
+    assert 'code' in '\n'.join(issues['rdv.a'][1].lines)
+    assert 'descr' not in '\n'.join(issues['rdv.a'][1].lines)
+
+
+def test_attribute_names():
+    """
+    Названия полей источника и целевой таблицы проверяются по шаблонам, в замечании - список неверных названий
+    """
+    issues = validate_mapping(_frame(_table(
+        'rdv.a', 'src.a',
+        _row('rdv.a', 'src.a', '1st', 'string'),
+        _row('rdv.a', 'src.a', 'sum$', 'string'),
+        _row('rdv.a', tgt_attr='bad-name', tgt_type='text'))))
+
+    src_pattern: str = FIELD_TYPE_LIST['src_attr_name_regexp']
+    tgt_pattern: str = FIELD_TYPE_LIST['tgt_attr_name_regexp']
+    assert [(issue.section, issue.level, issue.lines) for issue in issues['rdv.a']] == [
+        ('src', logging.ERROR, [f"Названия полей в таблице - источнике 'src.a' "
+                                f"не соответствуют шаблону '{src_pattern}'", '1st']),
+        ('tgt', logging.ERROR, [f"Названия полей целевой таблицы 'rdv.a' не соответствуют шаблону '{tgt_pattern}'",
+                                'bad-name'])]
+
+
+def test_src_table_name_from_first_filled_row():
+    """
+    Имя таблицы - источника в сообщениях берется из первой строки таблицы, в которой заполнены поля источника
+    """
+    rows: list[list] = [_row('rdv.a', tgt_attr='effective_dttm', tgt_type='timestamp', mandatory='not null'),
+                        _row('rdv.a', src_attr='no_table', src_type='string'),
+                        _row('rdv.a', 'src.first', 'id', 'string', 'id', 'text', 'not null', pk=True),
+                        _row('rdv.a', 'src.second', '2nd', 'string')]
+    issues = validate_mapping(_frame(rows))
+
+    assert _messages(issues['rdv.a']) == [
+        ('src', logging.ERROR, f"Названия полей в таблице - источнике 'src.first' не соответствуют шаблону "
+                               f"'{FIELD_TYPE_LIST['src_attr_name_regexp']}'"),
+        ('src', logging.ERROR, "Не найден обязательный атрибут 'changeid' таблицы - источника 'src.first'")]
+
+
+def test_tables_validated_independently():
+    """
+    Проверка всего листа дает те же замечания, что и проверка строк каждой целевой таблицы по отдельности
+    """
+    mapping_df = _frame(
+        _table('rdv.a', 'src.a', _row('rdv.a', 'src.a', 'amount', 'bigint', 'amount', 'text')),
+        _table('rdv.b', 'src.b', _row('rdv.b', 'src.b', 'code', 'string', 'code', 'varchar', pk=True),
+               predefined=False),
+        _table('rdv.c', 'src.c'),
+        _table('rdv.d', 'src.d', _row('rdv.d', 'src.d', '1st', 'money', 'bad-name', 'text', 'nullable')))
+
+    issues = validate_mapping(mapping_df)
+    by_table: dict[str, list[MappingIssue]] = dict()
+    for tgt_table, rows in mapping_df.groupby('tgt_table', sort=False):
+        by_table.update(validate_mapping(rows))
+
+    assert set(issues) == {'rdv.a', 'rdv.b', 'rdv.d'}
+    assert issues == by_table